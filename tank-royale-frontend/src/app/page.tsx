@@ -16,7 +16,8 @@ export default function Home() {
     setIsConnecting(true)
     setConnectionError(null)
     
-    const newClient = new TankRoyaleClient(serverUrl)
+    // Decode ticks in a worker so large battles do not compete with rendering
+    const newClient = new TankRoyaleClient(serverUrl, { useWorker: true })
     
     // Listen for connection state changes
     newClient.onConnectionStateChange((state) => {
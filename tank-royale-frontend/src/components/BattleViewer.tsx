@@ -1,9 +1,13 @@
 'use client'
 
-import { useEffect, useState } from 'react'
+import { useEffect, useRef, useState } from 'react'
 import { TankRoyaleClient } from '@/services/TankRoyaleClient'
+import { BattleRenderer, RenderStats } from '@/services/BattleRenderer'
 import { TickEventForObserver, GameStartedEventForObserver, GameEndedEventForObserver } from '@/types/generated'
 
+// Status, event log and debug output follow the battle at this rate, not per tick
+const STATUS_INTERVAL_MS = 250
+
 interface BattleViewerProps {
   client: TankRoyaleClient
 }
@@ -13,30 +17,69 @@ export function BattleViewer({ client }: BattleViewerProps) {
   const [gameState, setGameState] = useState<'waiting' | 'running' | 'ended'>('waiting')
   const [gameInfo, setGameInfo] = useState<GameStartedEventForObserver | null>(null)
   const [eventLog, setEventLog] = useState<string[]>([])
+  const [renderStats, setRenderStats] = useState<RenderStats | null>(null)
+
+  // Ticks go to the renderer and these refs; React only sees them at STATUS_INTERVAL_MS
+  const arenaRef = useRef<HTMLDivElement>(null)
+  const rendererRef = useRef<BattleRenderer | null>(null)
+  const latestTickRef = useRef<TickEventForObserver | null>(null)
+  const pendingEventsRef = useRef<string[]>([])
+
+  useEffect(() => {
+    const renderer = new BattleRenderer()
+    rendererRef.current = renderer
+    renderer.mount(arenaRef.current!).catch(error => {
+      console.error('Failed to start the battle renderer:', error)
+    })
+
+    let shownTick: TickEventForObserver | null = null
+    const statusTimer = setInterval(() => {
+      if (latestTickRef.current !== shownTick) {
+        shownTick = latestTickRef.current
+        setCurrentTick(shownTick)
+      }
+      if (pendingEventsRef.current.length > 0) {
+        const newEvents = pendingEventsRef.current
+        pendingEventsRef.current = []
+        setEventLog(prev => [...prev, ...newEvents].slice(-25)) // Keep last 25 events
+      }
+      setRenderStats(renderer.getStats())
+    }, STATUS_INTERVAL_MS)
+
+    return () => {
+      clearInterval(statusTimer)
+      renderer.destroy()
+      rendererRef.current = null
+    }
+  }, [])
 
   useEffect(() => {
     const handleTick = (tickEvent: TickEventForObserver) => {
-      setCurrentTick(tickEvent)
-      
+      latestTickRef.current = tickEvent
+      rendererRef.current?.pushTick(tickEvent)
+
       // Add any tick events to the log
       if (tickEvent.events && tickEvent.events.length > 0) {
-        const newEvents = tickEvent.events.map(event => 
+        const newEvents = tickEvent.events.map(event =>
           `Turn ${tickEvent.roundNumber}: ${JSON.stringify(event)}`
         )
-        setEventLog(prev => [...prev.slice(-20), ...newEvents].slice(-25)) // Keep last 25 events
+        pendingEventsRef.current = [...pendingEventsRef.current, ...newEvents].slice(-25)
       }
     }
 
     const handleGameStarted = (event: GameStartedEventForObserver) => {
+      const setup = event.gameSetup as { arenaWidth?: number; arenaHeight?: number } | null
+      rendererRef.current?.startGame(setup?.arenaWidth ?? 800, setup?.arenaHeight ?? 600)
       setGameState('running')
       setGameInfo(event)
-      setEventLog(prev => [...prev, `Game started with ${event.participants.length} participants`])
+      // Through the pending list, so it stays in order with the tick events
+      pendingEventsRef.current = [...pendingEventsRef.current, `Game started with ${event.participants.length} participants`]
       console.log('🎮 Game started:', event)
     }
 
     const handleGameEnded = (event: GameEndedEventForObserver) => {
       setGameState('ended')
-      setEventLog(prev => [...prev, `Game ended after ${event.numberOfRounds} rounds`])
+      pendingEventsRef.current = [...pendingEventsRef.current, `Game ended after ${event.numberOfRounds} rounds`]
       console.log('🏁 Game ended:', event)
     }
 
@@ -116,24 +159,36 @@ export function BattleViewer({ client }: BattleViewerProps) {
               {gameInfo?.participants ? Array.isArray(gameInfo.participants) ? gameInfo.participants.length : 0 : 'N/A'}
             </span>
           </div>
+          <div>
+            <span className="text-gray-400">Render:</span>
+            <span className="ml-2 font-medium">
+              {renderStats ? `${renderStats.fps} fps` : 'N/A'}
+            </span>
+          </div>
+          <div>
+            <span className="text-gray-400">Ticks/s:</span>
+            <span className="ml-2 font-medium">
+              {renderStats ? renderStats.ticksPerSecond : 'N/A'}
+            </span>
+          </div>
         </div>
       </div>
 
-      {/* Battle Arena Placeholder */}
+      {/* Battle Arena */}
       <div className="bg-gray-800 rounded-lg p-4 border border-gray-700">
         <h3 className="text-lg font-semibold mb-4">Battle Arena</h3>
-        <div className="aspect-video bg-gray-900 rounded-lg border border-gray-600 flex items-center justify-center">
-          <div className="text-center">
-            <div className="text-4xl mb-2">🎮</div>
-            <p className="text-gray-400">
-              {gameState === 'waiting' 
-                ? 'Waiting for battle to start...' 
-                : 'Battle visualization will appear here'}
-            </p>
-            <p className="text-sm text-gray-500 mt-2">
-              (Pixi.js renderer will be implemented in Sprint 2)
-            </p>
-          </div>
+        <div
+          ref={arenaRef}
+          className="relative aspect-video bg-gray-900 rounded-lg border border-gray-600 overflow-hidden"
+        >
+          {gameState === 'waiting' && (
+            <div className="absolute inset-0 z-10 flex items-center justify-center text-center">
+              <div>
+                <div className="text-4xl mb-2">🎮</div>
+                <p className="text-gray-400">Waiting for battle to start...</p>
+              </div>
+            </div>
+          )}
         </div>
       </div>
 
@@ -163,7 +218,7 @@ export function BattleViewer({ client }: BattleViewerProps) {
           </summary>
           <div className="mt-4 bg-gray-900 rounded-lg p-3 overflow-auto">
             <pre className="text-xs text-gray-300">
-              {JSON.stringify(currentTick, null, 2)}
+              {JSON.stringify(currentTick, (key, value) => key === 'frame' ? undefined : value, 2)}
             </pre>
           </div>
         </details>
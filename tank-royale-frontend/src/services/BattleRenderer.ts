@@ -0,0 +1,501 @@
+import type { Application, Container, Graphics, Sprite, Texture } from 'pixi.js'
+import { TickEventForObserver } from '@/types/generated'
+import { BOT_FIELDS, BOT_STRIDE, BULLET_FIELDS, BULLET_STRIDE, TickFrame, packTick } from './tickFrame'
+
+const BOT_ID = BOT_FIELDS.indexOf('id')
+const BOT_X = BOT_FIELDS.indexOf('x')
+const BOT_Y = BOT_FIELDS.indexOf('y')
+const BOT_DIRECTION = BOT_FIELDS.indexOf('direction')
+const BOT_GUN_DIRECTION = BOT_FIELDS.indexOf('gunDirection')
+const BULLET_ID = BULLET_FIELDS.indexOf('bulletId')
+const BULLET_OWNER = BULLET_FIELDS.indexOf('ownerId')
+const BULLET_X = BULLET_FIELDS.indexOf('x')
+const BULLET_Y = BULLET_FIELDS.indexOf('y')
+
+const BOT_SIZE = 36
+const GUN_LENGTH = 24
+const BULLET_RADIUS = 3
+const DEFAULT_TICK_INTERVAL_MS = 1000 / 30
+const TICK_INTERVAL_SMOOTHING = 0.2
+const POSITION_EPSILON = 0.01
+const ROTATION_EPSILON = 0.0005
+const DEFAULT_BOT_COLOR = '#60a5fa'
+const DEFAULT_BULLET_COLOR = '#fde68a'
+const ARENA_COLOR = 0x111827
+const ARENA_BORDER_COLOR = 0x4b5563
+const DEG_TO_RAD = Math.PI / 180
+
+/**
+ * One tick's bot and bullet state, in arrays that are reused from tick to tick
+ */
+interface TickBuffer {
+  bots: Float64Array
+  botCount: number
+  bullets: Float64Array
+  bulletCount: number
+  roundNumber: number
+  receivedAt: number
+  /** Bot id to index in bots */
+  botIndex: Map<number, number>
+  /** Bullet id to index in bullets */
+  bulletIndex: Map<number, number>
+}
+
+interface BotSprite {
+  container: Container
+  body: Sprite
+  gun: Sprite
+  x: number
+  y: number
+  direction: number
+  gunDirection: number
+  color: string
+}
+
+interface BulletSprite {
+  sprite: Sprite
+  x: number
+  y: number
+  color: string
+}
+
+export interface RenderStats {
+  /** Animation frames per second */
+  fps: number
+  /** Frames in which something moved and the scene was drawn */
+  drawsPerSecond: number
+  /** Ticks received per second */
+  ticksPerSecond: number
+  /** Sprites in the pools, visible or not */
+  pooledSprites: number
+}
+
+function emptyBuffer(): TickBuffer {
+  return {
+    bots: new Float64Array(16 * BOT_STRIDE),
+    botCount: 0,
+    bullets: new Float64Array(64 * BULLET_STRIDE),
+    bulletCount: 0,
+    roundNumber: -1,
+    receivedAt: 0,
+    botIndex: new Map(),
+    bulletIndex: new Map()
+  }
+}
+
+function grown(array: Float64Array, length: number): Float64Array {
+  return array.length >= length ? array : new Float64Array(Math.max(length, array.length * 2))
+}
+
+function lerp(from: number, to: number, alpha: number): number {
+  return from + (to - from) * alpha
+}
+
+/**
+ * Interpolate angles in degrees along the shorter arc
+ */
+function lerpAngle(from: number, to: number, alpha: number): number {
+  const delta = ((to - from + 540) % 360) - 180
+  return from + delta * alpha
+}
+
+/**
+ * Draws the battle with Pixi outside of React.
+ *
+ * Ticks are copied into two buffers, the previous and the current tick. A
+ * requestAnimationFrame loop draws bots and bullets interpolated between
+ * the two, so motion stays smooth at the display's frame rate whatever the
+ * tick rate is. Sprites come from pools that only grow, each sprite's last
+ * position is remembered so only moved entities are touched, and the scene
+ * is not drawn at all in frames where nothing moved.
+ */
+export class BattleRenderer {
+  private app: Application | null = null
+  private world: Container | null = null
+  private arena: Graphics | null = null
+  private botLayer: Container | null = null
+  private bulletLayer: Container | null = null
+  private textures: { body: Texture; gun: Texture; bullet: Texture } | null = null
+  private createSprite: ((texture: Texture) => Sprite) | null = null
+  private createContainer: (() => Container) | null = null
+
+  private previous = emptyBuffer()
+  private current = emptyBuffer()
+  private tickInterval = DEFAULT_TICK_INTERVAL_MS
+  private sessions = new Map<number, string>()
+  private botColors = new Map<number, string>()
+  private bulletColors = new Map<number, string>()
+
+  private botPool: BotSprite[] = []
+  private bulletPool: BulletSprite[] = []
+  private visibleBots = 0
+  private visibleBullets = 0
+  private arenaWidth = 800
+  private arenaHeight = 600
+  private layoutDirty = true
+  private layoutWidth = 0
+  private layoutHeight = 0
+  private stateDirty = false
+  private frameHandle = 0
+  private destroyed = false
+
+  private statsStartedAt = 0
+  private framesCounted = 0
+  private drawsCounted = 0
+  private ticksCounted = 0
+  private stats: RenderStats = { fps: 0, drawsPerSecond: 0, ticksPerSecond: 0, pooledSprites: 0 }
+
+  /**
+   * Create the Pixi application inside host and start the frame loop
+   */
+  async mount(host: HTMLElement): Promise<void> {
+    // Loaded here so the module can be imported during server-side rendering
+    const pixi = await import('pixi.js')
+    const app = new pixi.Application()
+    await app.init({
+      resizeTo: host,
+      background: ARENA_COLOR,
+      antialias: true,
+      autoDensity: true,
+      resolution: window.devicePixelRatio || 1,
+      // The frame loop below decides when to draw
+      autoStart: false,
+      sharedTicker: false
+    })
+    if (this.destroyed) {
+      app.destroy(true, { children: true })
+      return
+    }
+
+    app.canvas.style.position = 'absolute'
+    app.canvas.style.inset = '0'
+    host.appendChild(app.canvas)
+
+    const body = new pixi.Graphics()
+      .roundRect(-BOT_SIZE / 2, -BOT_SIZE / 2, BOT_SIZE, BOT_SIZE, 6)
+      .fill(0xffffff)
+      .roundRect(-BOT_SIZE / 2, -BOT_SIZE / 2, BOT_SIZE, BOT_SIZE, 6)
+      .stroke({ width: 2, color: 0x000000, alpha: 0.4 })
+    const gun = new pixi.Graphics().rect(0, -2, GUN_LENGTH, 4).fill(0xffffff)
+    const bullet = new pixi.Graphics().circle(0, 0, BULLET_RADIUS).fill(0xffffff)
+    this.textures = {
+      body: app.renderer.generateTexture(body),
+      gun: app.renderer.generateTexture(gun),
+      bullet: app.renderer.generateTexture(bullet)
+    }
+    body.destroy()
+    gun.destroy()
+    bullet.destroy()
+
+    this.createSprite = (texture) => new pixi.Sprite(texture)
+    this.createContainer = () => new pixi.Container()
+    this.world = new pixi.Container()
+    this.arena = new pixi.Graphics()
+    this.bulletLayer = new pixi.Container()
+    this.botLayer = new pixi.Container()
+    this.world.addChild(this.arena, this.botLayer, this.bulletLayer)
+    app.stage.addChild(this.world)
+    this.app = app
+
+    this.statsStartedAt = performance.now()
+    this.frameHandle = requestAnimationFrame(this.frame)
+  }
+
+  /**
+   * Stop the frame loop and release the canvas, sprites and textures
+   */
+  destroy(): void {
+    this.destroyed = true
+    cancelAnimationFrame(this.frameHandle)
+    if (this.app) {
+      for (const texture of Object.values(this.textures ?? {})) {
+        texture.destroy(true)
+      }
+      this.app.destroy(true, { children: true })
+      this.app = null
+    }
+  }
+
+  /**
+   * Set the arena size from the game setup and forget the previous game
+   */
+  startGame(arenaWidth: number, arenaHeight: number): void {
+    this.arenaWidth = arenaWidth
+    this.arenaHeight = arenaHeight
+    this.previous = emptyBuffer()
+    this.current = emptyBuffer()
+    this.botColors.clear()
+    this.bulletColors.clear()
+    this.layoutDirty = true
+    this.stateDirty = true
+  }
+
+  /**
+   * Take a tick. Uses the packed frame from the decoder worker when there is
+   * one; otherwise the tick is packed here.
+   */
+  pushTick(tick: TickEventForObserver): void {
+    const frame: TickFrame = tick.frame ?? packTick(tick, this.sessions)
+    const now = performance.now()
+    if (this.current.receivedAt > 0) {
+      const interval = Math.min(Math.max(now - this.current.receivedAt, 1), 1000)
+      this.tickInterval += TICK_INTERVAL_SMOOTHING * (interval - this.tickInterval)
+    }
+
+    // The old previous buffer is overwritten with the new tick
+    const buffer = this.previous
+    this.previous = this.current
+    this.current = buffer
+
+    buffer.bots = grown(buffer.bots, frame.bots.length)
+    buffer.bots.set(frame.bots)
+    buffer.botCount = frame.bots.length / BOT_STRIDE
+    buffer.bullets = grown(buffer.bullets, frame.bullets.length)
+    buffer.bullets.set(frame.bullets)
+    buffer.bulletCount = frame.bullets.length / BULLET_STRIDE
+    buffer.roundNumber = frame.roundNumber
+    buffer.receivedAt = now
+    buffer.botIndex.clear()
+    for (let index = 0; index < buffer.botCount; index++) {
+      buffer.botIndex.set(buffer.bots[index * BOT_STRIDE + BOT_ID], index)
+    }
+    buffer.bulletIndex.clear()
+    for (let index = 0; index < buffer.bulletCount; index++) {
+      buffer.bulletIndex.set(buffer.bullets[index * BULLET_STRIDE + BULLET_ID], index)
+    }
+
+    // Colors are only sent when they change
+    for (const { index, fields } of frame.botExtras) {
+      const id = frame.bots[index * BOT_STRIDE + BOT_ID]
+      if (typeof fields.bodyColor === 'string') {
+        this.botColors.set(id, fields.bodyColor)
+      }
+      if (typeof fields.bulletColor === 'string') {
+        this.bulletColors.set(id, fields.bulletColor)
+      }
+    }
+
+    // Nothing to interpolate from across rounds
+    if (this.previous.roundNumber !== buffer.roundNumber) {
+      this.previous.botIndex.clear()
+      this.previous.bulletIndex.clear()
+    }
+    this.stateDirty = true
+    this.ticksCounted++
+  }
+
+  getStats(): RenderStats {
+    return this.stats
+  }
+
+  private frame = (now: number): void => {
+    this.frameHandle = requestAnimationFrame(this.frame)
+    this.framesCounted++
+    this.updateStats(now)
+    if (!this.app) {
+      return
+    }
+
+    // resizeTo follows the host element; the arena has to be fitted again
+    const { width, height } = this.app.screen
+    if (width !== this.layoutWidth || height !== this.layoutHeight) {
+      this.layoutDirty = true
+    }
+
+    // The frame timestamp can be a little older than a tick that just arrived
+    const alpha = Math.min(Math.max((now - this.current.receivedAt) / this.tickInterval, 0), 1)
+    // Once the current tick is reached, nothing moves until the next one
+    if (alpha >= 1 && !this.stateDirty && !this.layoutDirty) {
+      return
+    }
+    this.stateDirty = alpha < 1
+
+    let changed = 0
+    if (this.layoutDirty) {
+      this.layout()
+      changed++
+    }
+    changed += this.drawBots(alpha) + this.drawBullets(alpha)
+    if (changed > 0) {
+      this.app.render()
+      this.drawsCounted++
+    }
+  }
+
+  /**
+   * Fit the arena into the canvas. Tank Royale's y axis points up, so the
+   * world is flipped vertically, which also makes its counter-clockwise
+   * degrees map directly onto rotations.
+   */
+  private layout(): void {
+    const { app, world, arena } = this
+    if (!app || !world || !arena) {
+      return
+    }
+    this.layoutDirty = false
+    const { width, height } = app.screen
+    this.layoutWidth = width
+    this.layoutHeight = height
+    const scale = Math.min(width / this.arenaWidth, height / this.arenaHeight)
+    world.scale.set(scale, -scale)
+    world.position.set(
+      (width - this.arenaWidth * scale) / 2,
+      (height + this.arenaHeight * scale) / 2
+    )
+    arena.clear()
+      .rect(0, 0, this.arenaWidth, this.arenaHeight)
+      .fill(ARENA_COLOR)
+      .stroke({ width: 2 / scale, color: ARENA_BORDER_COLOR })
+  }
+
+  private drawBots(alpha: number): number {
+    const { current, previous } = this
+    let changed = 0
+    for (let index = 0; index < current.botCount; index++) {
+      const offset = index * BOT_STRIDE
+      const id = current.bots[offset + BOT_ID]
+      let x = current.bots[offset + BOT_X]
+      let y = current.bots[offset + BOT_Y]
+      let direction = current.bots[offset + BOT_DIRECTION]
+      let gunDirection = current.bots[offset + BOT_GUN_DIRECTION]
+      const previousIndex = alpha < 1 ? previous.botIndex.get(id) : undefined
+      if (previousIndex !== undefined) {
+        const from = previousIndex * BOT_STRIDE
+        x = lerp(previous.bots[from + BOT_X], x, alpha)
+        y = lerp(previous.bots[from + BOT_Y], y, alpha)
+        direction = lerpAngle(previous.bots[from + BOT_DIRECTION], direction, alpha)
+        gunDirection = lerpAngle(previous.bots[from + BOT_GUN_DIRECTION], gunDirection, alpha)
+      }
+      changed += this.placeBot(this.botSprite(index), x, y, direction, gunDirection, this.botColors.get(id))
+    }
+    for (let index = current.botCount; index < this.visibleBots; index++) {
+      this.botPool[index].container.visible = false
+      changed++
+    }
+    this.visibleBots = current.botCount
+    return changed
+  }
+
+  private drawBullets(alpha: number): number {
+    const { current, previous } = this
+    let changed = 0
+    for (let index = 0; index < current.bulletCount; index++) {
+      const offset = index * BULLET_STRIDE
+      let x = current.bullets[offset + BULLET_X]
+      let y = current.bullets[offset + BULLET_Y]
+      const previousIndex = alpha < 1 ? previous.bulletIndex.get(current.bullets[offset + BULLET_ID]) : undefined
+      if (previousIndex !== undefined) {
+        const from = previousIndex * BULLET_STRIDE
+        x = lerp(previous.bullets[from + BULLET_X], x, alpha)
+        y = lerp(previous.bullets[from + BULLET_Y], y, alpha)
+      }
+      const color = this.bulletColors.get(current.bullets[offset + BULLET_OWNER])
+      changed += this.placeBullet(this.bulletSprite(index), x, y, color)
+    }
+    for (let index = current.bulletCount; index < this.visibleBullets; index++) {
+      this.bulletPool[index].sprite.visible = false
+      changed++
+    }
+    this.visibleBullets = current.bulletCount
+    return changed
+  }
+
+  /**
+   * Move a bot sprite if it moved; returns 1 if anything changed
+   */
+  private placeBot(
+    bot: BotSprite, x: number, y: number, direction: number, gunDirection: number, color = DEFAULT_BOT_COLOR
+  ): number {
+    let changed = 0
+    if (!bot.container.visible) {
+      bot.container.visible = true
+      changed = 1
+    }
+    if (Math.abs(bot.x - x) > POSITION_EPSILON || Math.abs(bot.y - y) > POSITION_EPSILON) {
+      bot.container.position.set(x, y)
+      bot.x = x
+      bot.y = y
+      changed = 1
+    }
+    const rotation = direction * DEG_TO_RAD
+    if (Math.abs(bot.direction - rotation) > ROTATION_EPSILON) {
+      bot.body.rotation = rotation
+      bot.direction = rotation
+      changed = 1
+    }
+    const gunRotation = gunDirection * DEG_TO_RAD
+    if (Math.abs(bot.gunDirection - gunRotation) > ROTATION_EPSILON) {
+      bot.gun.rotation = gunRotation
+      bot.gunDirection = gunRotation
+      changed = 1
+    }
+    if (bot.color !== color) {
+      bot.body.tint = color
+      bot.gun.tint = color
+      bot.color = color
+      changed = 1
+    }
+    return changed
+  }
+
+  private placeBullet(bullet: BulletSprite, x: number, y: number, color = DEFAULT_BULLET_COLOR): number {
+    let changed = 0
+    if (!bullet.sprite.visible) {
+      bullet.sprite.visible = true
+      changed = 1
+    }
+    if (Math.abs(bullet.x - x) > POSITION_EPSILON || Math.abs(bullet.y - y) > POSITION_EPSILON) {
+      bullet.sprite.position.set(x, y)
+      bullet.x = x
+      bullet.y = y
+      changed = 1
+    }
+    if (bullet.color !== color) {
+      bullet.sprite.tint = color
+      bullet.color = color
+      changed = 1
+    }
+    return changed
+  }
+
+  private botSprite(index: number): BotSprite {
+    while (this.botPool.length <= index) {
+      const container = this.createContainer!()
+      const body = this.createSprite!(this.textures!.body)
+      const gun = this.createSprite!(this.textures!.gun)
+      body.anchor.set(0.5)
+      gun.anchor.set(0, 0.5)
+      container.addChild(body, gun)
+      container.visible = false
+      this.botLayer!.addChild(container)
+      this.botPool.push({ container, body, gun, x: NaN, y: NaN, direction: NaN, gunDirection: NaN, color: '' })
+    }
+    return this.botPool[index]
+  }
+
+  private bulletSprite(index: number): BulletSprite {
+    while (this.bulletPool.length <= index) {
+      const sprite = this.createSprite!(this.textures!.bullet)
+      sprite.anchor.set(0.5)
+      sprite.visible = false
+      this.bulletLayer!.addChild(sprite)
+      this.bulletPool.push({ sprite, x: NaN, y: NaN, color: '' })
+    }
+    return this.bulletPool[index]
+  }
+
+  private updateStats(now: number): void {
+    const elapsed = now - this.statsStartedAt
+    if (elapsed < 1000) {
+      return
+    }
+    this.stats = {
+      fps: Math.round((this.framesCounted * 1000) / elapsed),
+      drawsPerSecond: Math.round((this.drawsCounted * 1000) / elapsed),
+      ticksPerSecond: Math.round((this.ticksCounted * 1000) / elapsed),
+      pooledSprites: this.botPool.length + this.bulletPool.length
+    }
+    this.statsStartedAt = now
+    this.framesCounted = this.drawsCounted = this.ticksCounted = 0
+  }
+}
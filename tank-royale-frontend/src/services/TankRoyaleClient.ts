@@ -4,9 +4,22 @@ import {
   ConnectionState,
   ObserverHandshake 
 } from '@/types/generated'
+import { TickFrame, WorkerToClient, ClientToWorker, unpackTick } from './tickFrame'
+
+export interface TankRoyaleClientOptions {
+  /**
+   * Run the WebSocket and tick decoding in a Web Worker. Ticks the UI has no
+   * time for are coalesced in the worker, so only the latest state is handed
+   * over, at most once per animation frame.
+   */
+  useWorker?: boolean
+}
 
 export class TankRoyaleClient {
   private ws: WebSocket | null = null
+  private worker: Worker | null = null
+  private workerSessions = new Map<number, string>()
+  private ackScheduled = false
   // eslint-disable-next-line @typescript-eslint/no-explicit-any
   private listeners = new Map<keyof BattleEventMap, Set<(event: any) => void>>()
   private connectionListeners = new Set<(state: ConnectionState) => void>()
@@ -19,7 +32,7 @@ export class TankRoyaleClient {
     isConnecting: false
   }
 
-  constructor(private serverUrl: string) {}
+  constructor(private serverUrl: string, private options: TankRoyaleClientOptions = {}) {}
 
   /**
    * Connect to the Tank Royale server
@@ -45,16 +58,15 @@ export class TankRoyaleClient {
         throw new Error('Invalid WebSocket URL. Must start with ws:// or wss://')
       }
       
+      if (this.options.useWorker && typeof Worker !== 'undefined') {
+        this.connectWorker(wsUrl)
+        return
+      }
+
       this.ws = new WebSocket(wsUrl)
       
       this.ws.onopen = () => {
-        console.log('✅ Connected to Tank Royale server')
-        this.reconnectAttempts = 0
-        this.updateConnectionState({
-          isConnected: true,
-          isConnecting: false,
-          error: undefined
-        })
+        this.handleOpen()
         
         // Send observer handshake
         this.sendObserverHandshake()
@@ -70,36 +82,11 @@ export class TankRoyaleClient {
       }
       
       this.ws.onclose = (event) => {
-        console.log('🔌 Disconnected from Tank Royale server', event.code, event.reason)
-        
-        let errorMessage = 'Connection closed'
-        if (event.code === 1006) {
-          errorMessage = 'Connection failed - server may be offline or unreachable'
-        } else if (event.code === 1000) {
-          errorMessage = 'Connection closed normally'
-        } else if (event.reason) {
-          errorMessage = event.reason
-        }
-        
-        this.updateConnectionState({
-          isConnected: false,
-          isConnecting: false,
-          error: errorMessage
-        })
-        
-        // Attempt reconnection if not intentional
-        if (!event.wasClean && event.code !== 1000) {
-          this.attemptReconnect()
-        }
+        this.handleClose(event.code, event.reason, event.wasClean)
       }
       
       this.ws.onerror = (error) => {
-        console.error('❌ WebSocket error:', error)
-        this.updateConnectionState({
-          isConnected: false,
-          isConnecting: false,
-          error: 'WebSocket connection error - check server URL and network connectivity'
-        })
+        this.handleError(error)
       }
       
     } catch (error) {
@@ -112,6 +99,116 @@ export class TankRoyaleClient {
     }
   }
 
+  /**
+   * Connect through the tick decoder worker, which owns the WebSocket
+   */
+  private connectWorker(wsUrl: string): void {
+    this.worker?.terminate()
+    this.workerSessions.clear()
+    this.ackScheduled = false
+
+    const worker = new Worker(new URL('./tickDecoder.worker.ts', import.meta.url), { type: 'module' })
+    this.worker = worker
+
+    worker.onmessage = (event: MessageEvent<WorkerToClient>) => {
+      const message = event.data
+      switch (message.kind) {
+        case 'open':
+          this.handleOpen()
+          break
+        case 'close':
+          this.handleClose(message.code, message.reason, message.wasClean)
+          break
+        case 'error':
+          this.handleError(message)
+          break
+        case 'message':
+          this.handleMessage(message.message as unknown as WebSocketMessage)
+          break
+        case 'tick':
+          this.handleTickFrame(message.frame)
+          break
+      }
+    }
+
+    worker.onerror = (error) => {
+      console.error('❌ Tick decoder worker error:', error)
+    }
+
+    this.postToWorker({ kind: 'connect', url: wsUrl, handshake: this.createObserverHandshake() })
+  }
+
+  private postToWorker(message: ClientToWorker): void {
+    this.worker?.postMessage(message)
+  }
+
+  /**
+   * Dispatch a tick decoded by the worker, then ask for the next one once the
+   * browser has had a chance to paint
+   */
+  private handleTickFrame(frame: TickFrame): void {
+    for (const { id, sessionId } of frame.sessions) {
+      this.workerSessions.set(id, sessionId)
+    }
+    this.handleMessage(unpackTick(frame, this.workerSessions) as unknown as WebSocketMessage)
+
+    if (!this.ackScheduled) {
+      this.ackScheduled = true
+      const ack = () => {
+        this.ackScheduled = false
+        this.postToWorker({ kind: 'ack' })
+      }
+      if (typeof requestAnimationFrame !== 'undefined') {
+        requestAnimationFrame(ack)
+      } else {
+        setTimeout(ack, 0)
+      }
+    }
+  }
+
+  private handleOpen(): void {
+    console.log('✅ Connected to Tank Royale server')
+    this.reconnectAttempts = 0
+    this.updateConnectionState({
+      isConnected: true,
+      isConnecting: false,
+      error: undefined
+    })
+  }
+
+  private handleClose(code: number, reason: string, wasClean: boolean): void {
+    console.log('🔌 Disconnected from Tank Royale server', code, reason)
+    
+    let errorMessage = 'Connection closed'
+    if (code === 1006) {
+      errorMessage = 'Connection failed - server may be offline or unreachable'
+    } else if (code === 1000) {
+      errorMessage = 'Connection closed normally'
+    } else if (reason) {
+      errorMessage = reason
+    }
+    
+    this.updateConnectionState({
+      isConnected: false,
+      isConnecting: false,
+      error: errorMessage
+    })
+    
+    // Attempt reconnection if not intentional
+    if (!wasClean && code !== 1000) {
+      this.attemptReconnect()
+    }
+  }
+
+  private handleError(error: unknown): void {
+    console.error('❌ WebSocket error:', error)
+    this.updateConnectionState({
+      isConnected: false,
+      isConnecting: false,
+      error: 'WebSocket connection error - check server URL and network connectivity'
+    })
+  }
+
   /**
    * Disconnect from the server
    */
@@ -125,6 +222,12 @@ export class TankRoyaleClient {
       this.ws.close(1000, 'Client disconnecting')
       this.ws = null
     }
+
+    if (this.worker) {
+      this.postToWorker({ kind: 'close' })
+      this.worker.terminate()
+      this.worker = null
+    }
     
     this.updateConnectionState({
       isConnected: false,
@@ -137,13 +240,16 @@ export class TankRoyaleClient {
    * Send observer handshake to the server
    */
   private sendObserverHandshake(): void {
-    const handshake: ObserverHandshake = {
+    this.send(this.createObserverHandshake())
+  }
+
+  private createObserverHandshake(): ObserverHandshake {
+    return {
+      type: 'ObserverHandshake',
       name: 'Tank Royale Frontend',
       sessionId: this.generateSessionId(),
       version: '1.0'
     }
-    
-    this.send(handshake)
   }
 
   /**
@@ -235,7 +341,9 @@ export class TankRoyaleClient {
    * Send a message to the server
    */
   send(message: unknown): void {
-    if (this.ws?.readyState === WebSocket.OPEN) {
+    if (this.worker && this.connectionState.isConnected) {
+      this.postToWorker({ kind: 'send', message })
+    } else if (this.ws?.readyState === WebSocket.OPEN) {
       this.ws.send(JSON.stringify(message))
     } else {
       console.warn('⚠️ Cannot send message: WebSocket not connected')
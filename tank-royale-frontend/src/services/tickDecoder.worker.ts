@@ -0,0 +1,110 @@
+/**
+ * Web Worker that owns the observer WebSocket for TankRoyaleClient.
+ *
+ * Parsing every tick here keeps JSON.parse off the main thread. Ticks are
+ * packed into typed arrays and transferred to the client. Only one tick is in
+ * flight at a time: until the client acknowledges it, newer ticks replace the
+ * pending one, so a client that falls behind gets the latest state (plus all
+ * events) instead of a growing backlog.
+ */
+import { ObserverHandshake, TickEventForObserver } from '@/types/generated'
+import { ClientToWorker, TickFrame, WorkerToClient, coalesceFrames, packTick } from './tickFrame'
+
+// The dom lib is used for the whole project, so describe the worker scope locally
+const ctx = self as unknown as {
+  postMessage(message: WorkerToClient, transfer?: Transferable[]): void
+  onmessage: ((event: MessageEvent<ClientToWorker>) => void) | null
+}
+
+let ws: WebSocket | null = null
+let inFlight = false
+let pending: TickFrame | null = null
+const knownSessions = new Map<number, string>()
+
+function post(message: WorkerToClient, transfer?: Transferable[]): void {
+  ctx.postMessage(message, transfer)
+}
+
+function postFrame(frame: TickFrame): void {
+  inFlight = true
+  post({ kind: 'tick', frame }, [frame.bots.buffer, frame.bullets.buffer])
+}
+
+function flushPending(): void {
+  if (pending) {
+    const frame = pending
+    pending = null
+    postFrame(frame)
+  }
+}
+
+function handleTick(tick: TickEventForObserver): void {
+  const frame = packTick(tick, knownSessions)
+  if (!inFlight) {
+    postFrame(frame)
+  } else {
+    pending = pending ? coalesceFrames(pending, frame) : frame
+  }
+}
+
+function connect(url: string, handshake: ObserverHandshake): void {
+  knownSessions.clear()
+  inFlight = false
+  pending = null
+
+  ws = new WebSocket(url)
+
+  ws.onopen = () => {
+    post({ kind: 'open' })
+    ws?.send(JSON.stringify(handshake))
+  }
+
+  ws.onmessage = (event) => {
+    let message
+    try {
+      message = JSON.parse(event.data)
+    } catch (error) {
+      console.error('❌ Failed to parse WebSocket message:', error)
+      return
+    }
+    if (message.type === 'TickEventForObserver') {
+      handleTick(message)
+    } else {
+      // Keep the message order: a tick still waiting for its turn goes first
+      flushPending()
+      post({ kind: 'message', message })
+    }
+  }
+
+  ws.onclose = (event) => {
+    flushPending()
+    post({ kind: 'close', code: event.code, reason: event.reason, wasClean: event.wasClean })
+    ws = null
+  }
+
+  ws.onerror = () => {
+    post({ kind: 'error' })
+  }
+}
+
+ctx.onmessage = (event) => {
+  const command = event.data
+  switch (command.kind) {
+    case 'connect':
+      connect(command.url, command.handshake)
+      break
+    case 'send':
+      if (ws?.readyState === WebSocket.OPEN) {
+        ws.send(JSON.stringify(command.message))
+      }
+      break
+    case 'ack':
+      inFlight = false
+      flushPending()
+      break
+    case 'close':
+      ws?.close(1000, 'Client disconnecting')
+      ws = null
+      break
+  }
+}
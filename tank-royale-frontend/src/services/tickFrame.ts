@@ -0,0 +1,198 @@
+import { BotState, BulletState, ObserverHandshake, TickEventForObserver } from '@/types/generated'
+
+/**
+ * Numeric bot state fields packed into TickFrame.bots, in this order
+ */
+export const BOT_FIELDS = [
+  'id', 'x', 'y', 'energy', 'direction', 'gunDirection', 'radarDirection', 'speed',
+  'turnRate', 'gunTurnRate', 'radarTurnRate', 'radarSweep', 'gunHeat', 'enemyCount'
+] as const
+
+/**
+ * Numeric bullet state fields packed into TickFrame.bullets, in this order
+ */
+export const BULLET_FIELDS = ['bulletId', 'ownerId', 'power', 'x', 'y', 'direction'] as const
+
+export const BOT_STRIDE = BOT_FIELDS.length
+export const BULLET_STRIDE = BULLET_FIELDS.length
+
+const PACKED_BOT_FIELDS = new Set<string>([...BOT_FIELDS, 'sessionId'])
+
+/**
+ * A decoded tick as sent from the decoder worker. The typed arrays are
+ * transferred, not copied.
+ */
+export interface TickFrame {
+  roundNumber: number
+  turnNumber: number
+  /** BOT_STRIDE values per bot */
+  bots: Float64Array
+  /** BULLET_STRIDE values per bullet */
+  bullets: Float64Array
+  /** Non-numeric bot fields (colors, stdout, ...), only for bots that have any */
+  botExtras: Array<{ index: number; fields: Record<string, unknown> }>
+  /** Bullet colors by bullet index, only for bullets that have one */
+  bulletColors: Array<{ index: number; color: string }>
+  /** Session ids of bots not seen before in this connection */
+  sessions: Array<{ id: number; sessionId: string }>
+  /** Events of this tick and of every tick coalesced into it, in order */
+  events: TickEventForObserver['events']
+  /** Number of older ticks that were coalesced into this one */
+  coalesced: number
+}
+
+/**
+ * Messages from the decoder worker to TankRoyaleClient
+ */
+export type WorkerToClient =
+  | { kind: 'open' }
+  | { kind: 'close'; code: number; reason: string; wasClean: boolean }
+  | { kind: 'error' }
+  | { kind: 'message'; message: { type?: string; [property: string]: unknown } }
+  | { kind: 'tick'; frame: TickFrame }
+
+/**
+ * Messages from TankRoyaleClient to the decoder worker
+ */
+export type ClientToWorker =
+  | { kind: 'connect'; url: string; handshake: ObserverHandshake }
+  | { kind: 'send'; message: unknown }
+  | { kind: 'ack' }
+  | { kind: 'close' }
+
+/**
+ * Pack a parsed tick into a frame. Runs in the worker.
+ */
+export function packTick(
+  tick: TickEventForObserver,
+  knownSessions: Map<number, string>
+): TickFrame {
+  const botStates = (tick.botStates ?? []) as BotState[]
+  const bulletStates = (tick.bulletStates ?? []) as BulletState[]
+
+  const bots = new Float64Array(botStates.length * BOT_STRIDE)
+  const botExtras: TickFrame['botExtras'] = []
+  const sessions: TickFrame['sessions'] = []
+  botStates.forEach((bot, index) => {
+    const offset = index * BOT_STRIDE
+    for (let field = 0; field < BOT_STRIDE; field++) {
+      bots[offset + field] = bot[BOT_FIELDS[field]] ?? 0
+    }
+    if (bot.sessionId !== undefined && knownSessions.get(bot.id) !== bot.sessionId) {
+      knownSessions.set(bot.id, bot.sessionId)
+      sessions.push({ id: bot.id, sessionId: bot.sessionId })
+    }
+    let fields: Record<string, unknown> | null = null
+    for (const key in bot) {
+      if (!PACKED_BOT_FIELDS.has(key)) {
+        fields = fields ?? {}
+        fields[key] = bot[key]
+      }
+    }
+    if (fields) {
+      botExtras.push({ index, fields })
+    }
+  })
+
+  const bullets = new Float64Array(bulletStates.length * BULLET_STRIDE)
+  const bulletColors: TickFrame['bulletColors'] = []
+  bulletStates.forEach((bullet, index) => {
+    const offset = index * BULLET_STRIDE
+    for (let field = 0; field < BULLET_STRIDE; field++) {
+      bullets[offset + field] = bullet[BULLET_FIELDS[field]] ?? 0
+    }
+    if (bullet.color) {
+      bulletColors.push({ index, color: bullet.color })
+    }
+  })
+
+  return {
+    roundNumber: tick.roundNumber,
+    turnNumber: tick.turnNumber,
+    bots,
+    bullets,
+    botExtras,
+    bulletColors,
+    sessions,
+    events: tick.events ?? [],
+    coalesced: 0
+  }
+}
+
+/**
+ * Fold an older, not yet delivered frame into a newer one: state comes from
+ * the newer frame, events and first-seen sessions from both. Bot extras such
+ * as color changes are only sent when they change, so the older ones are kept
+ * unless the newer frame overrides them.
+ */
+export function coalesceFrames(older: TickFrame, newer: TickFrame): TickFrame {
+  const olderExtras = new Map<number, Record<string, unknown>>()
+  for (const { index, fields } of older.botExtras) {
+    olderExtras.set(older.bots[index * BOT_STRIDE], fields)
+  }
+  const botExtras = newer.botExtras.map(({ index, fields }) => {
+    const id = newer.bots[index * BOT_STRIDE]
+    const previous = olderExtras.get(id)
+    olderExtras.delete(id)
+    return { index, fields: previous ? { ...previous, ...fields } : fields }
+  })
+  for (let index = 0; index < newer.bots.length / BOT_STRIDE && olderExtras.size > 0; index++) {
+    const fields = olderExtras.get(newer.bots[index * BOT_STRIDE])
+    if (fields) {
+      botExtras.push({ index, fields })
+    }
+  }
+
+  return {
+    ...newer,
+    botExtras,
+    sessions: [...older.sessions, ...newer.sessions],
+    events: [...older.events, ...newer.events],
+    coalesced: older.coalesced + newer.coalesced + 1
+  }
+}
+
+/**
+ * Rebuild the TickEventForObserver that listeners expect. Runs on the main thread.
+ */
+export function unpackTick(frame: TickFrame, sessions: Map<number, string>): TickEventForObserver {
+  const botCount = frame.bots.length / BOT_STRIDE
+  const botStates: BotState[] = new Array(botCount)
+  for (let index = 0; index < botCount; index++) {
+    const offset = index * BOT_STRIDE
+    const bot: Record<string, unknown> = {}
+    for (let field = 0; field < BOT_STRIDE; field++) {
+      bot[BOT_FIELDS[field]] = frame.bots[offset + field]
+    }
+    bot.sessionId = sessions.get(bot.id as number) ?? ''
+    botStates[index] = bot as BotState
+  }
+  for (const { index, fields } of frame.botExtras) {
+    Object.assign(botStates[index], fields)
+  }
+
+  const bulletCount = frame.bullets.length / BULLET_STRIDE
+  const bulletStates: BulletState[] = new Array(bulletCount)
+  for (let index = 0; index < bulletCount; index++) {
+    const offset = index * BULLET_STRIDE
+    const bullet: Record<string, unknown> = {}
+    for (let field = 0; field < BULLET_STRIDE; field++) {
+      bullet[BULLET_FIELDS[field]] = frame.bullets[offset + field]
+    }
+    bulletStates[index] = bullet as BulletState
+  }
+  for (const { index, color } of frame.bulletColors) {
+    bulletStates[index].color = color
+  }
+
+  return {
+    type: 'TickEventForObserver',
+    roundNumber: frame.roundNumber,
+    turnNumber: frame.turnNumber,
+    botStates,
+    bulletStates,
+    events: frame.events,
+    // Renderers can read the packed arrays directly instead of the objects above
+    frame
+  }
+}
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+battle_diff.py
+--------------
+Tick-by-tick diff of two recorded battles, for regression testing bot builds.
+
+Re-run fixed-seed battles with a new bot build, then diff each new recording
+against the one from the previous build. Both recordings are decoded into
+arrays (one row per tick, one column per bot), lined up on (round, turn) and
+compared as whole arrays:
+
+- positions and energies of every bot, within a tolerance
+- which bots are alive
+- the bullet set of every tick: owner, position and power, within a tolerance
+- the event sequence of every tick, as a hash over event types and the bot
+  and bullet ids involved
+
+Bots are matched by participant name rather than by id, so a different id
+assignment does not count as a change. The report names the first divergent
+tick and summarises how large the divergence is. Batch mode pairs recordings
+with the same name in two directories and diffs them in parallel.
+
+Usage:
+    python battle_diff.py diff baseline.battle.gz candidate.battle.gz
+    python battle_diff.py batch baseline/ candidate/ --workers 8 --out diffs.jsonl
+"""
+import argparse
+import hashlib
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+try:
+    import numpy as np
+except ImportError:
+    print("Error: 'numpy' library is not installed.")
+    print("Please install it by running: pip install numpy")
+    print("Or install all dependencies: pip install -r requirements.txt")
+    sys.exit(1)
+
+from battle_recording import GAME_STARTED, TICK, iter_recordings, read_recording
+
+POSITION_TOLERANCE = 0.01  # Arena units
+ENERGY_TOLERANCE = 0.01
+POWER_TOLERANCE = 1e-6
+
+TURN_BITS = 32  # Ticks are keyed by round << TURN_BITS | turn
+
+# Event fields that identify the bots and bullets involved
+EVENT_ID_FIELDS = ("botId", "victimId", "scannedBotId", "scannedByBotId", "ownerId", "bulletId")
+
+# ANSI Color Codes
+class Colors:
+    RESET = "\033[0m"
+    BOLD = "\033[1m"
+    GREEN = "\033[92m"
+    BLUE = "\033[94m"
+    YELLOW = "\033[93m"
+    RED = "\033[91m"
+    CYAN = "\033[96m"
+
+def print_step(message: str) -> None:
+    print(f"{Colors.CYAN}{Colors.BOLD}==> {message}{Colors.RESET}")
+
+def print_success(message: str) -> None:
+    print(f"{Colors.GREEN}{Colors.BOLD}✓ {message}{Colors.RESET}")
+
+def print_warning(message: str) -> None:
+    print(f"{Colors.YELLOW}⚠ {message}{Colors.RESET}")
+
+def print_error(message: str) -> None:
+    print(f"{Colors.RED}✗ {message}{Colors.RESET}")
+
+def print_info(message: str) -> None:
+    print(f"{Colors.BLUE}  {message}{Colors.RESET}")
+
+
+def bot_labels(participants: list[dict]) -> dict[int, str]:
+    """Label bots by name, numbering repeated names in id order."""
+    labels = {}
+    seen: dict[str, int] = {}
+    for participant in sorted(participants, key=lambda p: p["id"]):
+        name = participant.get("name", str(participant["id"]))
+        seen[name] = seen.get(name, 0) + 1
+        labels[participant["id"]] = name if seen[name] == 1 else f"{name}#{seen[name]}"
+    return labels
+
+
+def event_signature(event: dict, labels: dict[int, str]) -> str:
+    """Event type plus the bots and bullets involved; positions are compared elsewhere."""
+    parts = [event.get("type", "?")]
+    for source in (event, event.get("bullet") or {}, event.get("bulletHit") or {}):
+        for field in EVENT_ID_FIELDS:
+            if field in source:
+                value = source[field]
+                parts.append(f"{field}={labels.get(value, value) if field != 'bulletId' else value}")
+    return ",".join(parts)
+
+
+class BattleArrays:
+    """A recorded battle as arrays: one row per tick, one column per bot."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.labels: dict[int, str] = {}
+        keys = []
+        states: list[tuple[int, int, float, float, float]] = []  # (tick, bot id, x, y, energy)
+        bullets: list[tuple[int, int, int, float, float, float]] = []  # (tick, owner, bullet id, x, y, power)
+        event_hashes = []
+
+        tick = 0
+        for message in read_recording(path):
+            message_type = message.get("type")
+            if message_type == GAME_STARTED:
+                self.labels = bot_labels(message.get("participants", []))
+            elif message_type == TICK:
+                keys.append((message.get("roundNumber", 0) << TURN_BITS) | message.get("turnNumber", 0))
+                for bot in message.get("botStates", []):
+                    states.append((tick, bot["id"], bot["x"], bot["y"], bot["energy"]))
+                for bullet in message.get("bulletStates", []):
+                    bullets.append((tick, bullet.get("ownerId", 0), bullet.get("bulletId", 0),
+                                    bullet["x"], bullet["y"], bullet.get("power", 0.0)))
+                signature = "|".join(event_signature(e, self.labels) for e in message.get("events", []))
+                event_hashes.append(int.from_bytes(hashlib.blake2b(signature.encode(), digest_size=8).digest(), "little"))
+                tick += 1
+
+        if not self.labels:
+            self.labels = {bot_id: str(bot_id) for bot_id in sorted({s[1] for s in states})}
+        self.bots = sorted(self.labels.values())
+        column = {bot_id: self.bots.index(label) for bot_id, label in self.labels.items()}
+
+        self.keys = np.asarray(keys, dtype=np.int64)
+        self.event_hashes = np.asarray(event_hashes, dtype=np.uint64)
+        shape = (len(keys), len(self.bots))
+        self.x = np.full(shape, np.nan)
+        self.y = np.full(shape, np.nan)
+        self.energy = np.full(shape, np.nan)
+        if states:
+            s = np.asarray(states, dtype=np.float64)
+            rows = s[:, 0].astype(np.int64)
+            cols = np.asarray([column.get(int(b), -1) for b in s[:, 1]], dtype=np.int64)
+            known = cols >= 0
+            self.x[rows[known], cols[known]] = s[known, 2]
+            self.y[rows[known], cols[known]] = s[known, 3]
+            self.energy[rows[known], cols[known]] = s[known, 4]
+
+        # Bullets sorted by (tick, owner column, bullet id), so equal sets line up element by element
+        b = np.asarray(bullets, dtype=np.float64).reshape(-1, 6)
+        owners = np.asarray([column.get(int(o), -1) for o in b[:, 1]], dtype=np.int64)
+        order = np.lexsort((b[:, 2], owners, b[:, 0]))
+        self.bullet_tick = b[order, 0].astype(np.int64)
+        self.bullet_owner = owners[order]
+        self.bullet_xy = b[order, 3:5]
+        self.bullet_power = b[order, 5]
+
+    @property
+    def ticks(self) -> int:
+        return len(self.keys)
+
+
+def bullet_mismatches(a: BattleArrays, a_rows: "np.ndarray", b: BattleArrays, b_rows: "np.ndarray",
+                      position_tolerance: float) -> "np.ndarray":
+    """Per aligned tick: True where the bullet sets differ."""
+    counts_a = np.bincount(a.bullet_tick, minlength=a.ticks)[a_rows]
+    counts_b = np.bincount(b.bullet_tick, minlength=b.ticks)[b_rows]
+    mismatch = counts_a != counts_b
+
+    # Compare bullets element by element on ticks with equal counts
+    same = ~mismatch & (counts_a > 0)
+    if same.any():
+        pick_a = np.isin(a.bullet_tick, a_rows[same])
+        pick_b = np.isin(b.bullet_tick, b_rows[same])
+        differs = ((a.bullet_owner[pick_a] != b.bullet_owner[pick_b])
+                   | (np.abs(a.bullet_xy[pick_a] - b.bullet_xy[pick_b]).max(axis=1) > position_tolerance)
+                   | (np.abs(a.bullet_power[pick_a] - b.bullet_power[pick_b]) > POWER_TOLERANCE))
+        # Map differing bullets back to aligned tick positions
+        aligned_of_row = np.full(a.ticks, -1, dtype=np.int64)
+        aligned_of_row[a_rows] = np.arange(len(a_rows))
+        mismatch[np.unique(aligned_of_row[a.bullet_tick[pick_a][differs]])] = True
+    return mismatch
+
+
+def diff_battles(a: BattleArrays, b: BattleArrays, position_tolerance: float = POSITION_TOLERANCE,
+                 energy_tolerance: float = ENERGY_TOLERANCE) -> dict:
+    """Compare two battles tick by tick. Returns the first divergence and a summary."""
+    result = {"baseline": str(a.path), "candidate": str(b.path), "ticks": [a.ticks, b.ticks]}
+    if a.bots != b.bots:
+        result.update(identical=False, first_divergence=None, reason="participants",
+                      bots=[a.bots, b.bots])
+        return result
+
+    keys, a_rows, b_rows = np.intersect1d(a.keys, b.keys, assume_unique=True, return_indices=True)
+    only_a = np.setdiff1d(a.keys, b.keys, assume_unique=True)
+    only_b = np.setdiff1d(b.keys, a.keys, assume_unique=True)
+
+    alive_a = ~np.isnan(a.x[a_rows])
+    alive_b = ~np.isnan(b.x[b_rows])
+    alive = alive_a & alive_b
+    position_error = np.where(alive, np.hypot(a.x[a_rows] - b.x[b_rows], a.y[a_rows] - b.y[b_rows]), 0.0)
+    energy_error = np.where(alive, np.abs(a.energy[a_rows] - b.energy[b_rows]), 0.0)
+
+    checks = {
+        "alive": (alive_a != alive_b).any(axis=1),
+        "position": (position_error > position_tolerance).any(axis=1),
+        "energy": (energy_error > energy_tolerance).any(axis=1),
+        "bullets": bullet_mismatches(a, a_rows, b, b_rows, position_tolerance),
+        "events": a.event_hashes[a_rows] != b.event_hashes[b_rows],
+    }
+    divergent = np.logical_or.reduce(list(checks.values())) if len(keys) else np.zeros(0, dtype=bool)
+
+    # The first divergence is the earliest divergent common tick or tick missing on one side
+    candidates = []
+    if divergent.any():
+        first = int(np.argmax(divergent))
+        candidates.append((int(keys[first]), [name for name, mask in checks.items() if mask[first]], first))
+    for missing, side in ((only_a, "missing in candidate"), (only_b, "missing in baseline")):
+        if len(missing):
+            candidates.append((int(missing[0]), [side], None))
+
+    result["compared_ticks"] = int(len(keys))
+    result["identical"] = not candidates
+    if not candidates:
+        result["first_divergence"] = None
+        return result
+
+    key, reasons, row = min(candidates, key=lambda c: c[0])
+    first = {"round": key >> TURN_BITS, "turn": key & ((1 << TURN_BITS) - 1), "reasons": reasons}
+    if row is not None and ("position" in reasons or "energy" in reasons):
+        first["bots"] = [a.bots[i] for i in np.flatnonzero((position_error[row] > position_tolerance)
+                                                           | (energy_error[row] > energy_tolerance))]
+    result["first_divergence"] = first
+
+    after = keys >= key
+    per_bot = position_error.max(axis=0) if len(keys) else np.zeros(len(a.bots))
+    result["summary"] = {
+        "divergent_ticks": int(divergent.sum()),
+        "divergent_fraction": round(float(divergent.sum()) / max(len(keys), 1), 4),
+        "ticks_only_in_baseline": int(len(only_a)),
+        "ticks_only_in_candidate": int(len(only_b)),
+        "max_position_error": round(float(position_error.max(initial=0.0)), 3),
+        "mean_position_error_after": round(float(position_error[after].mean()) if after.any() else 0.0, 3),
+        "max_energy_error": round(float(energy_error.max(initial=0.0)), 3),
+        "final_energy_delta": {bot: round(float(d), 3) for bot, d in zip(a.bots, final_energy(b) - final_energy(a))},
+        "max_position_error_by_bot": {bot: round(float(e), 3) for bot, e in zip(a.bots, per_bot)},
+        **{f"{name}_mismatches": int(mask.sum()) for name, mask in checks.items()},
+    }
+    return result
+
+
+def final_energy(battle: BattleArrays) -> "np.ndarray":
+    """Last known energy of every bot; 0 for bots that were never seen."""
+    seen = ~np.isnan(battle.energy)
+    if not battle.ticks:
+        return np.zeros(len(battle.bots))
+    last = np.where(seen.any(axis=0), battle.ticks - 1 - np.argmax(seen[::-1], axis=0), 0)
+    return np.nan_to_num(battle.energy[last, np.arange(len(battle.bots))])
+
+
+def diff_files(pair: tuple[Path, Path], position_tolerance: float = POSITION_TOLERANCE,
+               energy_tolerance: float = ENERGY_TOLERANCE) -> dict:
+    """Diff two recordings; runs in a worker process in batch mode."""
+    baseline, candidate = pair
+    try:
+        return diff_battles(BattleArrays(baseline), BattleArrays(candidate), position_tolerance, energy_tolerance)
+    except (OSError, ValueError, KeyError) as e:
+        return {"baseline": str(baseline), "candidate": str(candidate), "identical": False,
+                "first_divergence": None, "error": f"{type(e).__name__}: {e}"}
+
+
+def pair_recordings(baseline_dir: Path, candidate_dir: Path) -> tuple[list[tuple[Path, Path]], list[Path]]:
+    """Pair recordings by their path relative to each directory."""
+    candidates = {p.relative_to(candidate_dir): p for p in iter_recordings([candidate_dir])}
+    pairs, unmatched = [], []
+    for path in iter_recordings([baseline_dir]):
+        match = candidates.get(path.relative_to(baseline_dir))
+        if match:
+            pairs.append((path, match))
+        else:
+            unmatched.append(path)
+    return pairs, unmatched
+
+
+def print_report(result: dict) -> None:
+    print_step(f"{result['baseline']} vs {result['candidate']}")
+    if result.get("error"):
+        print_error(result["error"])
+        return
+    if result.get("reason") == "participants":
+        print_error(f"Different participants: {', '.join(result['bots'][0])} vs {', '.join(result['bots'][1])}")
+        return
+    if result["identical"]:
+        print_success(f"Identical over {result['compared_ticks']} ticks")
+        return
+    first = result["first_divergence"]
+    bots = f" ({', '.join(first['bots'])})" if first.get("bots") else ""
+    print_warning(f"First divergence at round {first['round']} turn {first['turn']}: "
+                  f"{', '.join(first['reasons'])}{bots}")
+    summary = result["summary"]
+    print_info(f"Divergent ticks: {summary['divergent_ticks']}/{result['compared_ticks']} "
+               f"({summary['divergent_fraction']:.1%})")
+    if summary["ticks_only_in_baseline"] or summary["ticks_only_in_candidate"]:
+        print_info(f"Ticks only in baseline: {summary['ticks_only_in_baseline']}, "
+                   f"only in candidate: {summary['ticks_only_in_candidate']}")
+    print_info(f"Max position error: {summary['max_position_error']}  "
+               f"mean after divergence: {summary['mean_position_error_after']}")
+    print_info(f"Max energy error: {summary['max_energy_error']}")
+    print_info("Mismatching ticks: " + ", ".join(
+        f"{name} {summary[f'{name}_mismatches']}" for name in ("alive", "position", "energy", "bullets", "events")))
+    for bot, delta in summary["final_energy_delta"].items():
+        if delta:
+            print_info(f"  {bot}: final energy {delta:+}")
+
+
+def run_batch(baseline_dir: Path, candidate_dir: Path, workers: int, out: Optional[Path],
+              position_tolerance: float, energy_tolerance: float) -> int:
+    """Diff every pair of recordings; returns the number of divergent pairs."""
+    pairs, unmatched = pair_recordings(baseline_dir, candidate_dir)
+    for path in unmatched:
+        print_warning(f"No candidate recording for {path}")
+    print_step(f"Diffing {len(pairs)} battle pairs...")
+    started = time.perf_counter()
+
+    tolerances = ([position_tolerance] * len(pairs), [energy_tolerance] * len(pairs))
+    if workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(diff_files, pairs, *tolerances, chunksize=max(1, len(pairs) // (workers * 8)))
+    else:
+        pool = None
+        results = map(diff_files, pairs, *tolerances)
+
+    divergent = 0
+    out_file = open(out, "w") if out else None
+    try:
+        for result in results:
+            if out_file:
+                out_file.write(json.dumps(result) + "\n")
+            if not result["identical"]:
+                divergent += 1
+                first = result.get("first_divergence")
+                where = (f"round {first['round']} turn {first['turn']}: {', '.join(first['reasons'])}"
+                         if first else result.get("error") or "different participants")
+                print_warning(f"{Path(result['baseline']).name}: {where}")
+    finally:
+        if out_file:
+            out_file.close()
+        if pool:
+            pool.shutdown()
+
+    elapsed = time.perf_counter() - started
+    summary = f"{len(pairs) - divergent}/{len(pairs)} identical in {elapsed:.1f}s"
+    if divergent:
+        print_warning(f"{divergent} battles diverged; {summary}")
+    else:
+        print_success(summary)
+    return divergent
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tick-by-tick diff of recorded battles")
+    parser.add_argument("--position-tolerance", type=float, default=POSITION_TOLERANCE,
+                        help=f"Allowed position difference (default: {POSITION_TOLERANCE})")
+    parser.add_argument("--energy-tolerance", type=float, default=ENERGY_TOLERANCE,
+                        help=f"Allowed energy difference (default: {ENERGY_TOLERANCE})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    diff_parser = subparsers.add_parser("diff", help="Diff two recordings")
+    diff_parser.add_argument("baseline", type=Path)
+    diff_parser.add_argument("candidate", type=Path)
+    diff_parser.add_argument("--json", action="store_true", help="Print the result as JSON")
+
+    batch_parser = subparsers.add_parser("batch", help="Diff recordings with the same name in two directories")
+    batch_parser.add_argument("baseline", type=Path, help="Directory with recordings of the previous build")
+    batch_parser.add_argument("candidate", type=Path, help="Directory with recordings of the new build")
+    batch_parser.add_argument("--workers", type=int, default=1, help="Parallel worker processes")
+    batch_parser.add_argument("--out", type=Path, help="Write one JSON result per pair to this file")
+
+    args = parser.parse_args()
+
+    if args.command == "diff":
+        result = diff_files((args.baseline, args.candidate), args.position_tolerance, args.energy_tolerance)
+        if args.json:
+            print(json.dumps(result, indent=2))
+        else:
+            print_report(result)
+        sys.exit(0 if result["identical"] else 1)
+
+    divergent = run_batch(args.baseline, args.candidate, args.workers, args.out,
+                          args.position_tolerance, args.energy_tolerance)
+    sys.exit(1 if divergent else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+battle_recording.py
+-------------------
+Read and write Tank Royale battle recordings.
+
+A recording holds one game: every observer message from
+GameStartedEventForObserver to GameEndedEventForObserver (or
+GameAbortedEventForObserver), one JSON document per line, gzip-compressed.
+This is the same layout as the recorder that ships with Tank Royale, so its
+.battle.gz files can be read as well. Plain .jsonl files are accepted too.
+
+Recordings written here are a series of gzip members of about MEMBER_BYTES
+of JSON each. Any gzip reader sees a single stream, but a reader that knows
+where the members start (see event_index.py) can seek close to a tick and
+decompress only from there.
+
+Usage:
+    python battle_recording.py record --out recordings/     # Record every game from the local server
+    python battle_recording.py record --out recordings/ --no-index
+    python battle_recording.py info recordings/game-*.battle.gz
+"""
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import sys
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Union
+
+RECORDING_SUFFIX = ".battle.gz"
+RECORDING_PATTERNS = ("*.battle.gz", "*.battle.jsonl", "*.jsonl.gz", "*.jsonl")
+MEMBER_BYTES = 256 * 1024  # Uncompressed JSON per gzip member; the most a seek has to decompress
+
+GAME_STARTED = "GameStartedEventForObserver"
+GAME_ENDED = "GameEndedEventForObserver"
+GAME_ABORTED = "GameAbortedEventForObserver"
+TICK = "TickEventForObserver"
+
+# ANSI Color Codes
+class Colors:
+    RESET = "\033[0m"
+    BOLD = "\033[1m"
+    GREEN = "\033[92m"
+    BLUE = "\033[94m"
+    YELLOW = "\033[93m"
+    RED = "\033[91m"
+    CYAN = "\033[96m"
+
+
+def open_recording(path: Path, mode: str = "rt"):
+    """Open a recording, transparently handling gzip compression."""
+    if path.suffix == ".gz":
+        return gzip.open(path, mode, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def read_recording(path: Union[str, Path]) -> Iterator[dict]:
+    """Yield every message in a recording, in order."""
+    with open_recording(Path(path)) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def read_ticks(path: Union[str, Path]) -> Iterator[dict]:
+    """Yield only the TickEventForObserver messages of a recording."""
+    for message in read_recording(path):
+        if message.get("type") == TICK:
+            yield message
+
+
+def recording_id(path: Union[str, Path]) -> str:
+    """Identify a recording by its game rather than by where the file is.
+
+    The id is a hash of the GameStartedEventForObserver and the first tick, so
+    a moved or copied recording keeps its id and two games almost never share
+    one. Only the start of the recording is read.
+    """
+    digest = hashlib.sha1()
+    seen = set()
+    for message in read_recording(path):
+        message_type = message.get("type")
+        if message_type in (GAME_STARTED, TICK) and message_type not in seen:
+            seen.add(message_type)
+            digest.update(json.dumps(message, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+            if len(seen) == 2:
+                break
+    return digest.hexdigest()
+
+
+def iter_recordings(paths: Iterable[Union[str, Path]]) -> Iterator[Path]:
+    """Expand files and directories into a sorted stream of recording files."""
+    for path in map(Path, paths):
+        if path.is_dir():
+            found = set()
+            for pattern in RECORDING_PATTERNS:
+                found.update(path.rglob(pattern))
+            yield from sorted(found)
+        elif path.exists():
+            yield path
+
+
+class RecordingWriter:
+    """Writes observer messages to a recording file, one JSON document per line.
+
+    `offset` is the uncompressed byte offset of the next message, and
+    `members` lists the [compressed offset, uncompressed offset] of every
+    gzip member started so far.
+    """
+
+    def __init__(self, path: Path, compresslevel: int = 6) -> None:
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.compressed = path.suffix == ".gz"
+        self.compresslevel = compresslevel
+        self._file = open(path, "wb")
+        self._compressor = None
+        self.messages = 0
+        self.offset = 0
+        self.members: list[list[int]] = []
+
+    def write(self, message: Union[dict, str]) -> int:
+        """Write one message and return its offset; already-encoded JSON text is written as is."""
+        if not isinstance(message, str):
+            message = json.dumps(message, separators=(",", ":"))
+        data = message.encode("utf-8") + b"\n"
+        offset = self.offset
+        if self.compressed:
+            if self._compressor is None:
+                self.members.append([self._file.tell(), offset])
+                self._compressor = zlib.compressobj(self.compresslevel, zlib.DEFLATED, 31)  # 31: gzip framing
+            self._file.write(self._compressor.compress(data))
+            # Members end on line boundaries, so every line lies in one member
+            if offset + len(data) - self.members[-1][1] >= MEMBER_BYTES:
+                self._end_member()
+        else:
+            self._file.write(data)
+        self.offset += len(data)
+        self.messages += 1
+        return offset
+
+    def _end_member(self) -> None:
+        self._file.write(self._compressor.flush())
+        self._compressor = None
+
+    def close(self) -> None:
+        if self._compressor is not None:
+            self._end_member()
+        self._file.close()
+
+    def __enter__(self) -> "RecordingWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def recording_name(started: Optional[datetime] = None) -> str:
+    started = started or datetime.now()
+    return f"game-{started.strftime('%Y%m%d-%H%M%S-%f')}{RECORDING_SUFFIX}"
+
+
+async def record_games(url: str, out_dir: Path, secret: Optional[str] = None, index_events: bool = True) -> None:
+    """Record every game observed on the server, one file per game.
+
+    With index_events, an event index (see event_index.py) is built from the
+    decoded messages and saved next to each recording.
+    """
+    from event_index import EventIndexBuilder
+    from observer import observe
+
+    writer: Optional[RecordingWriter] = None
+    index: Optional[EventIndexBuilder] = None
+
+    def finish() -> None:
+        writer.close()
+        if index:
+            index.write_for(writer.path, writer.members)
+
+    try:
+        async for raw in observe(url, secret, name="Tank Royale Python Recorder", decode=False):
+            # Store the server's JSON text as is; the decoded message is only used for its type and the index
+            message = json.loads(raw)
+            message_type = message.get("type")
+
+            if message_type == GAME_STARTED:
+                if writer:
+                    finish()
+                writer = RecordingWriter(out_dir / recording_name())
+                index = EventIndexBuilder() if index_events else None
+                print(f"{Colors.CYAN}{Colors.BOLD}==> Recording {writer.path.name}{Colors.RESET}")
+
+            if writer:
+                offset = writer.write(raw)
+                if index:
+                    index.add(message, offset)
+
+            if writer and message_type in (GAME_ENDED, GAME_ABORTED):
+                finish()
+                print(f"{Colors.GREEN}{Colors.BOLD}✓ Saved {writer.path} ({writer.messages} messages){Colors.RESET}")
+                writer = None
+    finally:
+        if writer:
+            finish()
+
+
+def show_info(paths: list[Path]) -> None:
+    for path in iter_recordings(paths):
+        ticks = 0
+        participants = []
+        results = None
+        rounds = set()
+        for message in read_recording(path):
+            message_type = message.get("type")
+            if message_type == TICK:
+                ticks += 1
+                rounds.add(message.get("roundNumber"))
+            elif message_type == GAME_STARTED:
+                participants = [p.get("name") for p in message.get("participants", [])]
+            elif message_type == GAME_ENDED:
+                results = message.get("results", [])
+        print(f"{Colors.CYAN}{Colors.BOLD}==> {path}{Colors.RESET}")
+        print(f"{Colors.BLUE}  Participants: {', '.join(participants) or 'unknown'}{Colors.RESET}")
+        print(f"{Colors.BLUE}  Rounds: {len(rounds)}  Ticks: {ticks}{Colors.RESET}")
+        if results:
+            ranking = sorted(results, key=lambda r: r.get("rank", 0))
+            print(f"{Colors.BLUE}  Winner: {ranking[0].get('name')} {ranking[0].get('version', '')}{Colors.RESET}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tank Royale battle recordings")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record = subparsers.add_parser("record", help="Record games from a running server")
+    record.add_argument("--url", default="ws://localhost:7655", help="Server URL")
+    record.add_argument("--secret", help="Controller secret (default: from server.properties)")
+    record.add_argument("--out", type=Path, default=Path("recordings"), help="Output directory")
+    record.add_argument("--no-index", action="store_true", help="Do not build event indexes")
+
+    info = subparsers.add_parser("info", help="Summarise recordings")
+    info.add_argument("paths", nargs="+", type=Path, help="Recording files or directories")
+
+    args = parser.parse_args()
+
+    if args.command == "info":
+        show_info(args.paths)
+        return
+
+    from observer import default_secret
+    try:
+        asyncio.run(record_games(args.url, args.out, args.secret or default_secret(), not args.no_index))
+    except KeyboardInterrupt:
+        print(f"{Colors.BLUE}  Recording stopped{Colors.RESET}")
+    except OSError as e:
+        print(f"{Colors.RED}✗ Could not connect to {args.url}: {e}{Colors.RESET}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
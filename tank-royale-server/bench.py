@@ -0,0 +1,627 @@
+#!/usr/bin/env python3
+"""
+bench.py
+--------
+Performance benchmarks for the Python tools, with baseline regression checks.
+
+Benchmarks are registered with the @benchmark decorator:
+
+- micro: decoding and packing ticks into the tick ring, log line parsing,
+  index lookups, spatial queries through the grid index and by brute force
+  for 10 to 1000 bots
+- macro: recording writes and reads, the log sink, the shared-memory tick
+  ring, observer throughput against a local stand-in server, and the
+  run_server.py startup phases recorded in traces/startup-history.jsonl
+
+Recorded startup samples are compared only when they are newer than the
+baseline's, so the two windows are disjoint and independent.
+
+Each benchmark is run several times after a warm-up run. The samples and
+environment metadata are saved as JSON under bench-results/. A run is
+compared with the saved baseline: a benchmark counts as a regression when
+its samples are significantly slower (one-sided Mann-Whitney U test) and its
+median is slower by more than the threshold. Any regression makes the run
+exit with status 1.
+
+Usage:
+    python bench.py run                         # Run everything, compare with the baseline
+    python bench.py run --filter "recording.*" --quick
+    python bench.py run --save-baseline         # Make this run the new baseline
+    python bench.py compare bench-results/bench-20250101-120000.json
+    python bench.py list
+"""
+import argparse
+import asyncio
+import fnmatch
+import gzip
+import importlib.util
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+RESULTS_DIR = "bench-results"
+BASELINE_FILENAME = "baseline.json"
+
+MICRO_REPEAT = 20
+MACRO_REPEAT = 7
+THRESHOLD = 0.10  # Median slowdown that counts as a regression
+ALPHA = 0.05      # Significance level of the Mann-Whitney U test
+
+# ANSI Color Codes
+class Colors:
+    RESET = "\033[0m"
+    BOLD = "\033[1m"
+    GREEN = "\033[92m"
+    BLUE = "\033[94m"
+    YELLOW = "\033[93m"
+    RED = "\033[91m"
+    CYAN = "\033[96m"
+
+def print_step(message: str) -> None:
+    print(f"{Colors.CYAN}{Colors.BOLD}==> {message}{Colors.RESET}")
+
+def print_success(message: str) -> None:
+    print(f"{Colors.GREEN}{Colors.BOLD}✓ {message}{Colors.RESET}")
+
+def print_warning(message: str) -> None:
+    print(f"{Colors.YELLOW}⚠ {message}{Colors.RESET}")
+
+def print_error(message: str) -> None:
+    print(f"{Colors.RED}✗ {message}{Colors.RESET}")
+
+def print_info(message: str) -> None:
+    print(f"{Colors.BLUE}  {message}{Colors.RESET}")
+
+
+class SkipBenchmark(Exception):
+    """Raised by a benchmark that cannot run here, e.g. for a missing dependency."""
+
+
+class BenchContext:
+    """Scratch space and size settings shared by the benchmarks of one run."""
+
+    def __init__(self, work_dir: Path, quick: bool = False) -> None:
+        self.work_dir = work_dir
+        self.quick = quick
+        self.tmp = Path(tempfile.mkdtemp(prefix="tank-royale-bench-"))
+        self.cleanups: list[Callable[[], None]] = []
+
+    def scale(self, size: int) -> int:
+        return max(1, size // 10) if self.quick else size
+
+    def close(self) -> None:
+        for cleanup in reversed(self.cleanups):
+            cleanup()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+
+# A timed benchmark returns the callable to time, which returns the number of
+# operations per call. An untimed one returns (recorded at, seconds) samples
+# by name; the recording times let a run be compared with a disjoint window.
+TimedSetup = Callable[[BenchContext], Callable[[], int]]
+UntimedSetup = Callable[[BenchContext], dict[str, list[tuple[str, float]]]]
+
+BENCHMARKS: dict[str, dict] = {}
+
+
+def benchmark(name: str, group: str = "micro", repeat: Optional[int] = None, timed: bool = True):
+    """Register a benchmark under name."""
+    def register(fn: Union[TimedSetup, UntimedSetup]):
+        BENCHMARKS[name] = {
+            "name": name,
+            "group": group,
+            "repeat": repeat or (MICRO_REPEAT if group == "micro" else MACRO_REPEAT),
+            "timed": timed,
+            "fn": fn,
+        }
+        return fn
+    return register
+
+
+# --- Synthetic data ---
+
+def synthetic_tick(rnd: random.Random, round_number: int, turn: int, bots: int, bullets: int) -> dict:
+    """A TickEventForObserver shaped like the ones the server sends."""
+    return {
+        "type": "TickEventForObserver",
+        "roundNumber": round_number,
+        "turnNumber": turn,
+        "botStates": [{
+            "id": i + 1, "sessionId": f"session-{i}", "energy": rnd.uniform(0, 100),
+            "x": rnd.uniform(0, 800), "y": rnd.uniform(0, 600), "direction": rnd.uniform(0, 360),
+            "gunDirection": rnd.uniform(0, 360), "radarDirection": rnd.uniform(0, 360),
+            "radarSweep": 45.0, "speed": 8.0, "turnRate": 0.0, "gunTurnRate": 0.0,
+            "radarTurnRate": 45.0, "gunHeat": 0.0, "enemyCount": bots - 1,
+        } for i in range(bots)],
+        "bulletStates": [{
+            "bulletId": turn * 100 + i, "ownerId": i % bots + 1, "power": 1.0,
+            "x": rnd.uniform(0, 800), "y": rnd.uniform(0, 600), "direction": rnd.uniform(0, 360),
+        } for i in range(bullets)],
+        "events": [{"type": "BulletFiredEvent", "turnNumber": turn,
+                    "bullet": {"bulletId": turn, "ownerId": 1, "power": 1.0, "x": 1.0, "y": 1.0, "direction": 0.0}}]
+        if turn % 5 == 0 else [],
+    }
+
+
+def synthetic_battle(ticks: int, bots: int = 10, bullets: int = 20, seed: int = 0) -> list[str]:
+    """Encoded messages of a one-round battle, as stored in a recording."""
+    rnd = random.Random(seed)
+    messages = [json.dumps({"type": "GameStartedEventForObserver",
+                            "gameSetup": {"gameType": "melee", "arenaWidth": 800, "arenaHeight": 600},
+                            "participants": [{"id": i + 1, "name": f"Bot{i}", "version": "1.0"}
+                                             for i in range(bots)]})]
+    messages += [json.dumps(synthetic_tick(rnd, 1, turn, bots, bullets), separators=(",", ":"))
+                 for turn in range(1, ticks + 1)]
+    messages.append(json.dumps({"type": "GameEndedEventForObserver", "numberOfRounds": 1,
+                                "results": [{"id": i + 1, "name": f"Bot{i}", "rank": i + 1} for i in range(bots)]}))
+    return messages
+
+
+def synthetic_log_lines(count: int, start: float) -> list[bytes]:
+    """Server log lines, one second apart, with an occasional stack trace line."""
+    lines = []
+    for i in range(count):
+        stamp = datetime.fromtimestamp(start + i, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+        lines.append(f"[{stamp}] INFO dev.robocode.tankroyale.server.core.GameServer - Turn {i} processed\n".encode())
+        if i % 50 == 0:
+            lines.append(b"\tat dev.robocode.tankroyale.server.Server.main(Server.kt:42)\n")
+    return lines
+
+
+# --- Benchmarks ---
+
+def ingest_benchmark(ctx: BenchContext, ticks: int, bots: int, bullets: int) -> Callable[[], int]:
+    """Decode raw observer ticks and pack them into the tick ring, as tick_ring.py ingest does."""
+    if importlib.util.find_spec("numpy") is None:
+        raise SkipBenchmark("numpy is not installed")
+    from tick_ring import Ingest, TickRing
+    lines = synthetic_battle(ticks, bots=bots, bullets=bullets)[1:-1]
+    ring = TickRing.create(f"tank-royale-bench-{os.getpid()}-ingest-{bots}")
+    ctx.cleanups.append(ring.close)
+    ingest = Ingest(ring)
+
+    def run() -> int:
+        for line in lines:
+            ingest.feed(json.loads(line))  # observe() decodes each message the same way
+        return len(lines)
+    return run
+
+
+@benchmark("tick_ring.ingest", group="micro")
+def bench_tick_ingest(ctx: BenchContext) -> Callable[[], int]:
+    return ingest_benchmark(ctx, ctx.scale(500), bots=10, bullets=20)
+
+
+@benchmark("tick_ring.ingest_large", group="micro")
+def bench_tick_ingest_large(ctx: BenchContext) -> Callable[[], int]:
+    return ingest_benchmark(ctx, ctx.scale(100), bots=100, bullets=200)
+
+
+@benchmark("log.parse_time", group="micro")
+def bench_log_parse(ctx: BenchContext) -> Callable[[], int]:
+    from log_sink import line_time
+    lines = synthetic_log_lines(ctx.scale(10_000), time.time() - 86400)
+
+    def run() -> int:
+        for line in lines:
+            line_time(line)
+        return len(lines)
+    return run
+
+
+@benchmark("log.index_lookup", group="micro")
+def bench_index_lookup(ctx: BenchContext) -> Callable[[], int]:
+    from log_sink import frames_in_window
+    start = time.time() - 86400
+    entries = [{"segment": f"server-{i // 100:06d}.log.gz", "offset": 0, "length": 0,
+                "first": start + i * 2, "last": start + i * 2 + 1.9, "lines": 100} for i in range(ctx.scale(40_000))]
+    rnd = random.Random(1)
+    windows = [(start + t, start + t + 300) for t in (rnd.uniform(0, len(entries) * 2) for _ in range(1000))]
+
+    lasts = [e["last"] for e in entries]  # Built once, as FrameIndex does
+
+    def run() -> int:
+        for since, until in windows:
+            frames_in_window(entries, since, until, lasts)
+        return len(windows)
+    return run
+
+
+def spatial_benchmarks(bots: int) -> None:
+    """Per-tick proximity queries at one melee size, through the grid and by brute force."""
+    def setup(ctx: BenchContext, queries_name: str) -> Callable[[], int]:
+        if importlib.util.find_spec("numpy") is None:
+            raise SkipBenchmark("numpy is not installed")
+        import numpy as np
+        import spatial_index
+        queries = getattr(spatial_index, queries_name)
+        rnd = np.random.default_rng(bots)
+        ticks = [spatial_index.random_positions(rnd, bots) for _ in range(ctx.scale(50))]
+
+        def run() -> int:
+            for x, y in ticks:
+                queries(x, y, 200.0)
+            return len(ticks)
+        return run
+
+    benchmark(f"spatial.grid_{bots}", group="micro")(lambda ctx: setup(ctx, "tick_queries_grid"))
+    benchmark(f"spatial.brute_{bots}", group="micro")(lambda ctx: setup(ctx, "tick_queries_brute"))
+
+
+for spatial_bots in (10, 100, 1000):
+    spatial_benchmarks(spatial_bots)
+
+
+@benchmark("recording.write", group="macro")
+def bench_recording_write(ctx: BenchContext) -> Callable[[], int]:
+    from battle_recording import RecordingWriter
+    messages = synthetic_battle(ctx.scale(2000))
+    path = ctx.tmp / "write.battle.gz"
+
+    def run() -> int:
+        with RecordingWriter(path) as writer:
+            for message in messages:
+                writer.write(message)
+        return len(messages)
+    return run
+
+
+@benchmark("recording.read", group="macro")
+def bench_recording_read(ctx: BenchContext) -> Callable[[], int]:
+    from battle_recording import read_recording
+    path = ctx.tmp / "read.battle.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write("\n".join(synthetic_battle(ctx.scale(2000))) + "\n")
+
+    def run() -> int:
+        return sum(1 for _ in read_recording(path))
+    return run
+
+
+@benchmark("tick_ring.fanout", group="macro")
+def bench_tick_ring(ctx: BenchContext) -> Callable[[], int]:
+    if importlib.util.find_spec("numpy") is None:
+        raise SkipBenchmark("numpy is not installed")
+    from tick_ring import RingReader, TickRing
+    ticks = [json.loads(line) for line in synthetic_battle(ctx.scale(2000))[1:-1]]
+    runs = iter(range(10_000))
+
+    def run() -> int:
+        # Publish every tick and read it back through two consumers, in place
+        ring = TickRing.create(f"tank-royale-bench-{os.getpid()}-{next(runs)}", slots=256)
+        readers = [RingReader(ring), RingReader(ring)]
+        for tick in ticks:
+            ring.publish_tick(tick)
+            for reader in readers:
+                view = reader.poll()
+                view.bots["energy"].sum()
+        del view
+        ring.close()
+        return len(ticks)
+    return run
+
+
+@benchmark("log_sink.write", group="macro")
+def bench_log_sink_write(ctx: BenchContext) -> Callable[[], int]:
+    from log_sink import LogSink
+    start = time.time()
+    lines = synthetic_log_lines(ctx.scale(50_000), start)
+    runs = iter(range(10_000))
+
+    def run() -> int:
+        log_dir = ctx.tmp / f"sink-write-{next(runs)}"
+        sink = LogSink(log_dir)
+        for i, line in enumerate(lines):
+            sink.add_line(line, now=start + i * 0.02)
+        sink.close()
+        return len(lines)
+    return run
+
+
+@benchmark("log_sink.read_window", group="macro")
+def bench_log_sink_read(ctx: BenchContext) -> Callable[[], int]:
+    from log_sink import FrameIndex, LogSink, read_window
+    start = time.time() - 86400
+    lines = synthetic_log_lines(ctx.scale(100_000), start)
+    log_dir = ctx.tmp / "sink-read"
+    sink = LogSink(log_dir)
+    for i, line in enumerate(lines):
+        sink.add_line(line, now=start + i)
+    sink.close()
+    middle = start + len(lines) / 2
+    index = FrameIndex(log_dir)
+
+    def run() -> int:
+        index.refresh()
+        return sum(1 for _ in read_window(log_dir, middle, middle + 600, index))
+    return run
+
+
+@benchmark("observer.throughput", group="macro")
+def bench_observer(ctx: BenchContext) -> Callable[[], int]:
+    if importlib.util.find_spec("websockets") is None:
+        raise SkipBenchmark("websockets is not installed")
+    import websockets
+    from observer import observe
+
+    messages = synthetic_battle(ctx.scale(2000))
+
+    async def serve(ws) -> None:
+        # Stand-in for the server: handshake, then one game as fast as possible
+        await ws.send(json.dumps({"type": "ServerHandshake", "sessionId": "bench", "name": "bench",
+                                  "version": "0", "gameTypes": ["melee"]}))
+        await ws.recv()
+        for message in messages:
+            await ws.send(message)
+        await ws.close()
+
+    async def consume() -> int:
+        async with websockets.serve(serve, "127.0.0.1", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            count = 0
+            async for _ in observe(f"ws://127.0.0.1:{port}", decode=True):
+                count += 1
+            return count
+
+    def run() -> int:
+        return asyncio.run(consume())
+    return run
+
+
+@benchmark("startup", group="macro", timed=False)
+def bench_startup(ctx: BenchContext) -> dict[str, list[tuple[str, float]]]:
+    """Startup phases of the last recorded run_server.py launches, per launch mode."""
+    from startup_trace import load_history
+    history = load_history(ctx.work_dir, last=50)
+    if not history:
+        raise SkipBenchmark("no startup traces recorded yet")
+    samples: dict[str, list[tuple[str, float]]] = {}
+    for entry in history:
+        mode = entry.get("mode", "gui")
+        started_at = entry.get("started_at", "")
+        samples.setdefault(f"startup.{mode}.total", []).append((started_at, entry["total"]))
+        for phase, duration in entry.get("phases", {}).items():
+            samples.setdefault(f"startup.{mode}.{phase}", []).append((started_at, duration))
+    return samples
+
+
+# --- Running ---
+
+def summarize(samples: list[float], ops: Optional[int] = None) -> dict:
+    summary = {
+        "samples": samples,
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "min": min(samples),
+    }
+    if ops:
+        summary["ops"] = ops
+        summary["ops_per_second"] = ops / summary["median"] if summary["median"] else None
+    return summary
+
+
+def run_benchmark(spec: dict, ctx: BenchContext) -> dict[str, dict]:
+    """Run one registered benchmark and return its results by name."""
+    if not spec["timed"]:
+        return {name: {"group": spec["group"], **summarize([s for _, s in samples]),
+                       "sample_times": [t for t, _ in samples]}
+                for name, samples in spec["fn"](ctx).items() if samples}
+
+    fn = spec["fn"](ctx)
+    ops = fn()  # Warm-up
+    repeat = max(3, spec["repeat"] // 2) if ctx.quick else spec["repeat"]
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return {spec["name"]: {"group": spec["group"], **summarize(samples, ops)}}
+
+
+def environment() -> dict:
+    """Where the benchmarks ran, so results from different machines are not mixed up."""
+    env = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "hostname": platform.node(),
+    }
+    for module in ("numpy", "websockets"):
+        if importlib.util.find_spec(module):
+            env[module] = __import__(module).__version__
+    try:
+        env["git_commit"] = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                           cwd=Path(__file__).parent, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        env["git_commit"] = None
+    return env
+
+
+def run_all(pattern: Optional[str], work_dir: Path, quick: bool) -> dict:
+    ctx = BenchContext(work_dir, quick)
+    results: dict[str, dict] = {}
+    try:
+        for name, spec in BENCHMARKS.items():
+            if pattern and not fnmatch.fnmatch(name, pattern):
+                continue
+            try:
+                produced = run_benchmark(spec, ctx)
+            except SkipBenchmark as e:
+                print_warning(f"{name}: skipped ({e})")
+                continue
+            for result_name, result in produced.items():
+                results[result_name] = result
+                rate = f"  {result['ops_per_second']:,.0f} ops/s" if result.get("ops_per_second") else ""
+                print_info(f"{result_name:<32} median {format_seconds(result['median']):>10}  "
+                           f"± {format_seconds(result['stdev']):>9}{rate}")
+    finally:
+        ctx.close()
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "quick": quick,
+        "environment": environment(),
+        "results": results,
+    }
+
+
+def format_seconds(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} µs"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds:.2f} s"
+
+
+# --- Comparing ---
+
+def mann_whitney_greater(current: list[float], baseline: list[float]) -> float:
+    """One-sided p-value that current samples tend to be larger than baseline samples.
+
+    Uses the normal approximation with tie correction, which is adequate for
+    the sample counts used here and needs no SciPy.
+    """
+    n1, n2 = len(current), len(baseline)
+    if n1 == 0 or n2 == 0:
+        return 1.0
+    combined = sorted([(v, 0) for v in current] + [(v, 1) for v in baseline])
+    ranks = [0.0] * len(combined)
+    tie_term = 0.0
+    i = 0
+    while i < len(combined):
+        j = i
+        while j + 1 < len(combined) and combined[j + 1][0] == combined[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        ties = j - i + 1
+        tie_term += ties ** 3 - ties
+        i = j + 1
+    rank_sum = sum(rank for rank, (_, source) in zip(ranks, combined) if source == 0)
+    u = rank_sum - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - tie_term / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(variance)  # With continuity correction
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def compare(current: dict, baseline: dict, threshold: float = THRESHOLD, alpha: float = ALPHA) -> list[str]:
+    """Print a comparison table; returns the names of regressed benchmarks."""
+    if current.get("environment", {}).get("hostname") != baseline.get("environment", {}).get("hostname"):
+        print_warning("Baseline was recorded on a different machine; differences may not be meaningful")
+    if current.get("quick") != baseline.get("quick"):
+        print_warning("Baseline and this run differ in --quick; sizes are not comparable")
+
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if not base:
+            print_info(f"{name:<32} new")
+            continue
+        samples = result["samples"]
+        if "sample_times" in result and "sample_times" in base:
+            # Recorded samples overlap between runs; only test those newer than the baseline's window
+            newest = max(base["sample_times"], default="")
+            samples = [s for s, t in zip(samples, result["sample_times"]) if t > newest]
+            if len(samples) < 3:
+                print_info(f"{name:<32} {len(samples)} new samples since the baseline, not compared")
+                continue
+        ratio = statistics.median(samples) / base["median"] if base["median"] else 1.0
+        p_slower = mann_whitney_greater(samples, base["samples"])
+        line = f"{name:<32} {ratio:6.2f}x  p={p_slower:.3f}"
+        if ratio > 1 + threshold and p_slower < alpha:
+            regressions.append(name)
+            print_error(f"{line}  regression")
+        elif ratio < 1 - threshold and mann_whitney_greater(base["samples"], samples) < alpha:
+            print_success(f"{line}  faster")
+        else:
+            print_info(line)
+    return regressions
+
+
+def save_results(results: dict, out_dir: Path) -> Path:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / f"bench-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    path.write_text(json.dumps(results, indent=2))
+    return path
+
+
+def load_results(path: Path) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    work_dir = Path(__file__).parent.resolve()
+    parser = argparse.ArgumentParser(description="Tank Royale tools benchmarks")
+    parser.add_argument("--out", type=Path, default=work_dir / RESULTS_DIR,
+                        help=f"Results directory (default: {RESULTS_DIR})")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help=f"Median slowdown that counts as a regression (default: {THRESHOLD})")
+    parser.add_argument("--alpha", type=float, default=ALPHA,
+                        help=f"Significance level of the Mann-Whitney U test (default: {ALPHA})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run benchmarks and compare with the baseline")
+    run_parser.add_argument("--filter", help="Only run benchmarks matching this glob, e.g. 'log*'")
+    run_parser.add_argument("--quick", action="store_true", help="Smaller inputs and fewer repeats")
+    run_parser.add_argument("--baseline", type=Path, help="Baseline file (default: <out>/baseline.json)")
+    run_parser.add_argument("--save-baseline", action="store_true", help="Save this run as the baseline")
+
+    compare_parser = subparsers.add_parser("compare", help="Compare a saved run with the baseline")
+    compare_parser.add_argument("current", type=Path)
+    compare_parser.add_argument("baseline", type=Path, nargs="?")
+
+    subparsers.add_parser("list", help="List registered benchmarks")
+
+    args = parser.parse_args()
+
+    if args.command == "list":
+        for name, spec in BENCHMARKS.items():
+            print_info(f"{name:<28} {spec['group']}")
+        return
+
+    if args.command == "compare":
+        current = load_results(args.current)
+        baseline_path = args.baseline or args.out / BASELINE_FILENAME
+    else:
+        print_step("Running benchmarks...")
+        current = run_all(args.filter, work_dir, args.quick)
+        path = save_results(current, args.out)
+        print_success(f"Saved results to {path}")
+        baseline_path = args.baseline or args.out / BASELINE_FILENAME
+        if args.save_baseline:
+            shutil.copyfile(path, baseline_path)
+            print_success(f"Saved as baseline {baseline_path}")
+            return
+
+    if not baseline_path.exists():
+        print_warning(f"No baseline at {baseline_path}; save one with: python bench.py run --save-baseline")
+        return
+
+    print_step(f"Comparing with baseline {baseline_path}")
+    regressions = compare(current, load_results(baseline_path), args.threshold, args.alpha)
+    if regressions:
+        print_error(f"{len(regressions)} benchmarks regressed beyond {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+    print_success("No regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+bot_host.py
+-----------
+Hosts many Python bots in a few asyncio processes.
+
+A standalone Tank Royale bot is one process with its own interpreter and
+WebSocket. Here, bot classes are loaded into a small pool of worker
+processes instead. Each bot still has its own connection, handshake and
+session with the server, but the interpreter, the loaded modules and the
+event loop are shared. The pool is forked after the bot modules are
+imported, so their code pages are shared between workers as well.
+
+Bots are subclasses of HostedBot (see sample_bots.py). Their on_tick()
+returns the BotIntent for the turn. All bots in a worker share one thread,
+so ticks go through a scheduler:
+
+- per-bot CPU time (thread time) is measured around every callback
+- ticks waiting to run are ordered by deadline, then by recent CPU use, so
+  cheap bots run before expensive ones
+- a bot that keeps exceeding its CPU budget per turn is demoted and runs
+  after all other bots, so it cannot make them miss the turn timeout; its
+  turn is skipped when its usual CPU time does not fit before the deadline
+  of another bot whose tick for the turn is still pending or on its way
+- a tick whose deadline has already passed is dropped in favour of the
+  bot's newest tick
+
+Usage:
+    python bot_host.py sample_bots:SpinBot*20 sample_bots:Corners*20 --processes 4
+    python bot_host.py my_bots:Walls my_bots:Tracker --url ws://host:7654 --secret SECRET
+"""
+import argparse
+import asyncio
+import heapq
+import importlib
+import json
+import math
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+try:
+    import websockets
+except ImportError:
+    print("Error: 'websockets' library is not installed.")
+    print("Please install it by running: pip install websockets")
+    print("Or install all dependencies: pip install -r requirements.txt")
+    sys.exit(1)
+
+from observer import read_properties
+
+try:
+    import resource  # Memory reporting only; not available on Windows
+except ImportError:
+    resource = None
+
+DEFAULT_SERVER_URL = "ws://localhost:7655"
+DEFAULT_TURN_TIMEOUT = 0.03   # Seconds; replaced by the game setup
+CPU_BUDGET_SHARE = 0.5        # Share of the turn timeout one bot may use per turn
+DEMOTE_AFTER = 3              # Consecutive over-budget turns before a bot is demoted
+PROMOTE_AFTER = 20            # Consecutive turns within budget before it is promoted again
+DEADLINE_BUCKET = 0.005       # Ticks with deadlines this close count as equally urgent
+CPU_EWMA_ALPHA = 0.2
+STATS_INTERVAL = 10.0
+RECONNECT_DELAY = 2.0
+
+# ANSI Color Codes
+class Colors:
+    RESET = "\033[0m"
+    BOLD = "\033[1m"
+    GREEN = "\033[92m"
+    BLUE = "\033[94m"
+    YELLOW = "\033[93m"
+    RED = "\033[91m"
+    CYAN = "\033[96m"
+
+def print_step(message: str) -> None:
+    print(f"{Colors.CYAN}{Colors.BOLD}==> {message}{Colors.RESET}", flush=True)
+
+def print_success(message: str) -> None:
+    print(f"{Colors.GREEN}{Colors.BOLD}✓ {message}{Colors.RESET}", flush=True)
+
+def print_warning(message: str) -> None:
+    print(f"{Colors.YELLOW}⚠ {message}{Colors.RESET}", flush=True)
+
+def print_error(message: str) -> None:
+    print(f"{Colors.RED}✗ {message}{Colors.RESET}", flush=True)
+
+def print_info(message: str) -> None:
+    print(f"{Colors.BLUE}  {message}{Colors.RESET}", flush=True)
+
+
+class HostedBot:
+    """Base class for bots run by the bot host.
+
+    Callbacks run on the worker's shared event loop thread and must not
+    block. on_tick() receives the TickEventForBot and returns the intent
+    fields for this turn (turnRate, gunTurnRate, radarTurnRate, targetSpeed,
+    firepower, ...); returning None sends an empty intent.
+    """
+
+    name = "HostedBot"
+    version = "1.0"
+    authors = ["Unknown"]
+    description = ""
+    game_types = ["classic", "melee", "1v1"]
+
+    def on_game_started(self, event: dict) -> None:
+        pass
+
+    def on_round_started(self, event: dict) -> None:
+        pass
+
+    def on_tick(self, tick: dict) -> Optional[dict]:
+        return None
+
+    def on_round_ended(self, event: dict) -> None:
+        pass
+
+    def on_game_ended(self, event: dict) -> None:
+        pass
+
+
+def load_bot_class(spec: str) -> type:
+    """Import 'module:Class' and check that it is a HostedBot."""
+    module_name, _, class_name = spec.partition(":")
+    if not class_name:
+        raise ValueError(f"Bot '{spec}' must be given as module:Class")
+    bot_class = getattr(importlib.import_module(module_name), class_name)
+    if not (isinstance(bot_class, type) and issubclass(bot_class, HostedBot)):
+        raise ValueError(f"{spec} is not a HostedBot subclass")
+    return bot_class
+
+
+def parse_roster(specs: list[str]) -> list[str]:
+    """Expand 'module:Class*N' into N entries."""
+    roster = []
+    for text in specs:
+        spec, _, count = text.partition("*")
+        if count and not (count.isdigit() and int(count) > 0):
+            raise ValueError(f"'{text}': the number of copies after '*' must be a positive integer")
+        roster.extend([spec] * (int(count) if count else 1))
+    return roster
+
+
+class BotSession:
+    """One hosted bot: its connection to the server and its CPU accounting."""
+
+    def __init__(self, bot: HostedBot, index: int, url: str, secret: Optional[str], scheduler: "TurnScheduler") -> None:
+        self.bot = bot
+        self.label = f"{bot.name}#{index}"
+        self.url = url
+        self.secret = secret
+        self.scheduler = scheduler
+        self.ws = None
+        self.turn_timeout = DEFAULT_TURN_TIMEOUT
+        self.turn = (0, 0)  # (round, turn) of the newest tick received
+
+        # CPU accounting, in seconds of thread time
+        self.cpu_total = 0.0
+        self.cpu_ewma = 0.0
+        self.cpu_last = 0.0
+        self.cpu_max = 0.0
+        self.ticks = 0
+        self.dropped = 0
+        self.late = 0
+        self.over_budget_streak = 0
+        self.within_budget_streak = 0
+        self.demoted = False
+
+    def budget(self) -> float:
+        return self.turn_timeout * CPU_BUDGET_SHARE
+
+    def call(self, callback, *args):
+        """Run a bot callback and charge its CPU time to this bot."""
+        started = time.thread_time()
+        try:
+            return callback(*args)
+        except Exception as e:
+            print_warning(f"{self.label}: {callback.__name__} failed: {type(e).__name__}: {e}")
+            return None
+        finally:
+            self.charge(time.thread_time() - started)
+
+    def charge(self, cpu: float) -> None:
+        self.cpu_total += cpu
+        self.cpu_last = cpu
+        self.cpu_max = max(self.cpu_max, cpu)
+        self.cpu_ewma += CPU_EWMA_ALPHA * (cpu - self.cpu_ewma)
+        if cpu > self.budget():
+            self.over_budget_streak += 1
+            self.within_budget_streak = 0
+            if not self.demoted and self.over_budget_streak >= DEMOTE_AFTER:
+                self.demoted = True
+                print_warning(f"{self.label} used {cpu * 1000:.1f} ms CPU per turn "
+                              f"(budget {self.budget() * 1000:.1f} ms); running it after the other bots")
+        else:
+            self.within_budget_streak += 1
+            self.over_budget_streak = 0
+            if self.demoted and self.within_budget_streak >= PROMOTE_AFTER:
+                self.demoted = False
+
+    def handshake(self, session_id: str) -> dict:
+        handshake = {
+            "type": "BotHandshake",
+            "sessionId": session_id,
+            "name": self.bot.name,
+            "version": self.bot.version,
+            "authors": list(self.bot.authors),
+            "description": self.bot.description,
+            "gameTypes": list(self.bot.game_types),
+            "platform": f"Python {sys.version.split()[0]} (bot host)",
+            "programmingLang": "Python",
+        }
+        if self.secret:
+            handshake["secret"] = self.secret
+        return handshake
+
+    async def run(self) -> None:
+        """Stay connected to the server and play every game it starts."""
+        while True:
+            try:
+                async with websockets.connect(self.url, max_size=None) as ws:
+                    self.ws = ws
+                    async for raw in ws:
+                        await self.handle(json.loads(raw))
+            except (OSError, websockets.ConnectionClosed) as e:
+                print_warning(f"{self.label}: connection lost ({type(e).__name__}); reconnecting")
+            except Exception as e:
+                # Rejected handshakes, bad messages and the like only restart this bot, not its worker
+                print_warning(f"{self.label}: {type(e).__name__}: {e}; reconnecting")
+            finally:
+                self.ws = None
+                self.scheduler.forget(self)
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    async def handle(self, message: dict) -> None:
+        message_type = message.get("type")
+        if message_type == "TickEventForBot":
+            self.scheduler.submit(self, message)
+        elif message_type == "ServerHandshake":
+            await self.ws.send(json.dumps(self.handshake(message["sessionId"])))
+        elif message_type == "GameStartedEventForBot":
+            setup = message.get("gameSetup") or {}
+            # turnTimeout is given in microseconds
+            self.turn_timeout = setup.get("turnTimeout", DEFAULT_TURN_TIMEOUT * 1_000_000) / 1_000_000
+            self.scheduler.join(self)
+            self.call(self.bot.on_game_started, message)
+            await self.ws.send(json.dumps({"type": "BotReady"}))
+        elif message_type == "RoundStartedEvent":
+            self.call(self.bot.on_round_started, message)
+        elif message_type == "RoundEndedEventForBot":
+            self.call(self.bot.on_round_ended, message)
+        elif message_type in ("GameEndedEventForBot", "GameAbortedEvent"):
+            self.scheduler.forget(self)
+            self.call(self.bot.on_game_ended, message)
+
+    def send_intent(self, intent: Optional[dict]) -> None:
+        if self.ws is None:
+            return
+        message = {"type": "BotIntent", **(intent or {})}
+        asyncio.ensure_future(self._send(json.dumps(message)))
+
+    async def _send(self, text: str) -> None:
+        try:
+            await self.ws.send(text)
+        except (AttributeError, websockets.ConnectionClosed):
+            pass
+
+
+class TurnScheduler:
+    """Runs pending ticks of all bots in a worker, most urgent and cheapest first."""
+
+    def __init__(self) -> None:
+        self.heap: list[tuple] = []
+        self.pending: dict[BotSession, tuple] = {}  # Newest tick per bot
+        self.wakeup = asyncio.Event()
+        self.sequence = 0
+        self.playing: set[BotSession] = set()  # Sessions in a game, expecting a tick every turn
+
+    def submit(self, session: BotSession, tick: dict) -> None:
+        now = time.monotonic()
+        session.turn = (tick.get("roundNumber", 0), tick.get("turnNumber", 0))
+        if session in self.pending:
+            # An older tick was still waiting; only the newest one is worth answering
+            session.dropped += 1
+        self.sequence += 1
+        deadline = now + session.turn_timeout
+        entry = (session.demoted, int(deadline / DEADLINE_BUCKET), session.cpu_ewma, self.sequence,
+                 deadline, session, tick)
+        self.pending[session] = entry
+        heapq.heappush(self.heap, entry)
+        self.wakeup.set()
+
+    def join(self, session: BotSession) -> None:
+        session.turn = (0, 0)
+        self.playing.add(session)
+
+    def forget(self, session: BotSession) -> None:
+        self.pending.pop(session, None)
+        self.playing.discard(session)
+
+    def fits(self, session: BotSession, deadline: float) -> bool:
+        """Whether a demoted bot's turn can run before the other bots of this turn must answer."""
+        sent = deadline - session.turn_timeout
+        earliest = math.inf
+        # Right after demotion the average still lags behind the turns that caused it
+        needed = max(session.cpu_ewma, session.cpu_last)
+        for other in self.playing:
+            if other is session or other.demoted:
+                continue
+            entry = self.pending.get(other)
+            if entry is not None:
+                other_deadline = entry[-3]
+            elif other.turn < session.turn:
+                # Its tick was sent with this one and is still on its way
+                other_deadline = sent + other.turn_timeout
+            else:
+                continue  # Already answered this turn
+            earliest = min(earliest, other_deadline)
+            needed += other.cpu_ewma
+        return time.monotonic() + needed <= earliest
+
+    async def run(self) -> None:
+        while True:
+            if not self.heap:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+            entry = heapq.heappop(self.heap)
+            deadline, session, tick = entry[-3:]
+            if self.pending.get(session) is not entry:
+                continue  # Superseded by a newer tick or forgotten
+            del self.pending[session]
+            if time.monotonic() > deadline or (session.demoted and not self.fits(session, deadline)):
+                session.late += 1
+                continue
+            intent = session.call(session.bot.on_tick, tick)
+            session.ticks += 1
+            session.send_intent(intent)
+            # Let the connections receive and send between bots
+            await asyncio.sleep(0)
+
+
+def rss_mib() -> float:
+    """Peak resident memory of this process in MiB."""
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+async def host_bots(worker: int, specs: list[str], url: str, secret: Optional[str],
+                    first_index: int, baseline_mib: float) -> None:
+    scheduler = TurnScheduler()
+    sessions = [BotSession(load_bot_class(spec)(), first_index + i, url, secret, scheduler)
+                for i, spec in enumerate(specs)]
+    print_success(f"Worker {worker} (pid {os.getpid()}) hosting {len(sessions)} bots")
+
+    async def report() -> None:
+        while True:
+            await asyncio.sleep(STATS_INTERVAL)
+            ticks = sum(s.ticks for s in sessions)
+            late = sum(s.late for s in sessions)
+            demoted = [s.label for s in sessions if s.demoted]
+            memory = rss_mib()
+            print_info(f"worker {worker}: {ticks} turns, {late} late, "
+                       f"{memory:.0f} MiB ({(memory - baseline_mib) / max(len(sessions), 1):.2f} MiB/bot)"
+                       + (f", demoted: {', '.join(demoted)}" if demoted else ""))
+
+    try:
+        await asyncio.gather(scheduler.run(), report(), *(s.run() for s in sessions))
+    finally:
+        print_step(f"Worker {worker} CPU per bot")
+        for s in sorted(sessions, key=lambda s: -s.cpu_total):
+            mean = s.cpu_total / s.ticks * 1000 if s.ticks else 0.0
+            print_info(f"{s.label:<24} {s.ticks:>7} turns  mean {mean:6.2f} ms  max {s.cpu_max * 1000:6.2f} ms  "
+                       f"late {s.late}  dropped {s.dropped}")
+
+
+def worker_main(worker: int, specs: list[str], url: str, secret: Optional[str], first_index: int,
+                baseline_mib: float) -> None:
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    try:
+        asyncio.run(host_bots(worker, specs, url, secret, first_index, baseline_mib))
+    except KeyboardInterrupt:
+        pass
+
+
+def shard(roster: list[str], processes: int) -> list[list[str]]:
+    """Split the roster round-robin, so copies of the same bot are spread out."""
+    return [roster[i::processes] for i in range(processes) if roster[i::processes]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host many Python bots in a few processes")
+    parser.add_argument("bots", nargs="+", help="Bot classes as module:Class, optionally with *N for N copies")
+    parser.add_argument("--url", default=DEFAULT_SERVER_URL, help=f"Server URL (default: {DEFAULT_SERVER_URL})")
+    parser.add_argument("--secret", help="Bot secret (default: from server.properties)")
+    parser.add_argument("--processes", type=int, default=min(4, os.cpu_count() or 1),
+                        help="Worker processes (default: up to 4)")
+    args = parser.parse_args()
+
+    work_dir = Path(__file__).parent.resolve()
+    secret = args.secret
+    if not secret:
+        secrets = read_properties(work_dir / "server.properties").get("bots-secrets")
+        secret = secrets.split(",")[0].strip() if secrets else None
+
+    try:
+        roster = parse_roster(args.bots)
+    except ValueError as e:
+        print_error(str(e))
+        sys.exit(1)
+    # Import every bot module before forking, so the workers share its pages
+    try:
+        for spec in set(roster):
+            load_bot_class(spec)
+    except (ImportError, AttributeError, ValueError) as e:
+        print_error(f"Cannot load bot: {e}")
+        sys.exit(1)
+
+    shards = shard(roster, max(1, args.processes))
+    print_step(f"Hosting {len(roster)} bots in {len(shards)} processes against {args.url}")
+    baseline_mib = rss_mib()
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    workers = []
+    first_index = 1
+    for number, specs in enumerate(shards, start=1):
+        process = context.Process(target=worker_main, args=(number, specs, args.url, secret, first_index, baseline_mib),
+                                  name=f"bot-host-{number}")
+        process.start()
+        workers.append(process)
+        first_index += len(specs)
+
+    try:
+        for process in workers:
+            process.join()
+    except KeyboardInterrupt:
+        # The workers got the SIGINT as well and print their summaries
+        for process in workers:
+            process.join(timeout=5)
+        print_info("Bot host stopped")
+
+
+if __name__ == "__main__":
+    # Bot modules import HostedBot from bot_host; make that this module, not a second copy
+    sys.modules.setdefault("bot_host", sys.modules[__name__])
+    main()
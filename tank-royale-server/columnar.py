@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+"""
+columnar.py
+-----------
+Columnar export of battle recordings, with a zone-map query engine.
+
+Recordings are flattened to one row per bot per tick and stored as chunks
+of .npy column files:
+
+    battle, round, turn, bot, energy, x, y, direction, speed, wall_distance
+
+battle and bot are codes into the dictionaries in manifest.json: battles
+by recording id (see battle_recording.recording_id, so a recording is only
+exported once wherever it is stored) and bots by name. wall_distance is the
+distance from the bot to the nearest arena wall.
+
+Rows in a chunk are sorted by bot, then turn, and split into row groups of
+GROUP_ROWS rows. The manifest keeps a zone map for every chunk and every row
+group: the min and max of each column and the set of bots present. Sorting
+keeps each group to one or two bots and a narrow band of turns, so zone maps
+of turn and of the columns that follow it, such as energy, are tight enough
+to rule groups out.
+
+A query is a list of predicates such as "energy<10". Chunks and row groups
+whose zone maps rule out a predicate are skipped without being read, and in
+the remaining groups only the columns the query needs are read
+(memory-mapped). Matching rows come out in storage order.
+
+Usage:
+    python columnar.py export recordings/ --workers 8
+    python columnar.py query --where bot=Walls --where "energy<10" --where "wall_distance<=100"
+    python columnar.py query --where "turn>=1000" --count-by bot
+    python columnar.py query --where bot=Walls --select battle,round,turn,energy --limit 20
+    python columnar.py info
+"""
+import argparse
+import json
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    print("Error: 'numpy' library is not installed.")
+    print("Please install it by running: pip install numpy")
+    print("Or install all dependencies: pip install -r requirements.txt")
+    sys.exit(1)
+
+from battle_recording import GAME_STARTED, TICK, iter_recordings, read_recording, recording_id
+
+DEFAULT_STORE_DIR = "columns"
+MANIFEST_FILENAME = "manifest.json"
+CHUNK_ROWS = 1_000_000
+GROUP_ROWS = 16_384
+
+COLUMNS = {
+    "battle": np.int32,
+    "round": np.int16,
+    "turn": np.int32,
+    "bot": np.int32,
+    "energy": np.float32,
+    "x": np.float32,
+    "y": np.float32,
+    "direction": np.float32,
+    "speed": np.float32,
+    "wall_distance": np.float32,
+}
+DICTIONARY_COLUMNS = {"battle": "battles", "bot": "bots"}
+
+PREDICATE = re.compile(r"^\s*(\w+)\s*(<=|>=|!=|==|=|<|>)\s*(.+?)\s*$")
+
+# ANSI Color Codes
+class Colors:
+    RESET = "\033[0m"
+    BOLD = "\033[1m"
+    GREEN = "\033[92m"
+    BLUE = "\033[94m"
+    YELLOW = "\033[93m"
+    RED = "\033[91m"
+    CYAN = "\033[96m"
+
+def print_step(message: str) -> None:
+    print(f"{Colors.CYAN}{Colors.BOLD}==> {message}{Colors.RESET}")
+
+def print_success(message: str) -> None:
+    print(f"{Colors.GREEN}{Colors.BOLD}✓ {message}{Colors.RESET}")
+
+def print_warning(message: str) -> None:
+    print(f"{Colors.YELLOW}⚠ {message}{Colors.RESET}")
+
+def print_error(message: str) -> None:
+    print(f"{Colors.RED}✗ {message}{Colors.RESET}")
+
+def print_info(message: str) -> None:
+    print(f"{Colors.BLUE}  {message}{Colors.RESET}")
+
+
+def battle_rows(path: Path) -> tuple[str, list[str], dict[str, "np.ndarray"]]:
+    """Flatten one recording into columns. Bots are local indexes into the returned names."""
+    names: dict[int, str] = {}
+    arena_width, arena_height = 800, 600
+    rows: list[tuple] = []
+
+    for message in read_recording(path):
+        message_type = message.get("type")
+        if message_type == GAME_STARTED:
+            setup = message.get("gameSetup") or {}
+            arena_width, arena_height = setup.get("arenaWidth", 800), setup.get("arenaHeight", 600)
+            names = {p["id"]: p.get("name", str(p["id"])) for p in message.get("participants", [])}
+        elif message_type == TICK:
+            round_number, turn = message.get("roundNumber", 0), message.get("turnNumber", 0)
+            for bot in message.get("botStates", []):
+                rows.append((round_number, turn, bot["id"], bot.get("energy", 0.0), bot["x"], bot["y"],
+                             bot.get("direction", 0.0), bot.get("speed", 0.0)))
+
+    local_names = sorted(set(names.values()) | {str(r[2]) for r in rows if r[2] not in names})
+    local_code = {name: i for i, name in enumerate(local_names)}
+    data = np.asarray(rows, dtype=np.float64).reshape(-1, 8)
+    ids = data[:, 2].astype(np.int64)
+    x, y = data[:, 4], data[:, 5]
+    columns = {
+        "round": data[:, 0],
+        "turn": data[:, 1],
+        "bot": np.asarray([local_code[names.get(i, str(i))] for i in ids], dtype=np.int32),
+        "energy": data[:, 3],
+        "x": x,
+        "y": y,
+        "direction": data[:, 6],
+        "speed": data[:, 7],
+        "wall_distance": np.minimum(np.minimum(x, arena_width - x), np.minimum(y, arena_height - y)),
+    }
+    return recording_id(path), local_names, columns
+
+
+class ColumnStore:
+    """Chunks of .npy columns plus a manifest with dictionaries and zone maps."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        manifest_path = path / MANIFEST_FILENAME
+        if manifest_path.exists():
+            self.manifest = json.loads(manifest_path.read_text())
+        else:
+            self.manifest = {"columns": {name: np.dtype(t).name for name, t in COLUMNS.items()},
+                             "battles": [], "bots": [], "chunks": []}
+        self.codes = {kind: {name: i for i, name in enumerate(self.manifest[kind])}
+                      for kind in DICTIONARY_COLUMNS.values()}
+        self._pending: list[dict[str, "np.ndarray"]] = []
+        self._pending_rows = 0
+
+    @property
+    def chunks(self) -> list[dict]:
+        return self.manifest["chunks"]
+
+    def code(self, kind: str, name: str) -> int:
+        codes = self.codes[kind]
+        if name not in codes:
+            codes[name] = len(self.manifest[kind])
+            self.manifest[kind].append(name)
+        return codes[name]
+
+    def has_battle(self, battle: str) -> bool:
+        return battle in self.codes["battles"]
+
+    def add_battle(self, battle: str, bot_names: list[str], columns: dict[str, "np.ndarray"]) -> None:
+        rows = len(columns["turn"])
+        global_bots = np.asarray([self.code("bots", name) for name in bot_names], dtype=np.int32)
+        columns = dict(columns)
+        columns["battle"] = np.full(rows, self.code("battles", battle))
+        columns["bot"] = global_bots[columns["bot"]] if rows else columns["bot"]
+        self._pending.append({name: np.asarray(columns[name], dtype=dtype) for name, dtype in COLUMNS.items()})
+        self._pending_rows += rows
+        if self._pending_rows >= CHUNK_ROWS:
+            self.flush_chunk()
+
+    def flush_chunk(self) -> None:
+        """Write the pending battles as one chunk of sorted row groups, with zone maps."""
+        if not self._pending:
+            return
+        chunk_id = f"chunk-{len(self.chunks):06d}"
+        chunk_dir = self.path / chunk_id
+        chunk_dir.mkdir(parents=True, exist_ok=True)
+        columns = {name: np.concatenate([part[name] for part in self._pending]) for name in COLUMNS}
+        rows = len(columns["turn"])
+        # lexsort sorts by the last key first: bot, turn, battle, round
+        order = np.lexsort((columns["round"], columns["battle"], columns["turn"], columns["bot"]))
+        starts = np.arange(0, rows, GROUP_ROWS)
+        groups = [{"start": int(start), "rows": int(min(GROUP_ROWS, rows - start)), "zones": {}} for start in starts]
+        zones = {}
+        for name in COLUMNS:
+            column = columns[name][order]
+            columns[name] = column
+            np.save(chunk_dir / f"{name}.npy", column)
+            if rows:
+                zones[name] = [column.min().item(), column.max().item()]
+                lows, highs = np.minimum.reduceat(column, starts), np.maximum.reduceat(column, starts)
+                for group, low, high in zip(groups, lows.tolist(), highs.tolist()):
+                    group["zones"][name] = [low, high]
+        for group in groups:
+            group["bots"] = np.unique(columns["bot"][group["start"]:group["start"] + group["rows"]]).tolist()
+        bots = np.unique(columns["bot"]).tolist()
+        self.chunks.append({"id": chunk_id, "rows": rows, "zones": zones, "bots": bots, "groups": groups})
+        self._pending = []
+        self._pending_rows = 0
+
+    def close(self) -> None:
+        self.flush_chunk()
+        self.path.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path / (MANIFEST_FILENAME + ".tmp")
+        tmp_path.write_text(json.dumps(self.manifest))
+        tmp_path.replace(self.path / MANIFEST_FILENAME)
+
+    def read_column(self, chunk: dict, name: str) -> "np.ndarray":
+        return np.load(self.path / chunk["id"] / f"{name}.npy", mmap_mode="r")
+
+
+def export(store: ColumnStore, paths: list[Path], workers: int = 1) -> int:
+    """Add recordings that are not in the store yet, decoding them in parallel."""
+    seen = set()
+    pending = []
+    for path in iter_recordings(paths):
+        battle = recording_id(path)
+        if not store.has_battle(battle) and battle not in seen:
+            seen.add(battle)
+            pending.append(path)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = pool.map(battle_rows, pending, chunksize=8)
+            for battle, bot_names, columns in results:
+                store.add_battle(battle, bot_names, columns)
+    else:
+        for path in pending:
+            store.add_battle(*battle_rows(path))
+    store.close()
+    return len(pending)
+
+
+# --- Queries ---
+
+class Predicate:
+    """column op value, with dictionary columns compared by name."""
+
+    OPS = {
+        "=": np.equal, "==": np.equal, "!=": np.not_equal,
+        "<": np.less, "<=": np.less_equal, ">": np.greater, ">=": np.greater_equal,
+    }
+
+    def __init__(self, text: str, store: ColumnStore) -> None:
+        match = PREDICATE.match(text)
+        if not match:
+            raise ValueError(f"Cannot parse predicate '{text}'; use e.g. 'energy<10' or 'bot=Walls'")
+        self.column, op, raw = match.groups()
+        if self.column not in COLUMNS:
+            raise ValueError(f"Unknown column '{self.column}'; columns are {', '.join(COLUMNS)}")
+        self.op = "=" if op == "==" else op
+        if self.column in DICTIONARY_COLUMNS:
+            if self.op not in ("=", "!="):
+                raise ValueError(f"Only = and != are supported for {self.column}")
+            # An unknown name matches nothing
+            self.value = store.codes[DICTIONARY_COLUMNS[self.column]].get(raw, -1)
+        else:
+            self.value = float(raw)
+
+    def may_match(self, zone_map: dict) -> bool:
+        """False if the zone map of a chunk or row group proves that no row can match."""
+        if self.column == "bot" and self.op == "=":
+            return self.value in zone_map["bots"]
+        zone = zone_map["zones"].get(self.column)
+        if zone is None:
+            return False
+        low, high = zone
+        value = self.value
+        if self.op == "=":
+            return low <= value <= high
+        if self.op == "!=":
+            return not (low == high == value)
+        if self.op == "<":
+            return low < value
+        if self.op == "<=":
+            return low <= value
+        if self.op == ">":
+            return high > value
+        return high >= value
+
+    def mask(self, column: "np.ndarray") -> "np.ndarray":
+        return self.OPS[self.op](column, self.value)
+
+
+def chunk_groups(chunk: dict) -> list[dict]:
+    """The row groups of a chunk; chunks written before row groups are one group."""
+    return chunk.get("groups") or [{"start": 0, "rows": chunk["rows"], "zones": chunk["zones"], "bots": chunk["bots"]}]
+
+
+def group_ranges(groups: list[dict]) -> list[tuple[int, int]]:
+    """Row ranges covered by the groups, with adjacent groups joined."""
+    ranges: list[tuple[int, int]] = []
+    for group in groups:
+        start, end = group["start"], group["start"] + group["rows"]
+        if ranges and ranges[-1][1] == start:
+            ranges[-1] = (ranges[-1][0], end)
+        else:
+            ranges.append((start, end))
+    return ranges
+
+
+def query(store: ColumnStore, predicates: list[Predicate], select: Iterable[str]) -> tuple[dict[str, "np.ndarray"], dict]:
+    """Rows matching all predicates, as the selected columns, plus scan statistics."""
+    select = list(select)
+    stats = {"chunks": len(store.chunks), "chunks_scanned": 0, "groups": 0, "groups_scanned": 0,
+             "rows_scanned": 0, "columns_read": 0}
+    parts: dict[str, list[np.ndarray]] = {name: [] for name in select}
+
+    # Cheap predicates first: dictionary lookups before float comparisons
+    ordered = sorted(predicates, key=lambda p: p.column not in DICTIONARY_COLUMNS)
+    for chunk in store.chunks:
+        groups = chunk_groups(chunk)
+        stats["groups"] += len(groups)
+        if not all(p.may_match(chunk) for p in ordered):
+            continue
+        groups = [g for g in groups if all(p.may_match(g) for p in ordered)]
+        if not groups:
+            continue
+        ranges = group_ranges(groups)
+        stats["chunks_scanned"] += 1
+        stats["groups_scanned"] += len(groups)
+        stats["rows_scanned"] += sum(g["rows"] for g in groups)
+
+        cache: dict[str, np.ndarray] = {}
+
+        def column(name: str) -> "np.ndarray":
+            if name not in cache:
+                cache[name] = store.read_column(chunk, name)
+                stats["columns_read"] += 1
+            return cache[name]
+
+        selected: Optional[np.ndarray] = None
+        for predicate in ordered:
+            values = column(predicate.column)
+            if selected is None:
+                selected = np.concatenate([start + np.flatnonzero(predicate.mask(values[start:end]))
+                                           for start, end in ranges])
+            else:
+                # Only look at rows that are still candidates
+                selected = selected[predicate.mask(values[selected])]
+            if not len(selected):
+                break
+        if selected is None:
+            selected = np.concatenate([np.arange(start, end) for start, end in ranges])
+        if len(selected):
+            for name in select:
+                parts[name].append(np.asarray(column(name)[selected]))
+
+    result = {name: np.concatenate(chunks) if chunks else np.empty(0, dtype=COLUMNS[name])
+              for name, chunks in parts.items()}
+    return result, stats
+
+
+def decode(store: ColumnStore, name: str, values: "np.ndarray") -> list:
+    if name in DICTIONARY_COLUMNS:
+        names = store.manifest[DICTIONARY_COLUMNS[name]]
+        return [names[v] for v in values]
+    return values.tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar battle store with zone-map queries")
+    parser.add_argument("--store", type=Path, default=Path(__file__).parent / DEFAULT_STORE_DIR,
+                        help=f"Store directory (default: {DEFAULT_STORE_DIR})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Add recordings to the store")
+    export_parser.add_argument("paths", nargs="+", type=Path, help="Recording files or directories")
+    export_parser.add_argument("--workers", type=int, default=1, help="Parallel worker processes")
+
+    query_parser = subparsers.add_parser("query", help="Select rows matching all predicates")
+    query_parser.add_argument("--where", action="append", default=[],
+                              help="Predicate such as 'energy<10' or 'bot=Walls'; repeatable")
+    query_parser.add_argument("--select", default="battle,round,turn,bot,energy,x,y",
+                              help="Columns to print (default: battle,round,turn,bot,energy,x,y)")
+    query_parser.add_argument("--count-by", choices=list(COLUMNS), help="Only count matching rows per value")
+    query_parser.add_argument("--limit", type=int, default=20, help="Rows to print (default: 20, 0 for all)")
+    query_parser.add_argument("--out", type=Path, help="Write all matching rows as CSV")
+
+    subparsers.add_parser("info", help="Summarise the store")
+
+    args = parser.parse_args()
+    store = ColumnStore(args.store)
+
+    if args.command == "export":
+        print_step("Exporting recordings to columns...")
+        started = time.perf_counter()
+        added = export(store, args.paths, args.workers)
+        rows = sum(c["rows"] for c in store.chunks)
+        print_success(f"Exported {added} battles in {time.perf_counter() - started:.1f}s "
+                      f"({len(store.manifest['battles'])} battles, {rows:,} rows, {len(store.chunks)} chunks)")
+        return
+
+    if args.command == "info":
+        rows = sum(c["rows"] for c in store.chunks)
+        print_step(f"Column store {args.store}")
+        print_info(f"Battles: {len(store.manifest['battles'])}  Bots: {len(store.manifest['bots'])}")
+        groups = sum(len(chunk_groups(c)) for c in store.chunks)
+        print_info(f"Rows: {rows:,} in {len(store.chunks)} chunks, {groups} row groups")
+        print_info(f"Columns: {', '.join(COLUMNS)}")
+        return
+
+    try:
+        predicates = [Predicate(text, store) for text in args.where]
+    except ValueError as e:
+        print_error(str(e))
+        sys.exit(1)
+    select = [args.count_by] if args.count_by else [c.strip() for c in args.select.split(",") if c.strip()]
+    unknown = [c for c in select if c not in COLUMNS]
+    if unknown:
+        print_error(f"Unknown columns: {', '.join(unknown)}")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    result, stats = query(store, predicates, select)
+    elapsed = time.perf_counter() - started
+    matches = len(result[select[0]]) if select else 0
+    print_step(f"{matches:,} matching rows in {elapsed * 1000:.1f} ms")
+    print_info(f"Scanned {stats['chunks_scanned']}/{stats['chunks']} chunks, "
+               f"{stats['groups_scanned']}/{stats['groups']} row groups, {stats['rows_scanned']:,} rows, "
+               f"{stats['columns_read']} column files")
+
+    if args.count_by:
+        values, counts = np.unique(result[args.count_by], return_counts=True)
+        for value, count in sorted(zip(decode(store, args.count_by, values), counts.tolist()), key=lambda vc: -vc[1]):
+            print(f"  {value}\t{count}")
+        return
+
+    decoded = [decode(store, name, result[name]) for name in select]
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(",".join(select) + "\n")
+            for row in zip(*decoded):
+                f.write(",".join(f"{v:.6g}" if isinstance(v, float) else str(v) for v in row) + "\n")
+        print_success(f"Wrote {matches:,} rows to {args.out}")
+        return
+    print("  " + "\t".join(select))
+    for row in list(zip(*decoded))[:args.limit or None]:
+        print("  " + "\t".join(f"{v:.2f}" if isinstance(v, float) else str(v) for v in row))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+"""
+event_index.py
+--------------
+Inverted index of battle events, for jumping to events in recordings.
+
+For every event in a recording the index maps (event type, actor, target)
+to the ordinals of the ticks it happened in; an ordinal is the position of
+the tick in the recording. Bots are named, not numbered, so indexes of
+different battles can be merged into one tournament index. Wildcard keys are
+stored too, so "all deaths" or "every hit by bot A on anyone" are single
+lookups.
+
+The index also stores the byte offset of every tick in the uncompressed
+recording and where each gzip member of the recording starts. seek_ticks()
+uses them to decompress only the members holding the wanted ticks and to
+decode only those ticks.
+
+battle_recording.py builds the index while recording and saves it next to
+the recording as <name>.events.json.gz. Older recordings can be indexed
+afterwards; when they are a single gzip member, seeking still has to
+decompress them from the start, but skips other ticks without decoding them.
+
+Usage:
+    python event_index.py build recordings/
+    python event_index.py query recordings/game-1.battle.gz --type BulletHitBotEvent --actor Walls --target SpinBot
+    python event_index.py query recordings/game-1.battle.gz --type BotDeathEvent --show
+    python event_index.py merge recordings/ --out tournament.events.json.gz
+    python event_index.py query tournament.events.json.gz --type BotHitWallEvent --actor Crazy
+"""
+import argparse
+import gzip
+import json
+import time
+import zlib
+from bisect import bisect_right
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Union
+
+from battle_recording import GAME_STARTED, TICK, iter_recordings
+
+INDEX_SUFFIX = ".events.json.gz"
+INDEX_VERSION = 2
+READABLE_VERSIONS = (1, 2)  # Version 1 indexes have no tick offsets
+READ_CHUNK = 64 * 1024
+TICK_MARKER = f'"{TICK}"'.encode()
+ANY = "*"
+
+# How to find the acting and the affected bot of each event type
+EVENT_ROLES = {
+    "BulletFiredEvent": (("bullet", "ownerId"), None),
+    "BulletHitBotEvent": (("bullet", "ownerId"), ("victimId",)),
+    "BulletHitBulletEvent": (("bullet", "ownerId"), ("hitBullet", "ownerId")),
+    "BulletHitWallEvent": (("bullet", "ownerId"), None),
+    "BotDeathEvent": (("victimId",), None),
+    "BotHitBotEvent": (("botId",), ("victimId",)),
+    "BotHitWallEvent": (("victimId",), None),
+    "ScannedBotEvent": (("scannedByBotId",), ("scannedBotId",)),
+    "SkippedTurnEvent": (("victimId",), None),
+}
+
+# ANSI Color Codes
+class Colors:
+    RESET = "\033[0m"
+    BOLD = "\033[1m"
+    GREEN = "\033[92m"
+    BLUE = "\033[94m"
+    YELLOW = "\033[93m"
+    RED = "\033[91m"
+    CYAN = "\033[96m"
+
+def print_step(message: str) -> None:
+    print(f"{Colors.CYAN}{Colors.BOLD}==> {message}{Colors.RESET}")
+
+def print_success(message: str) -> None:
+    print(f"{Colors.GREEN}{Colors.BOLD}✓ {message}{Colors.RESET}")
+
+def print_warning(message: str) -> None:
+    print(f"{Colors.YELLOW}⚠ {message}{Colors.RESET}")
+
+def print_info(message: str) -> None:
+    print(f"{Colors.BLUE}  {message}{Colors.RESET}")
+
+
+def index_path(recording: Path) -> Path:
+    """Where the index of a recording is stored: next to it, with the index suffix."""
+    name = recording.name
+    for suffix in (".battle.gz", ".battle.jsonl", ".jsonl.gz", ".jsonl"):
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+            break
+    return recording.with_name(name + INDEX_SUFFIX)
+
+
+def event_key(event_type: str, actor: str = ANY, target: str = ANY) -> str:
+    return f"{event_type}\t{actor}\t{target}"
+
+
+def _lookup(event: dict, path: Optional[tuple]) -> Optional[int]:
+    if path is None:
+        return None
+    value = event
+    for field in path:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(field)
+    return value
+
+
+class EventIndexBuilder:
+    """Collects postings while messages of one recording are seen, in order."""
+
+    def __init__(self) -> None:
+        self.names: dict[int, str] = {}
+        self.ticks: list[tuple[int, int]] = []
+        self.offsets: Optional[list[int]] = []
+        self.postings: dict[str, list[int]] = {}
+
+    def add(self, message: dict, offset: Optional[int] = None) -> None:
+        """Add the next message; offset is where it starts in the uncompressed recording."""
+        message_type = message.get("type")
+        if message_type == GAME_STARTED:
+            self.names = {p["id"]: p.get("name", str(p["id"])) for p in message.get("participants", [])}
+        elif message_type == TICK:
+            ordinal = len(self.ticks)
+            self.ticks.append((message.get("roundNumber", 0), message.get("turnNumber", 0)))
+            if offset is None:
+                self.offsets = None
+            elif self.offsets is not None:
+                self.offsets.append(offset)
+            for event in message.get("events") or []:
+                self.add_event(event, ordinal)
+
+    def bot_name(self, bot_id: Optional[int]) -> Optional[str]:
+        if bot_id is None:
+            return None
+        return self.names.get(bot_id, str(bot_id))
+
+    def add_event(self, event: dict, ordinal: int) -> None:
+        event_type = event.get("type", "?")
+        actor_path, target_path = EVENT_ROLES.get(event_type, (None, None))
+        actor = self.bot_name(_lookup(event, actor_path)) or ANY
+        target = self.bot_name(_lookup(event, target_path)) or ANY
+        keys = {event_key(event_type), event_key(event_type, actor), event_key(event_type, ANY, target),
+                event_key(event_type, actor, target)}
+        for key in keys:
+            postings = self.postings.setdefault(key, [])
+            # Ticks arrive in order, so each posting list stays sorted and unique
+            if not postings or postings[-1] != ordinal:
+                postings.append(ordinal)
+
+    def to_dict(self, recording: str, members: Optional[list[list[int]]] = None) -> dict:
+        return {"version": INDEX_VERSION, "recording": recording, "bots": sorted(set(self.names.values())),
+                "ticks": self.ticks, "offsets": self.offsets, "members": members, "postings": self.postings}
+
+    def write_for(self, recording: Path, members: Optional[list[list[int]]] = None) -> Path:
+        """Save the index next to its recording.
+
+        members are the [compressed offset, uncompressed offset] pairs of the
+        recording's gzip members (see RecordingWriter).
+        """
+        path = index_path(recording)
+        write_json_gz(self.to_dict(recording.name, members), path)
+        return path
+
+
+def write_json_gz(data: dict, path: Path) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    tmp_path.replace(path)
+
+
+def build_index(recording: Path) -> Path:
+    """Index an existing recording and save the index next to it.
+
+    Member boundaries of an existing file are unknown, so a compressed
+    recording is treated as one member starting at the beginning.
+    """
+    builder = EventIndexBuilder()
+    compressed = recording.suffix == ".gz"
+    offset = 0
+    with (gzip.open if compressed else open)(recording, "rb") as f:
+        for line in f:
+            if line.strip():
+                builder.add(json.loads(line), offset)
+            offset += len(line)
+    return builder.write_for(recording, [[0, 0]] if compressed else None)
+
+
+class EventIndex:
+    """A loaded index of one recording or, after merging, of a whole tournament."""
+
+    def __init__(self, data: dict, recordings: Optional[list[str]] = None) -> None:
+        if data.get("version") not in READABLE_VERSIONS:
+            raise ValueError(f"Unsupported event index version {data.get('version')}")
+        self.bots: list[str] = data.get("bots", [])
+        # Single recording: postings are tick ordinals. Tournament: [recording, ordinal] pairs.
+        self.recordings: list[str] = data.get("recordings") or recordings or [data.get("recording", "")]
+        self.merged = "recordings" in data
+        self.ticks: list[list[list[int]]] = data["ticks"] if self.merged else [data["ticks"]]
+        # Per recording, like ticks; None where the offsets are unknown (version 1)
+        unknown = [None] * len(self.ticks)
+        if self.merged:
+            self.offsets: list[Optional[list[int]]] = data.get("offsets") or unknown
+            self.members: list[Optional[list[list[int]]]] = data.get("members") or unknown
+        else:
+            self.offsets = [data.get("offsets")]
+            self.members = [data.get("members")]
+        self.postings: dict[str, list] = data["postings"]
+
+    @classmethod
+    def load(cls, path: Path) -> "EventIndex":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        # A recording index names its recording, which lives in the same directory
+        recordings = [str(path.with_name(data["recording"]))] if data.get("recording") else None
+        return cls(data, recordings)
+
+    def query(self, event_type: str, actor: str = ANY, target: str = ANY) -> list:
+        """Tick ordinals (or [recording, ordinal] pairs when merged) with a matching event."""
+        return self.postings.get(event_key(event_type, actor, target), [])
+
+    def locate(self, hit: Union[int, list]) -> tuple[str, int, int, int]:
+        """(recording, ordinal, round, turn) of a query result."""
+        recording, ordinal = (hit[0], hit[1]) if self.merged else (0, hit)
+        round_number, turn = self.ticks[recording][ordinal]
+        name = self.recordings[recording] if recording < len(self.recordings) else ""
+        return name, ordinal, round_number, turn
+
+    def event_types(self) -> list[str]:
+        return sorted({key.split("\t", 1)[0] for key in self.postings})
+
+    def seek(self, recording: int, ordinals: Iterable[int]) -> Iterator[tuple[int, dict]]:
+        """Read the given ticks of one of the indexed recordings (0 unless merged)."""
+        return seek_ticks(Path(self.recordings[recording]), ordinals, self.offsets[recording],
+                          self.members[recording])
+
+
+def merge_indexes(recordings: Iterable[Path]) -> dict:
+    """Combine the indexes of several recordings into one tournament index."""
+    merged: dict = {"version": INDEX_VERSION, "recordings": [], "bots": set(), "ticks": [], "offsets": [],
+                    "members": [], "postings": {}}
+    for recording in recordings:
+        path = index_path(recording)
+        if not path.exists():
+            build_index(recording)
+        index = EventIndex.load(path)
+        number = len(merged["recordings"])
+        merged["recordings"].append(str(recording))
+        merged["bots"].update(index.bots)
+        merged["ticks"].append(index.ticks[0])
+        merged["offsets"].append(index.offsets[0])
+        merged["members"].append(index.members[0])
+        for key, ordinals in index.postings.items():
+            merged["postings"].setdefault(key, []).extend([number, ordinal] for ordinal in ordinals)
+    merged["bots"] = sorted(merged["bots"])
+    return merged
+
+
+class MemberReader:
+    """Reads lines at uncompressed offsets of a gzip file made of several members.
+
+    A line is found by seeking to the member it lies in and decompressing
+    from the start of that member. Offsets must be asked for in ascending
+    order; a later offset in the same member continues where the last one
+    ended.
+    """
+
+    def __init__(self, f, members: list[list[int]]) -> None:
+        self.f = f
+        self.members = members or [[0, 0]]
+        self.starts = [uncompressed for _, uncompressed in self.members]
+        self.member = -1
+        self.decompressor = None
+        self.buffer = b""
+        self.buffer_start = 0  # Uncompressed offset of buffer[0]
+
+    def _start_member(self, member: int) -> None:
+        compressed, uncompressed = self.members[member]
+        self.f.seek(compressed)
+        self.member = member
+        self.decompressor = zlib.decompressobj(31)
+        self.buffer = b""
+        self.buffer_start = uncompressed
+
+    def _fill(self) -> bool:
+        """Decompress more data into the buffer; False at the end of the file."""
+        data = b""
+        if self.decompressor.eof:
+            # The next member follows directly; its header starts a new stream
+            data = self.decompressor.unused_data
+            self.decompressor = zlib.decompressobj(31)
+        data = data or self.f.read(READ_CHUNK)
+        if not data:
+            return False
+        self.buffer += self.decompressor.decompress(data)
+        return True
+
+    def line_at(self, offset: int) -> bytes:
+        member = bisect_right(self.starts, offset) - 1
+        if member != self.member or offset < self.buffer_start:
+            self._start_member(member)
+        while True:
+            skip = offset - self.buffer_start
+            if skip >= len(self.buffer):
+                # Not there yet: drop what was decompressed so far instead of keeping it
+                self.buffer_start += len(self.buffer)
+                self.buffer = b""
+            else:
+                end = self.buffer.find(b"\n", skip)
+                if end >= 0:
+                    line = self.buffer[skip:end]
+                    self.buffer = self.buffer[end + 1:]
+                    self.buffer_start += end + 1
+                    return line
+            if not self._fill():
+                if skip < len(self.buffer):
+                    return self.buffer[skip:]
+                raise ValueError(f"Offset {offset} is past the end of the recording")
+
+
+def seek_ticks(recording: Path, ordinals: Iterable[int], offsets: Optional[list[int]] = None,
+               members: Optional[list[list[int]]] = None) -> Iterator[tuple[int, dict]]:
+    """Yield (ordinal, tick) for the requested tick ordinals, in order.
+
+    With the tick offsets (and, for compressed recordings, the gzip members)
+    from the index, only the wanted ticks are read. Without them the
+    recording is read once up to the last wanted tick, and other lines are
+    skipped without decoding them.
+    """
+    wanted = sorted(set(ordinals))
+    if not wanted:
+        return
+    if offsets is None:
+        yield from _scan_ticks(recording, wanted)
+        return
+    with open(recording, "rb") as f:
+        if recording.suffix == ".gz":
+            reader = MemberReader(f, members)
+            for ordinal in wanted:
+                yield ordinal, json.loads(reader.line_at(offsets[ordinal]))
+        else:
+            for ordinal in wanted:
+                f.seek(offsets[ordinal])
+                yield ordinal, json.loads(f.readline())
+
+
+def _scan_ticks(recording: Path, wanted: list[int]) -> Iterator[tuple[int, dict]]:
+    position = 0
+    ordinal = 0
+    with (gzip.open if recording.suffix == ".gz" else open)(recording, "rb") as f:
+        for line in f:
+            # Ticks are recognised without decoding them
+            if TICK_MARKER not in line:
+                continue
+            if ordinal == wanted[position]:
+                yield ordinal, json.loads(line)
+                position += 1
+                if position == len(wanted):
+                    return
+            ordinal += 1
+
+
+def load_any(path: Path) -> EventIndex:
+    """Load an index file, or the index of a recording (building it if missing)."""
+    if path.name.endswith(INDEX_SUFFIX):
+        return EventIndex.load(path)
+    index_file = index_path(path)
+    if not index_file.exists():
+        build_index(path)
+    index = EventIndex.load(index_file)
+    index.recordings = [str(path)]
+    return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inverted index of battle events")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Index recordings that have no index yet")
+    build_parser.add_argument("paths", nargs="+", type=Path, help="Recording files or directories")
+    build_parser.add_argument("--force", action="store_true", help="Rebuild existing indexes")
+
+    merge_parser = subparsers.add_parser("merge", help="Merge recording indexes into a tournament index")
+    merge_parser.add_argument("paths", nargs="+", type=Path, help="Recording files or directories")
+    merge_parser.add_argument("--out", type=Path, required=True, help=f"Output file (*{INDEX_SUFFIX})")
+
+    query_parser = subparsers.add_parser("query", help="Find the ticks with matching events")
+    query_parser.add_argument("index", type=Path, help="Recording, recording index or tournament index")
+    query_parser.add_argument("--type", help="Event type, e.g. BotDeathEvent (omit to list types)")
+    query_parser.add_argument("--actor", default=ANY, help="Bot causing the event (default: any)")
+    query_parser.add_argument("--target", default=ANY, help="Bot affected by the event (default: any)")
+    query_parser.add_argument("--limit", type=int, default=50, help="Results to print (default: 50)")
+    query_parser.add_argument("--show", action="store_true", help="Print the matching events from the recording")
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        started = time.perf_counter()
+        built = 0
+        for recording in iter_recordings(args.paths):
+            if args.force or not index_path(recording).exists():
+                build_index(recording)
+                built += 1
+        print_success(f"Indexed {built} recordings in {time.perf_counter() - started:.1f}s")
+        return
+
+    if args.command == "merge":
+        merged = merge_indexes(iter_recordings(args.paths))
+        write_json_gz(merged, args.out)
+        print_success(f"Merged {len(merged['recordings'])} recordings into {args.out}")
+        return
+
+    index = load_any(args.index)
+    if not args.type:
+        print_step(f"Event types in {args.index}")
+        for event_type in index.event_types():
+            print_info(f"{event_type:<24} {len(index.query(event_type))} ticks")
+        print_info(f"Bots: {', '.join(index.bots)}")
+        return
+
+    started = time.perf_counter()
+    hits = index.query(args.type, args.actor, args.target)
+    elapsed = (time.perf_counter() - started) * 1e6
+    print_step(f"{len(hits)} ticks with {args.type} actor={args.actor} target={args.target} ({elapsed:.1f} µs)")
+    located = [index.locate(hit) for hit in hits[:args.limit or None]]
+
+    if not args.show:
+        for recording, ordinal, round_number, turn in located:
+            where = f"{Path(recording).name}  " if index.merged else ""
+            print_info(f"{where}round {round_number} turn {turn}  (tick #{ordinal})")
+    else:
+        by_recording: dict[int, list[int]] = {}
+        for hit in hits[:len(located)]:
+            number, ordinal = (hit[0], hit[1]) if index.merged else (0, hit)
+            by_recording.setdefault(number, []).append(ordinal)
+        for number, ordinals in by_recording.items():
+            name = Path(index.recordings[number]).name
+            for ordinal, tick in index.seek(number, ordinals):
+                print_info(f"{name}  round {tick.get('roundNumber')} turn {tick.get('turnNumber')}")
+                for event in tick.get("events") or []:
+                    if event.get("type") == args.type:
+                        print(f"      {json.dumps(event)}")
+    if len(hits) > len(located):
+        print_warning(f"Showing {len(located)} of {len(hits)} results; raise --limit for more")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,373 @@
+#!/usr/bin/env python3
+"""
+heatmap_cube.py
+---------------
+Incremental cross-battle heatmaps of positions, firing locations and deaths.
+
+Every grid is a histogram2d-style count grid over the arena, keyed by
+(kind, bot, opponent, arena size). The kinds are:
+
+- position: BotState x/y of the bot on every tick
+- fire:     position of each bullet in the bot's BulletFiredEvents
+- death:    last known position of the bot when its BotDeathEvent arrives
+
+The opponent is the other bot's name in 1v1 battles and "melee" otherwise.
+
+All grids live in one memory-mapped file, so queries only touch the grids
+they need. New battles are added incrementally, and battles already in the
+cube are skipped. Battles are identified by their content (see
+battle_recording.recording_id), so moved or copied recordings are not counted
+twice, and cubes built on different machines share ids. Partial cubes built by parallel workers (or on other
+machines) are combined with `merge`.
+
+Usage:
+    python heatmap_cube.py ingest recordings/ --workers 8
+    python heatmap_cube.py merge other-cube/
+    python heatmap_cube.py query --kind death --bot Walls --arena 800x600
+    python heatmap_cube.py query --kind position --bot Walls --opponent SpinBot --out walls.npy
+    python heatmap_cube.py list
+"""
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable
+
+try:
+    import numpy as np
+except ImportError:
+    print("Error: 'numpy' library is not installed.")
+    print("Please install it by running: pip install numpy")
+    print("Or install all dependencies: pip install -r requirements.txt")
+    sys.exit(1)
+
+from battle_recording import GAME_STARTED, TICK, iter_recordings, read_recording, recording_id
+
+DEFAULT_CUBE_DIR = "heatmaps"
+GRID_BINS = 64
+GRID_DTYPE = np.uint32  # Exact counts; 64x64 cells per grid
+KINDS = ("position", "fire", "death")
+MELEE = "melee"
+WILDCARD = "*"
+
+INDEX_FILENAME = "index.json"
+GRIDS_FILENAME = "grids.u32"
+BATTLES_FILENAME = "battles.txt"
+INITIAL_CAPACITY = 256
+
+# ANSI Color Codes
+class Colors:
+    RESET = "\033[0m"
+    BOLD = "\033[1m"
+    GREEN = "\033[92m"
+    BLUE = "\033[94m"
+    YELLOW = "\033[93m"
+    RED = "\033[91m"
+    CYAN = "\033[96m"
+
+def print_step(message: str) -> None:
+    print(f"{Colors.CYAN}{Colors.BOLD}==> {message}{Colors.RESET}")
+
+def print_success(message: str) -> None:
+    print(f"{Colors.GREEN}{Colors.BOLD}✓ {message}{Colors.RESET}")
+
+def print_warning(message: str) -> None:
+    print(f"{Colors.YELLOW}⚠ {message}{Colors.RESET}")
+
+def print_info(message: str) -> None:
+    print(f"{Colors.BLUE}  {message}{Colors.RESET}")
+
+
+Key = tuple[str, str, str, str]  # (kind, bot, opponent, arena)
+
+
+def key_to_str(key: Key) -> str:
+    return "\t".join(key)
+
+
+def key_from_str(text: str) -> Key:
+    kind, bot, opponent, arena = text.split("\t")
+    return kind, bot, opponent, arena
+
+
+class HeatmapCube:
+    """Count grids keyed by (kind, bot, opponent, arena) in one memory-mapped file."""
+
+    def __init__(self, path: Path, bins: int = GRID_BINS, read_only: bool = False) -> None:
+        self.path = path
+        self.read_only = read_only
+        index_path = path / INDEX_FILENAME
+        if read_only and not index_path.exists():
+            raise FileNotFoundError(f"No heatmap cube in {path}")
+        if not read_only:
+            self.path.mkdir(parents=True, exist_ok=True)
+        if index_path.exists():
+            index = json.loads(index_path.read_text())
+            self.bins = index["bins"]
+            self.capacity = index["capacity"]
+            self.slots: dict[Key, int] = {key_from_str(k): v for k, v in index["slots"].items()}
+        else:
+            self.bins = bins
+            self.capacity = INITIAL_CAPACITY
+            self.slots = {}
+        self.battles = set()
+        battles_path = path / BATTLES_FILENAME
+        if battles_path.exists():
+            self.battles = set(filter(None, battles_path.read_text().splitlines()))
+        self._new_battles: list[str] = []
+        self.grids = self._map(self.capacity)
+
+    def _map(self, capacity: int) -> "np.memmap":
+        grids_path = self.path / GRIDS_FILENAME
+        shape = (capacity, self.bins, self.bins)
+        if self.read_only:
+            return np.memmap(grids_path, dtype=GRID_DTYPE, mode="r", shape=shape)
+        size = capacity * self.bins * self.bins * np.dtype(GRID_DTYPE).itemsize
+        with open(grids_path, "ab") as f:
+            # Growing the file appends zeroed grids; existing grids keep their offsets
+            if f.tell() < size:
+                f.truncate(size)
+        return np.memmap(grids_path, dtype=GRID_DTYPE, mode="r+", shape=shape)
+
+    def _slot(self, key: Key) -> int:
+        slot = self.slots.get(key)
+        if slot is None:
+            slot = len(self.slots)
+            if slot >= self.capacity:
+                self.grids.flush()
+                del self.grids
+                self.capacity *= 2
+                self.grids = self._map(self.capacity)
+            self.slots[key] = slot
+        return slot
+
+    def add(self, key: Key, grid: "np.ndarray") -> None:
+        # Resolve the slot first: growing the cube remaps self.grids
+        slot = self._slot(key)
+        self.grids[slot] += grid.astype(GRID_DTYPE, copy=False)
+
+    def add_battle(self, battle_id: str, grids: dict[Key, "np.ndarray"]) -> bool:
+        """Add the grids of one battle. Returns False if the battle is already in the cube."""
+        if battle_id in self.battles:
+            return False
+        for key, grid in grids.items():
+            self.add(key, grid)
+        self.battles.add(battle_id)
+        self._new_battles.append(battle_id)
+        return True
+
+    def add_aggregate(self, battle_ids: list[str], grids: dict[Key, "np.ndarray"]) -> int:
+        """Add grids already summed over several battles, e.g. by a worker process."""
+        for key, grid in grids.items():
+            self.add(key, grid)
+        new_ids = [b for b in battle_ids if b not in self.battles]
+        self.battles.update(new_ids)
+        self._new_battles.extend(new_ids)
+        return len(new_ids)
+
+    def merge(self, other: "HeatmapCube") -> int:
+        """Add another cube's grids. Partial cubes must cover disjoint sets of battles."""
+        if other.bins != self.bins:
+            raise ValueError(f"Cannot merge {other.bins}x{other.bins} grids into {self.bins}x{self.bins} grids")
+        overlap = self.battles & other.battles
+        if overlap:
+            raise ValueError(f"{len(overlap)} battles are already in this cube; merge partial cubes of disjoint battles")
+        return self.add_aggregate(sorted(other.battles), {key: other.grids[slot] for key, slot in other.slots.items()})
+
+    def matching_slots(self, kind: str, bot: str = WILDCARD, opponent: str = WILDCARD,
+                       arena: str = WILDCARD) -> list[int]:
+        wanted = (kind, bot, opponent, arena)
+        return [slot for key, slot in self.slots.items()
+                if all(w == WILDCARD or w == k for w, k in zip(wanted, key))]
+
+    def query(self, kind: str, bot: str = WILDCARD, opponent: str = WILDCARD, arena: str = WILDCARD) -> "np.ndarray":
+        """Sum of all grids matching the key; '*' matches any value.
+
+        Grids of different arena sizes share bin indices, so summing over arenas
+        gives a normalised map rather than one in arena units.
+        """
+        slots = self.matching_slots(kind, bot, opponent, arena)
+        if not slots:
+            return np.zeros((self.bins, self.bins), dtype=np.uint64)
+        return self.grids[sorted(slots)].sum(axis=0, dtype=np.uint64)
+
+    def flush(self) -> None:
+        self.grids.flush()
+        index = {
+            "bins": self.bins,
+            "capacity": self.capacity,
+            "slots": {key_to_str(k): v for k, v in self.slots.items()},
+        }
+        tmp_path = self.path / (INDEX_FILENAME + ".tmp")
+        tmp_path.write_text(json.dumps(index))
+        tmp_path.replace(self.path / INDEX_FILENAME)
+        if self._new_battles:
+            with open(self.path / BATTLES_FILENAME, "a") as f:
+                f.write("\n".join(self._new_battles) + "\n")
+            self._new_battles = []
+
+
+def battle_grids(path: Path, bins: int = GRID_BINS) -> dict[Key, "np.ndarray"]:
+    """Count grids of one recorded battle."""
+    names: dict[int, str] = {}
+    arena_width = arena_height = None
+    positions: dict[int, list[tuple[float, float]]] = {}
+    fires: dict[int, list[tuple[float, float]]] = {}
+    deaths: dict[int, list[tuple[float, float]]] = {}
+
+    for message in read_recording(path):
+        message_type = message.get("type")
+        if message_type == GAME_STARTED:
+            setup = message.get("gameSetup") or {}
+            arena_width, arena_height = setup.get("arenaWidth", 800), setup.get("arenaHeight", 600)
+            names = {p["id"]: p.get("name", str(p["id"])) for p in message.get("participants", [])}
+        elif message_type == TICK:
+            for bot in message.get("botStates", []):
+                positions.setdefault(bot["id"], []).append((bot["x"], bot["y"]))
+            for event in message.get("events", []):
+                event_type = event.get("type")
+                if event_type == "BulletFiredEvent":
+                    bullet = event.get("bullet") or {}
+                    fires.setdefault(bullet.get("ownerId"), []).append((bullet.get("x"), bullet.get("y")))
+                elif event_type == "BotDeathEvent":
+                    victim = event.get("victimId")
+                    if positions.get(victim):
+                        deaths.setdefault(victim, []).append(positions[victim][-1])
+
+    if arena_width is None:
+        return {}
+    arena = f"{arena_width}x{arena_height}"
+    distinct = sorted(set(names.values()))
+
+    grids: dict[Key, np.ndarray] = {}
+    for kind, samples in (("position", positions), ("fire", fires), ("death", deaths)):
+        for bot_id, points in samples.items():
+            if bot_id not in names or not points:
+                continue
+            name = names[bot_id]
+            others = [n for n in distinct if n != name]
+            opponent = others[0] if len(names) == 2 and len(others) == 1 else MELEE
+            xy = np.asarray(points, dtype=np.float64)
+            grid, _, _ = np.histogram2d(xy[:, 0], xy[:, 1], bins=bins,
+                                        range=[[0, arena_width], [0, arena_height]])
+            key = (kind, name, opponent, arena)
+            grids[key] = grids[key] + grid if key in grids else grid
+    return grids
+
+
+def aggregate_battles(paths: list[Path], bins: int = GRID_BINS) -> tuple[list[str], dict[Key, "np.ndarray"]]:
+    """Partial aggregate of several battles, computed in a worker process."""
+    ids = []
+    totals: dict[Key, np.ndarray] = {}
+    for path in paths:
+        try:
+            grids = battle_grids(path, bins)
+        except (OSError, ValueError, KeyError) as e:
+            print_warning(f"Skipping {path}: {e}")
+            continue
+        ids.append(recording_id(path))
+        for key, grid in grids.items():
+            totals[key] = totals[key] + grid if key in totals else grid
+    return ids, {key: grid.astype(GRID_DTYPE) for key, grid in totals.items()}
+
+
+def chunked(items: list, size: int) -> Iterable[list]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def ingest(cube: HeatmapCube, paths: list[Path], workers: int = 1, chunk_size: int = 64) -> int:
+    """Add new battles to the cube, aggregating chunks of battles in parallel."""
+    seen = set(cube.battles)
+    pending = []
+    for path in iter_recordings(paths):
+        # Copies of one recording in several directories are counted once
+        battle = recording_id(path)
+        if battle not in seen:
+            seen.add(battle)
+            pending.append(path)
+    if not pending:
+        return 0
+    added = 0
+    chunks = list(chunked(pending, chunk_size))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            partials = pool.map(aggregate_battles, chunks, [cube.bins] * len(chunks))
+            for ids, totals in partials:
+                added += cube.add_aggregate(ids, totals)
+    else:
+        for chunk in chunks:
+            added += cube.add_aggregate(*aggregate_battles(chunk, cube.bins))
+    cube.flush()
+    return added
+
+
+def ascii_preview(grid: "np.ndarray", width: int = 64) -> list[str]:
+    """Render a grid as text, y axis pointing up like the arena."""
+    shades = " .:-=+*#%@"
+    step = max(1, grid.shape[0] // width)
+    reduced = grid[::step, ::step].astype(np.float64)
+    peak = reduced.max() or 1.0
+    levels = np.minimum((np.sqrt(reduced / peak) * (len(shades) - 1)).round().astype(int), len(shades) - 1)
+    # Rows are x bins and columns y bins; transpose and flip so y grows upwards
+    return ["".join(shades[v] for v in row) for row in levels.T[::-1]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-battle heatmap cube")
+    parser.add_argument("--cube", type=Path, default=Path(__file__).parent / DEFAULT_CUBE_DIR,
+                        help=f"Cube directory (default: {DEFAULT_CUBE_DIR})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = subparsers.add_parser("ingest", help="Add recorded battles to the cube")
+    ingest_parser.add_argument("paths", nargs="+", type=Path, help="Recording files or directories")
+    ingest_parser.add_argument("--workers", type=int, default=1, help="Parallel worker processes")
+    ingest_parser.add_argument("--bins", type=int, default=GRID_BINS, help="Grid size for a new cube")
+
+    merge_parser = subparsers.add_parser("merge", help="Add partial cubes built elsewhere")
+    merge_parser.add_argument("others", nargs="+", type=Path, help="Cube directories")
+
+    query_parser = subparsers.add_parser("query", help="Sum grids matching a key")
+    query_parser.add_argument("--kind", choices=KINDS, default="position")
+    query_parser.add_argument("--bot", default=WILDCARD)
+    query_parser.add_argument("--opponent", default=WILDCARD, help=f"Opponent name or '{MELEE}'")
+    query_parser.add_argument("--arena", default=WILDCARD, help="Arena size, e.g. 800x600")
+    query_parser.add_argument("--out", type=Path, help="Save the grid as .npy")
+
+    subparsers.add_parser("list", help="List the keys in the cube")
+
+    args = parser.parse_args()
+    cube = HeatmapCube(args.cube, getattr(args, "bins", GRID_BINS))
+
+    if args.command == "ingest":
+        print_step("Adding battles to the heatmap cube...")
+        started = time.perf_counter()
+        added = ingest(cube, args.paths, args.workers)
+        print_success(f"Added {added} battles in {time.perf_counter() - started:.1f}s "
+                      f"({len(cube.battles)} battles, {len(cube.slots)} grids)")
+    elif args.command == "merge":
+        for other_path in args.others:
+            merged = cube.merge(HeatmapCube(other_path, read_only=True))
+            print_success(f"Merged {merged} battles from {other_path}")
+        cube.flush()
+    elif args.command == "query":
+        started = time.perf_counter()
+        grid = cube.query(args.kind, args.bot, args.opponent, args.arena)
+        elapsed = (time.perf_counter() - started) * 1000
+        print_step(f"{args.kind} heatmap: bot={args.bot} opponent={args.opponent} arena={args.arena}")
+        print_info(f"{int(grid.sum())} samples ({elapsed:.1f} ms)")
+        if args.out:
+            np.save(args.out, grid)
+            print_success(f"Saved grid to {args.out}")
+        else:
+            for line in ascii_preview(grid):
+                print(f"  |{line}|")
+    elif args.command == "list":
+        for key in sorted(cube.slots):
+            print_info("  ".join(key))
+
+
+if __name__ == "__main__":
+    main()
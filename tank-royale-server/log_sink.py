@@ -0,0 +1,439 @@
+#!/usr/bin/env python3
+"""
+log_sink.py
+-----------
+Bounded, compressed and seekable log sink for the Tank Royale server.
+
+Runs inside the container in place of `tee /app/logs/server.log`. Server
+output read from stdin is passed through to stdout (so `docker logs` still
+works) and stored as a series of gzip frames. Each frame is a separate gzip
+member, so any frame can be decompressed on its own. Frames are grouped into
+segment files that rotate by size and age, and only the newest segments are
+kept, so the log never grows without bound.
+
+An index file records, for every frame, where it lives and the time range
+it covers. Readers use it to decompress only the frames that overlap the
+requested time window.
+
+Usage:
+    java -jar server.jar 2>&1 | python3 log_sink.py write
+    python3 log_sink.py tail -n 50
+    python3 log_sink.py tail -f
+    python3 log_sink.py read --since 15m
+    python3 log_sink.py read --since "2025-01-01 12:00" --until "2025-01-01 12:05"
+    python3 log_sink.py frames
+"""
+# Runs with the Python 3.8 of the container image
+from __future__ import annotations
+
+import argparse
+import bisect
+import gzip
+import json
+import os
+import re
+import select
+import signal
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator, Optional
+
+DEFAULT_LOG_DIR = "/app/logs/server"
+INDEX_FILENAME = "index.jsonl"
+SEGMENT_PREFIX = "server-"
+SEGMENT_SUFFIX = ".log.gz"
+
+FRAME_BYTES = 256 * 1024         # Uncompressed bytes per frame
+FRAME_SECONDS = 2.0              # Maximum time a line waits before its frame is written
+SEGMENT_BYTES = 8 * 1024 * 1024  # Compressed bytes per segment file
+SEGMENT_SECONDS = 3600.0         # Maximum age of a segment file
+MAX_SEGMENTS = 16                # Older segments are deleted
+
+# Java SimpleFormatter lines start with "[2025-01-01 12:00:00]"
+LINE_TIMESTAMP = re.compile(rb"^\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})")
+RELATIVE_TIME = re.compile(r"^(\d+(?:\.\d+)?)([smhd])$")
+UNIT_SECONDS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+class LogSink:
+    """Writes lines into rotating segment files made of independent gzip frames."""
+
+    def __init__(self, log_dir: Path, frame_bytes: int = FRAME_BYTES, frame_seconds: float = FRAME_SECONDS,
+                 segment_bytes: int = SEGMENT_BYTES, segment_seconds: float = SEGMENT_SECONDS,
+                 max_segments: int = MAX_SEGMENTS, compresslevel: int = 6) -> None:
+        self.log_dir = log_dir
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        self.frame_bytes = frame_bytes
+        self.frame_seconds = frame_seconds
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.max_segments = max_segments
+        self.compresslevel = compresslevel
+
+        self._lines: list[bytes] = []
+        self._buffered = 0
+        self._frame_first: Optional[float] = None
+        self._frame_last: Optional[float] = None
+        self._frame_opened = 0.0
+
+        self._segment = None
+        self._segment_name: Optional[str] = None
+        self._segment_opened = 0.0
+        self._next_segment = self._last_segment_number() + 1
+        self._index = open(self.log_dir / INDEX_FILENAME, "a")
+
+    def _last_segment_number(self) -> int:
+        numbers = [int(p.name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]) for p in self._segment_files()]
+        return max(numbers, default=0)
+
+    def _segment_files(self) -> list[Path]:
+        return sorted(self.log_dir.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}"))
+
+    @property
+    def frame_deadline(self) -> Optional[float]:
+        """Monotonic time by which the buffered lines must be written."""
+        if self._frame_first is None:
+            return None
+        return self._frame_opened + self.frame_seconds
+
+    def add_line(self, line: bytes, now: Optional[float] = None) -> None:
+        now = time.time() if now is None else now
+        if self._frame_first is None:
+            self._frame_first = now
+            self._frame_opened = time.monotonic()
+        self._frame_last = now
+        self._lines.append(line)
+        self._buffered += len(line)
+        if self._buffered >= self.frame_bytes:
+            self.flush_frame()
+
+    def flush_frame(self) -> None:
+        """Compress the buffered lines into one frame and record it in the index."""
+        if not self._lines:
+            return
+        self._rotate_if_needed()
+        payload = gzip.compress(b"".join(self._lines), compresslevel=self.compresslevel)
+        offset = self._segment.tell()
+        self._segment.write(payload)
+        self._segment.flush()
+        entry = {
+            "segment": self._segment_name,
+            "offset": offset,
+            "length": len(payload),
+            "first": round(self._frame_first, 3),
+            "last": round(self._frame_last, 3),
+            "lines": len(self._lines),
+        }
+        # Index entries are written only after their frame is complete
+        self._index.write(json.dumps(entry) + "\n")
+        self._index.flush()
+        self._lines = []
+        self._buffered = 0
+        self._frame_first = self._frame_last = None
+
+    def _rotate_if_needed(self) -> None:
+        if self._segment is not None:
+            too_big = self._segment.tell() >= self.segment_bytes
+            too_old = time.monotonic() - self._segment_opened >= self.segment_seconds
+            if not (too_big or too_old):
+                return
+            self._segment.close()
+        self._segment_name = f"{SEGMENT_PREFIX}{self._next_segment:06d}{SEGMENT_SUFFIX}"
+        self._next_segment += 1
+        self._segment = open(self.log_dir / self._segment_name, "ab")
+        self._segment_opened = time.monotonic()
+        self._enforce_retention()
+
+    def _enforce_retention(self) -> None:
+        segments = self._segment_files()
+        expired = segments[:max(0, len(segments) - self.max_segments)]
+        if not expired:
+            return
+        expired_names = {p.name for p in expired}
+        for path in expired:
+            path.unlink()
+        # Rewrite the index without the frames of deleted segments
+        kept = [e for e in load_index(self.log_dir) if e["segment"] not in expired_names]
+        self._index.close()
+        tmp_path = self.log_dir / (INDEX_FILENAME + ".tmp")
+        with open(tmp_path, "w") as f:
+            for entry in kept:
+                f.write(json.dumps(entry) + "\n")
+        os.replace(tmp_path, self.log_dir / INDEX_FILENAME)
+        self._index = open(self.log_dir / INDEX_FILENAME, "a")
+
+    def close(self) -> None:
+        self.flush_frame()
+        if self._segment is not None:
+            self._segment.close()
+        self._index.close()
+
+
+def run_sink(sink: LogSink, passthrough: bool = True) -> None:
+    """Copy stdin to stdout and into the sink until stdin is closed."""
+    stdin_fd = sys.stdin.fileno()
+    stdout = sys.stdout.buffer
+    partial = b""
+    try:
+        while True:
+            deadline = sink.frame_deadline
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([stdin_fd], [], [], timeout)
+            if not ready:
+                sink.flush_frame()
+                continue
+            data = os.read(stdin_fd, 65536)
+            if not data:
+                break
+            if passthrough:
+                stdout.write(data)
+                stdout.flush()
+            *lines, partial = (partial + data).split(b"\n")
+            now = time.time()
+            for line in lines:
+                sink.add_line(line + b"\n", now)
+            # A steady trickle of output never lets select time out
+            deadline = sink.frame_deadline
+            if deadline is not None and time.monotonic() >= deadline:
+                sink.flush_frame()
+    finally:
+        # Also on SIGTERM or Ctrl+C, so the last frame is not lost
+        if partial:
+            sink.add_line(partial + b"\n")
+        sink.close()
+
+
+# --- Reading ---
+
+def load_index(log_dir: Path) -> list[dict]:
+    """Load all complete index entries, oldest first."""
+    entries = []
+    path = log_dir / INDEX_FILENAME
+    if not path.exists():
+        return entries
+    with open(path) as f:
+        for line in f:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                # A partially written last line
+                break
+    return entries
+
+
+def read_frame(log_dir: Path, entry: dict) -> bytes:
+    """Decompress a single frame without touching any other part of the segment."""
+    with open(log_dir / entry["segment"], "rb") as f:
+        f.seek(entry["offset"])
+        return gzip.decompress(f.read(entry["length"]))
+
+
+class FrameIndex:
+    """The frame index of a log directory, kept in memory for repeated lookups.
+
+    The search keys are built once, and refresh() only reads the entries
+    appended since the last call.
+    """
+
+    def __init__(self, log_dir: Path) -> None:
+        self.log_dir = log_dir
+        self.entries: list[dict] = []
+        self.lasts: list[float] = []
+        self.reloads = 0  # Times retention rewrote the index and it was read again
+        self._offset = 0
+        self._first_line = b""
+        self.refresh()
+
+    def refresh(self) -> int:
+        """Read newly appended entries; returns how many were added."""
+        try:
+            f = open(self.log_dir / INDEX_FILENAME, "rb")
+        except FileNotFoundError:
+            return 0
+        added = 0
+        with f:
+            # Retention rewrites the index without its oldest entries, so the first line changes
+            if self._offset and f.readline() != self._first_line:
+                self.reloads += 1
+                self.entries, self.lasts, self._offset = [], [], 0
+            f.seek(self._offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Still being written
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if not self._offset:
+                    self._first_line = line
+                self.entries.append(entry)
+                self.lasts.append(entry["last"])
+                self._offset += len(line)
+                added += 1
+        return added
+
+    def window(self, since: Optional[float], until: Optional[float]) -> list[dict]:
+        return frames_in_window(self.entries, since, until, self.lasts)
+
+
+def frames_in_window(entries: list[dict], since: Optional[float], until: Optional[float],
+                     lasts: Optional[list[float]] = None) -> list[dict]:
+    """Frames whose time range overlaps [since, until], found by binary search.
+
+    lasts are the entries' "last" times; pass them when looking up repeatedly.
+    """
+    start = 0
+    if since is not None:
+        if lasts is None:
+            lasts = [e["last"] for e in entries]
+        start = bisect.bisect_left(lasts, since)
+    selected = []
+    # Index instead of slicing: a slice would copy every entry after start
+    for position in range(start, len(entries)):
+        entry = entries[position]
+        if until is not None and entry["first"] > until:
+            break
+        selected.append(entry)
+    return selected
+
+
+def line_time(line: bytes) -> Optional[float]:
+    match = LINE_TIMESTAMP.match(line)
+    if not match:
+        return None
+    # The container has no TZ set, so server timestamps are UTC
+    stamp = datetime.strptime(match.group(1).decode(), "%Y-%m-%d %H:%M:%S")
+    return stamp.replace(tzinfo=timezone.utc).timestamp()
+
+
+def read_window(log_dir: Path, since: Optional[float] = None, until: Optional[float] = None,
+                index: Optional[FrameIndex] = None) -> Iterator[bytes]:
+    """Yield the lines logged between since and until (epoch seconds).
+
+    Lines carrying their own timestamp are filtered by it; other lines (stack
+    traces, plain output) inherit the timestamp of the line before them or the
+    arrival time of their frame. Pass a FrameIndex to reuse it across calls.
+    """
+    if index is None:
+        index = FrameIndex(log_dir)
+    for entry in index.window(since, until):
+        current = entry["first"]
+        for line in read_frame(log_dir, entry).splitlines(keepends=True):
+            current = line_time(line) or current
+            if since is not None and current < since:
+                continue
+            if until is not None and current > until:
+                return
+            yield line
+
+
+def tail(log_dir: Path, count: int) -> list[bytes]:
+    """The last count lines, decompressing frames from the newest backwards."""
+    lines: list[bytes] = []
+    for entry in reversed(load_index(log_dir)):
+        lines = read_frame(log_dir, entry).splitlines(keepends=True) + lines
+        if len(lines) >= count:
+            break
+    return lines[-count:] if count else []
+
+
+def follow(log_dir: Path, interval: float = 0.5) -> Iterator[bytes]:
+    """Yield lines from frames written after this call, until interrupted."""
+    index = FrameIndex(log_dir)
+    seen = len(index.entries)
+    while True:
+        reloads = index.reloads
+        index.refresh()
+        if index.reloads != reloads:
+            # Retention rewrote the index; continue from the newest frame
+            seen = max(0, len(index.entries) - 1)
+        for entry in index.entries[seen:]:
+            yield from read_frame(log_dir, entry).splitlines(keepends=True)
+        seen = len(index.entries)
+        time.sleep(interval)
+
+
+def parse_time(value: Optional[str]) -> Optional[float]:
+    """Parse '15m', '2h', epoch seconds or 'YYYY-mm-dd HH:MM[:SS]' (UTC) to epoch seconds."""
+    if not value:
+        return None
+    match = RELATIVE_TIME.match(value)
+    if match:
+        return time.time() - float(match.group(1)) * UNIT_SECONDS[match.group(2)]
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt).replace(tzinfo=timezone.utc).timestamp()
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError(f"Invalid time: {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tank Royale server log sink")
+    parser.add_argument("--dir", type=Path, default=Path(DEFAULT_LOG_DIR), help=f"Log directory (default: {DEFAULT_LOG_DIR})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    write = subparsers.add_parser("write", help="Store stdin as compressed frames")
+    write.add_argument("--frame-kb", type=int, default=FRAME_BYTES // 1024, help="Uncompressed KiB per frame")
+    write.add_argument("--frame-seconds", type=float, default=FRAME_SECONDS, help="Maximum seconds per frame")
+    write.add_argument("--segment-mb", type=int, default=SEGMENT_BYTES // (1024 * 1024), help="Compressed MiB per segment")
+    write.add_argument("--segment-seconds", type=float, default=SEGMENT_SECONDS, help="Maximum age of a segment")
+    write.add_argument("--max-segments", type=int, default=MAX_SEGMENTS, help="Number of segments to keep")
+    write.add_argument("--quiet", action="store_true", help="Do not copy input to stdout")
+
+    read = subparsers.add_parser("read", help="Print the lines logged in a time window")
+    read.add_argument("--since", help="Start: 15m, 2h, epoch seconds or 'YYYY-mm-dd HH:MM[:SS]' (UTC)")
+    read.add_argument("--until", help="End, same formats as --since")
+
+    tail_parser = subparsers.add_parser("tail", help="Print the last lines")
+    tail_parser.add_argument("-n", type=int, default=50, help="Number of lines (default: 50)")
+    tail_parser.add_argument("-f", "--follow", action="store_true", help="Keep printing new lines")
+
+    subparsers.add_parser("frames", help="Summarise the stored frames")
+
+    args = parser.parse_args()
+    out = sys.stdout.buffer
+
+    try:
+        if args.command == "write":
+            # docker stop sends SIGTERM; exit through run_sink's cleanup instead of dying mid-frame
+            signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+            sink = LogSink(args.dir, frame_bytes=args.frame_kb * 1024, frame_seconds=args.frame_seconds,
+                           segment_bytes=args.segment_mb * 1024 * 1024, segment_seconds=args.segment_seconds,
+                           max_segments=args.max_segments)
+            run_sink(sink, passthrough=not args.quiet)
+        elif args.command == "read":
+            for line in read_window(args.dir, parse_time(args.since), parse_time(args.until)):
+                out.write(line)
+        elif args.command == "tail":
+            out.writelines(tail(args.dir, args.n))
+            out.flush()
+            if args.follow:
+                for line in follow(args.dir):
+                    out.write(line)
+                    out.flush()
+        elif args.command == "frames":
+            entries = load_index(args.dir)
+            segments = {e["segment"] for e in entries}
+            compressed = sum(e["length"] for e in entries)
+            print(f"{len(entries)} frames in {len(segments)} segments, {compressed / 1024:.1f} KiB compressed")
+            if entries:
+                first = datetime.fromtimestamp(entries[0]["first"], timezone.utc)
+                last = datetime.fromtimestamp(entries[-1]["last"], timezone.utc)
+                print(f"Covers {first:%Y-%m-%d %H:%M:%S} to {last:%Y-%m-%d %H:%M:%S} UTC")
+    except KeyboardInterrupt:
+        pass
+    except argparse.ArgumentTypeError as e:
+        parser.error(str(e))
+    except BrokenPipeError:
+        pass
+
+
+if __name__ == "__main__":
+    main()
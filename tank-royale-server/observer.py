@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+observer.py
+-----------
+Minimal asyncio observer client for the Tank Royale server.
+
+Connects to the server's WebSocket endpoint, answers the server handshake
+with an ObserverHandshake and yields every message the server sends to
+observers (GameStartedEventForObserver, TickEventForObserver,
+GameEndedEventForObserver, ...). Used by the results store, the recorder and
+the other tools that consume a live battle stream.
+
+Usage:
+    python observer.py                          # Print message types from ws://localhost:7655
+    python observer.py --url ws://host:7655 --secret SECRET
+"""
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import AsyncIterator, Callable, Optional, Union
+
+try:
+    import websockets
+except ImportError:
+    print("Error: 'websockets' library is not installed.")
+    print("Please install it by running: pip install websockets")
+    print("Or install all dependencies: pip install -r requirements.txt")
+    sys.exit(1)
+
+DEFAULT_SERVER_URL = "ws://localhost:7655"
+OBSERVER_NAME = "Tank Royale Python Observer"
+OBSERVER_VERSION = "1.0"
+
+# ANSI Color Codes
+class Colors:
+    RESET = "\033[0m"
+    BOLD = "\033[1m"
+    GREEN = "\033[92m"
+    BLUE = "\033[94m"
+    YELLOW = "\033[93m"
+    RED = "\033[91m"
+    CYAN = "\033[96m"
+
+
+def read_properties(path: Path) -> dict[str, str]:
+    """Read a Java-style .properties file into a dict."""
+    properties = {}
+    if not path.exists():
+        return properties
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line and "=" in line and not line.startswith("#"):
+                key, value = line.split("=", 1)
+                properties[key.strip()] = value.strip()
+    return properties
+
+
+def default_secret(work_dir: Optional[Path] = None) -> Optional[str]:
+    """The first controller secret from server.properties, used for observer connections."""
+    work_dir = work_dir or Path(__file__).parent.resolve()
+    secrets = read_properties(work_dir / "server.properties").get("controller-secrets")
+    return secrets.split(",")[0].strip() if secrets else None
+
+
+def observer_handshake(session_id: str, secret: Optional[str] = None, name: str = OBSERVER_NAME) -> dict:
+    """Build the ObserverHandshake reply to a ServerHandshake."""
+    handshake = {
+        "type": "ObserverHandshake",
+        "sessionId": session_id,
+        "name": name,
+        "version": OBSERVER_VERSION,
+    }
+    if secret:
+        handshake["secret"] = secret
+    return handshake
+
+
+async def observe(url: str = DEFAULT_SERVER_URL, secret: Optional[str] = None,
+                  name: str = OBSERVER_NAME, decode: bool = True,
+                  on_connect: Optional[Callable[[], None]] = None) -> AsyncIterator[Union[dict, str]]:
+    """Connect as an observer and yield every message after the handshake.
+
+    With decode=False the raw JSON text is yielded instead, for consumers that
+    store or forward messages without looking inside them. on_connect is
+    called once the handshake has been answered, which matters for consumers
+    that need to know about an idle but working connection. The websockets
+    keepalive pings close the connection if the server stops answering.
+    """
+    async with websockets.connect(url, max_size=None) as ws:
+        handshake_done = False
+        async for raw in ws:
+            if isinstance(raw, bytes):
+                raw = raw.decode("utf-8")
+            # The server handshake comes first and is the only message that must be decoded here
+            if not handshake_done:
+                message = json.loads(raw)
+                if message.get("type") == "ServerHandshake":
+                    await ws.send(json.dumps(observer_handshake(message["sessionId"], secret, name)))
+                    handshake_done = True
+                    if on_connect:
+                        on_connect()
+                    continue
+            yield json.loads(raw) if decode else raw
+
+
+async def print_messages(url: str, secret: Optional[str]) -> None:
+    async for message in observe(url, secret):
+        message_type = message.get("type", "?")
+        if message_type == "TickEventForObserver":
+            print(f"{Colors.BLUE}  tick round={message.get('roundNumber')} turn={message.get('turnNumber')} "
+                  f"bots={len(message.get('botStates', []))}{Colors.RESET}")
+        else:
+            print(f"{Colors.CYAN}{Colors.BOLD}==> {message_type}{Colors.RESET}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tank Royale observer client")
+    parser.add_argument("--url", default=DEFAULT_SERVER_URL, help=f"Server URL (default: {DEFAULT_SERVER_URL})")
+    parser.add_argument("--secret", help="Controller secret (default: from server.properties)")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(print_messages(args.url, args.secret or default_secret()))
+    except KeyboardInterrupt:
+        print(f"{Colors.BLUE}  Stopped observing{Colors.RESET}")
+    except OSError as e:
+        print(f"{Colors.RED}✗ Could not connect to {args.url}: {e}{Colors.RESET}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+observer_relay.py
+-----------------
+Observer relay with a late-join snapshot cache.
+
+The relay connects to the server as one observer and serves any number of
+observers itself, speaking the same protocol (ServerHandshake, then
+ObserverHandshake from the client). Point the frontend at the relay instead
+of the server.
+
+An observer that joins a game in progress directly at the server only sees
+ticks from that moment on, without the game setup or participants. The relay
+keeps a snapshot of the running game: the GameStartedEventForObserver, the
+latest tick (ticks carry the full bot and bullet state), and the pause state
+and TPS. The snapshot is sent right after a client's handshake, so a late
+joiner sees a correct picture after one round trip instead of at the next
+game.
+
+Messages are forwarded as the server's JSON text. Ticks are recognised
+without decoding them. A client that falls too far behind has its queue
+replaced by a fresh snapshot instead of slowing down the others.
+
+The relay listens on localhost by default, so only local clients such as the
+frontend can connect. With --relay-secret, clients must also send that secret
+in their ObserverHandshake; use it when serving other machines with --host.
+
+Usage:
+    python observer_relay.py                     # Relay ws://localhost:7655 on port 7656
+    python observer_relay.py --upstream ws://host:7655 --port 7656
+    python observer_relay.py --host 0.0.0.0 --relay-secret s3cret
+"""
+import argparse
+import asyncio
+import hmac
+import json
+import sys
+import time
+import uuid
+from typing import Optional
+
+try:
+    import websockets
+except ImportError:
+    print("Error: 'websockets' library is not installed.")
+    print("Please install it by running: pip install websockets")
+    print("Or install all dependencies: pip install -r requirements.txt")
+    sys.exit(1)
+
+from observer import DEFAULT_SERVER_URL, default_secret, observe
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 7656
+RELAY_NAME = "Tank Royale Observer Relay"
+RELAY_VERSION = "1.0"
+CLIENT_QUEUE_SIZE = 512      # Messages a client may fall behind before it is resynchronised
+HANDSHAKE_TIMEOUT = 10.0
+
+TICK = "TickEventForObserver"
+TICK_MARKER = f'"{TICK}"'
+GAME_STARTED = "GameStartedEventForObserver"
+GAME_ENDED = "GameEndedEventForObserver"
+GAME_ABORTED = "GameAbortedEventForObserver"
+GAME_PAUSED = "GamePausedEventForObserver"
+GAME_RESUMED = "GameResumedEventForObserver"
+TPS_CHANGED = "TpsChangedEvent"
+
+# ANSI Color Codes
+class Colors:
+    RESET = "\033[0m"
+    BOLD = "\033[1m"
+    GREEN = "\033[92m"
+    BLUE = "\033[94m"
+    YELLOW = "\033[93m"
+    RED = "\033[91m"
+    CYAN = "\033[96m"
+
+def print_step(message: str) -> None:
+    print(f"{Colors.CYAN}{Colors.BOLD}==> {message}{Colors.RESET}")
+
+def print_success(message: str) -> None:
+    print(f"{Colors.GREEN}{Colors.BOLD}✓ {message}{Colors.RESET}")
+
+def print_warning(message: str) -> None:
+    print(f"{Colors.YELLOW}⚠ {message}{Colors.RESET}")
+
+def print_info(message: str) -> None:
+    print(f"{Colors.BLUE}  {message}{Colors.RESET}")
+
+
+class GameSnapshot:
+    """What a late joiner needs to render the running game: setup, latest tick and modes."""
+
+    def __init__(self) -> None:
+        self.started: Optional[str] = None
+        self.latest_tick: Optional[str] = None
+        self.paused: Optional[str] = None
+        self.tps: Optional[str] = None
+
+    def update(self, raw: str, message_type: Optional[str]) -> None:
+        if message_type == TICK:
+            self.latest_tick = raw
+        elif message_type == GAME_STARTED:
+            self.started, self.latest_tick, self.paused = raw, None, None
+        elif message_type in (GAME_ENDED, GAME_ABORTED):
+            self.started = self.latest_tick = self.paused = None
+        elif message_type == GAME_PAUSED:
+            self.paused = raw
+        elif message_type == GAME_RESUMED:
+            self.paused = None
+        elif message_type == TPS_CHANGED:
+            self.tps = raw
+
+    def messages(self) -> list[str]:
+        """The snapshot as the messages a client would have seen, in order."""
+        if not self.started:
+            return [self.tps] if self.tps else []
+        return [m for m in (self.started, self.tps, self.latest_tick, self.paused) if m]
+
+
+class RelayClient:
+    def __init__(self, ws, name: str) -> None:
+        self.ws = ws
+        self.name = name
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        self.resyncs = 0
+
+
+class ObserverRelay:
+    """Follows one server as an observer and fans its messages out to clients."""
+
+    def __init__(self, upstream: str, secret: Optional[str], client_secret: Optional[str] = None) -> None:
+        self.upstream = upstream
+        self.secret = secret
+        # Opt-in: the frontend sends no secret in its handshake
+        self.client_secret = client_secret
+        self.snapshot = GameSnapshot()
+        self.clients: set[RelayClient] = set()
+        self.forwarded = 0
+
+    # --- Upstream ---
+
+    async def follow_upstream(self) -> None:
+        """Observe the server, reconnecting as needed."""
+        while True:
+            try:
+                async for raw in observe(self.upstream, self.secret, name=RELAY_NAME, decode=False,
+                                         on_connect=lambda: print_success(f"Observing {self.upstream}")):
+                    self.publish(raw)
+            except Exception as e:  # OSError, bad JSON and the websockets ConnectionClosed hierarchy
+                print_warning(f"Upstream connection lost: {type(e).__name__}: {e}")
+            # The server does not resend the game setup to a reconnecting
+            # observer, so the snapshot is kept until the game is seen to end
+            await asyncio.sleep(1.0)
+
+    def publish(self, raw: str) -> None:
+        """Update the snapshot and queue the message for every client, without awaiting."""
+        if TICK_MARKER in raw:
+            message_type = TICK
+        else:
+            message_type = json.loads(raw).get("type")
+            if message_type == GAME_STARTED:
+                print_step("Game started")
+            elif message_type in (GAME_ENDED, GAME_ABORTED):
+                print_info(f"Game {'aborted' if message_type == GAME_ABORTED else 'ended'}")
+        self.snapshot.update(raw, message_type)
+        self.forwarded += 1
+
+        for client in self.clients:
+            try:
+                client.queue.put_nowait(raw)
+            except asyncio.QueueFull:
+                self.resync(client)
+
+    def resync(self, client: RelayClient) -> None:
+        """Replace a lagging client's backlog with the current snapshot."""
+        while not client.queue.empty():
+            client.queue.get_nowait()
+        for message in self.snapshot.messages():
+            client.queue.put_nowait(message)
+        client.resyncs += 1
+        if client.resyncs == 1 or client.resyncs % 100 == 0:
+            print_warning(f"{client.name} fell behind; resynchronised from snapshot ({client.resyncs}x)")
+
+    # --- Clients ---
+
+    async def handle_client(self, ws) -> None:
+        session_id = str(uuid.uuid4())
+        await ws.send(json.dumps({
+            "type": "ServerHandshake",
+            "sessionId": session_id,
+            "name": RELAY_NAME,
+            "variant": "Tank Royale",
+            "version": RELAY_VERSION,
+            "gameTypes": [],
+        }))
+        try:
+            raw = await asyncio.wait_for(ws.recv(), HANDSHAKE_TIMEOUT)
+            handshake = json.loads(raw)
+        except (asyncio.TimeoutError, ValueError):
+            await ws.close(1008, "Expected ObserverHandshake")
+            return
+        # Older frontend builds sent the handshake without a type
+        if not isinstance(handshake, dict) or handshake.get("type", "ObserverHandshake") != "ObserverHandshake":
+            await ws.close(1008, "Expected ObserverHandshake")
+            return
+        if self.client_secret and not hmac.compare_digest(str(handshake.get("secret") or ""), self.client_secret):
+            print_warning(f"Rejected {handshake.get('name') or session_id}: wrong secret")
+            await ws.close(1008, "Wrong secret")
+            return
+
+        client = RelayClient(ws, handshake.get("name") or session_id)
+        joined = time.perf_counter()
+        # Queue the snapshot and register in one step, so no message is missed or sent twice
+        snapshot = self.snapshot.messages()
+        for message in snapshot:
+            client.queue.put_nowait(message)
+        self.clients.add(client)
+        print_info(f"{client.name} joined ({len(self.clients)} clients); snapshot of {len(snapshot)} messages")
+
+        sender = asyncio.create_task(self.send_loop(client, len(snapshot), joined))
+        try:
+            # Observers have nothing to say after the handshake; reading detects the close
+            async for _ in ws:
+                pass
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            self.clients.discard(client)
+            sender.cancel()
+            print_info(f"{client.name} left ({len(self.clients)} clients)")
+
+    async def send_loop(self, client: RelayClient, snapshot_size: int, joined: float) -> None:
+        sent = 0
+        try:
+            while True:
+                await client.ws.send(await client.queue.get())
+                sent += 1
+                if sent == snapshot_size:
+                    print_info(f"{client.name} has the current state after "
+                               f"{(time.perf_counter() - joined) * 1000:.1f} ms")
+        except websockets.ConnectionClosed:
+            pass
+
+    async def run(self, host: str, port: int) -> None:
+        async with websockets.serve(self.handle_client, host, port, max_size=None):
+            print_success(f"Relay listening on ws://{host}:{port}")
+            await self.follow_upstream()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tank Royale observer relay with late-join snapshots")
+    parser.add_argument("--upstream", default=DEFAULT_SERVER_URL, help=f"Server URL (default: {DEFAULT_SERVER_URL})")
+    parser.add_argument("--secret", help="Controller secret for the server (default: from server.properties)")
+    parser.add_argument("--relay-secret", help="Secret clients must send (default: none)")
+    parser.add_argument("--host", default=DEFAULT_HOST, help=f"Address to listen on (default: {DEFAULT_HOST})")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help=f"Port to listen on (default: {DEFAULT_PORT})")
+    args = parser.parse_args()
+
+    relay = ObserverRelay(args.upstream, args.secret or default_secret(), args.relay_secret)
+    try:
+        asyncio.run(relay.run(args.host, args.port))
+    except KeyboardInterrupt:
+        print_info(f"Relay stopped after forwarding {relay.forwarded} messages")
+    except OSError as e:
+        print(f"{Colors.RED}✗ Could not listen on port {args.port}: {e}{Colors.RESET}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+"""
+results_store.py
+----------------
+Persistent battle results with incrementally updated Elo ratings.
+
+Results from GameEndedEventForObserver messages are stored in a local SQLite
+database, taken either from a live observer connection or from battle
+recordings. Every stored result updates the ratings of the bots involved,
+both per bot name and per bot version, so ratings never need to be
+recomputed from the full history. Head-to-head counters are kept the same
+way. Leaderboard, head-to-head and bot history queries are single index
+lookups and stay fast regardless of how many matches are stored.
+
+Melee results are rated as pairwise games between all participants, ordered
+by rank, with the K-factor divided by the number of opponents.
+
+A game is identified by its results and its last tick, which a live observer
+and a recording both see even when the observer joined mid-game, so a game
+is stored only once.
+
+Usage:
+    python results_store.py ingest recordings/          # Import results from recordings
+    python results_store.py watch                       # Store results from the local server
+    python results_store.py leaderboard --limit 20
+    python results_store.py leaderboard --versions
+    python results_store.py h2h "Walls" "SpinBot"
+    python results_store.py history "Walls" --limit 10
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import sqlite3
+import sys
+import time
+from itertools import combinations
+from pathlib import Path
+from typing import Iterable, Optional
+
+from battle_recording import GAME_ENDED, GAME_STARTED, TICK, iter_recordings, read_recording
+
+DEFAULT_DB_FILENAME = "results.db"
+INITIAL_RATING = 1500.0
+TICK_MARKER = f'"{TICK}"'
+K_FACTOR = 32.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS bots (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    version TEXT NOT NULL,
+    UNIQUE (name, version)
+);
+
+CREATE TABLE IF NOT EXISTS matches (
+    id INTEGER PRIMARY KEY,
+    match_key TEXT NOT NULL UNIQUE,
+    source TEXT,
+    game_type TEXT,
+    number_of_rounds INTEGER,
+    participants INTEGER,
+    stored_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS results (
+    match_id INTEGER NOT NULL REFERENCES matches(id),
+    participant_id INTEGER NOT NULL,
+    bot_id INTEGER NOT NULL REFERENCES bots(id),
+    name TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    total_score REAL,
+    survival REAL,
+    bullet_damage REAL,
+    ram_damage REAL,
+    first_places INTEGER,
+    rating_after REAL,
+    PRIMARY KEY (match_id, participant_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS results_by_name ON results (name, match_id DESC);
+CREATE INDEX IF NOT EXISTS results_by_bot ON results (bot_id, match_id DESC);
+
+CREATE TABLE IF NOT EXISTS bot_ratings (
+    name TEXT PRIMARY KEY,
+    rating REAL NOT NULL,
+    games INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    last_match_id INTEGER
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS bot_ratings_by_rating ON bot_ratings (rating DESC);
+
+CREATE TABLE IF NOT EXISTS version_ratings (
+    bot_id INTEGER PRIMARY KEY REFERENCES bots(id),
+    rating REAL NOT NULL,
+    games INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    last_match_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS version_ratings_by_rating ON version_ratings (rating DESC);
+
+CREATE TABLE IF NOT EXISTS head_to_head (
+    bot TEXT NOT NULL,
+    opponent TEXT NOT NULL,
+    wins INTEGER NOT NULL DEFAULT 0,
+    losses INTEGER NOT NULL DEFAULT 0,
+    draws INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (bot, opponent)
+) WITHOUT ROWID;
+"""
+
+# ANSI Color Codes
+class Colors:
+    RESET = "\033[0m"
+    BOLD = "\033[1m"
+    GREEN = "\033[92m"
+    BLUE = "\033[94m"
+    YELLOW = "\033[93m"
+    RED = "\033[91m"
+    CYAN = "\033[96m"
+
+def print_step(message: str) -> None:
+    print(f"{Colors.CYAN}{Colors.BOLD}==> {message}{Colors.RESET}")
+
+def print_success(message: str) -> None:
+    print(f"{Colors.GREEN}{Colors.BOLD}✓ {message}{Colors.RESET}")
+
+def print_warning(message: str) -> None:
+    print(f"{Colors.YELLOW}⚠ {message}{Colors.RESET}")
+
+def print_error(message: str) -> None:
+    print(f"{Colors.RED}✗ {message}{Colors.RESET}")
+
+def print_info(message: str) -> None:
+    print(f"{Colors.BLUE}  {message}{Colors.RESET}")
+
+
+def expected_score(rating: float, opponent_rating: float) -> float:
+    return 1.0 / (1.0 + 10 ** ((opponent_rating - rating) / 400.0))
+
+
+def elo_deltas(ratings: list[float], ranks: list[int], k: float = K_FACTOR) -> list[float]:
+    """Rating change for each participant, rating the game as pairwise results by rank."""
+    deltas = [0.0] * len(ratings)
+    opponents = len(ratings) - 1
+    if opponents < 1:
+        return deltas
+    k_pair = k / opponents
+    for i, j in combinations(range(len(ratings)), 2):
+        if ranks[i] < ranks[j]:
+            score = 1.0
+        elif ranks[i] > ranks[j]:
+            score = 0.0
+        else:
+            score = 0.5
+        change = k_pair * (score - expected_score(ratings[i], ratings[j]))
+        deltas[i] += change
+        deltas[j] -= change
+    return deltas
+
+
+def match_key(results: list[dict], last_tick: Optional[dict] = None) -> str:
+    """Identify a game by its results and the final bot states of its last tick.
+
+    Both are taken from the end of the game, so a game joined live midway and
+    the same game read from its recording get the same key. Session ids are
+    left out: bots can keep them across games. The last tick tells apart games
+    that happen to end with identical results.
+    """
+    final = None
+    if last_tick:
+        bots = sorted(last_tick.get("botStates") or [], key=lambda b: b.get("id", 0))
+        final = [last_tick.get("roundNumber"), last_tick.get("turnNumber"),
+                 [[b.get("id"), b.get("x"), b.get("y"), b.get("energy")] for b in bots]]
+    payload = json.dumps([sorted(results, key=lambda r: r.get("id", 0)), final], sort_keys=True)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class ResultsStore:
+    """SQLite-backed store of battle results and ratings."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.db = sqlite3.connect(str(path))
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self._bot_ids: dict[tuple[str, str], int] = {}
+
+    def close(self) -> None:
+        self.db.commit()
+        self.db.close()
+
+    def __enter__(self) -> "ResultsStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _bot_id(self, name: str, version: str) -> int:
+        key = (name, version)
+        if key not in self._bot_ids:
+            self.db.execute("INSERT OR IGNORE INTO bots (name, version) VALUES (?, ?)", key)
+            row = self.db.execute("SELECT id FROM bots WHERE name = ? AND version = ?", key).fetchone()
+            self._bot_ids[key] = row[0]
+        return self._bot_ids[key]
+
+    def _ratings(self, table: str, column: str, keys: list) -> dict:
+        found = {}
+        for key in set(keys):
+            row = self.db.execute(f"SELECT rating FROM {table} WHERE {column} = ?", (key,)).fetchone()
+            found[key] = row[0] if row else INITIAL_RATING
+        return found
+
+    def add_result(self, game_ended: dict, game_started: Optional[dict] = None,
+                   source: Optional[str] = None, last_tick: Optional[dict] = None) -> bool:
+        """Store one GameEndedEventForObserver and update ratings incrementally.
+
+        last_tick is the game's last TickEventForObserver, used to identify the
+        game. Returns False if the game was already stored. The caller decides
+        when to commit, so bulk imports can batch many games per transaction.
+        """
+        results = [r for r in game_ended.get("results", []) if isinstance(r, dict)]
+        if len(results) < 2:
+            return False
+        game_setup = (game_started or {}).get("gameSetup") or {}
+
+        cursor = self.db.execute(
+            "INSERT OR IGNORE INTO matches (match_key, source, game_type, number_of_rounds, participants, stored_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (match_key(results, last_tick), source, game_setup.get("gameType"),
+             game_ended.get("numberOfRounds"), len(results), time.time()),
+        )
+        if cursor.rowcount == 0:
+            return False
+        match_id = cursor.lastrowid
+
+        names = [r.get("name", "?") for r in results]
+        bot_ids = [self._bot_id(r.get("name", "?"), str(r.get("version", ""))) for r in results]
+        ranks = [int(r.get("rank", 0)) for r in results]
+
+        name_ratings = self._ratings("bot_ratings", "name", names)
+        version_ratings = self._ratings("version_ratings", "bot_id", bot_ids)
+        name_deltas = self._unique_deltas(names, name_ratings, ranks)
+        version_deltas = self._unique_deltas(bot_ids, version_ratings, ranks)
+        best_rank = min(ranks)
+
+        for name, delta in name_deltas.items():
+            won = int(any(n == name and rk == best_rank for n, rk in zip(names, ranks)))
+            self.db.execute(
+                "INSERT INTO bot_ratings (name, rating, games, wins, last_match_id) VALUES (?, ?, 1, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET rating = excluded.rating, games = games + 1, "
+                "wins = wins + excluded.wins, last_match_id = excluded.last_match_id",
+                (name, name_ratings[name] + delta, won, match_id),
+            )
+        for bot_id, delta in version_deltas.items():
+            won = int(any(b == bot_id and rk == best_rank for b, rk in zip(bot_ids, ranks)))
+            self.db.execute(
+                "INSERT INTO version_ratings (bot_id, rating, games, wins, last_match_id) VALUES (?, ?, 1, ?, ?) "
+                "ON CONFLICT(bot_id) DO UPDATE SET rating = excluded.rating, games = games + 1, "
+                "wins = wins + excluded.wins, last_match_id = excluded.last_match_id",
+                (bot_id, version_ratings[bot_id] + delta, won, match_id),
+            )
+
+        self.db.executemany(
+            "INSERT INTO results (match_id, participant_id, bot_id, name, rank, total_score, survival, "
+            "bullet_damage, ram_damage, first_places, rating_after) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (match_id, r.get("id", index), bot_id, name, rank, r.get("totalScore"), r.get("survival"),
+                 r.get("bulletDamage"), r.get("ramDamage"), r.get("firstPlaces"),
+                 name_ratings[name] + name_deltas[name])
+                for index, (r, bot_id, name, rank) in enumerate(zip(results, bot_ids, names, ranks))
+            ],
+        )
+
+        pairs = {}
+        for (name_a, rank_a), (name_b, rank_b) in combinations(zip(names, ranks), 2):
+            if name_a == name_b:
+                continue
+            outcome = "draws" if rank_a == rank_b else ("wins" if rank_a < rank_b else "losses")
+            reverse = {"wins": "losses", "losses": "wins", "draws": "draws"}[outcome]
+            pairs[(name_a, name_b)] = outcome
+            pairs[(name_b, name_a)] = reverse
+        for (bot, opponent), outcome in pairs.items():
+            self.db.execute(
+                f"INSERT INTO head_to_head (bot, opponent, {outcome}) VALUES (?, ?, 1) "
+                f"ON CONFLICT(bot, opponent) DO UPDATE SET {outcome} = {outcome} + 1",
+                (bot, opponent),
+            )
+        return True
+
+    @staticmethod
+    def _unique_deltas(keys: list, ratings: dict, ranks: list[int]) -> dict:
+        """Rating deltas per distinct key; several instances of one bot share their rating."""
+        deltas = elo_deltas([ratings[k] for k in keys], ranks)
+        combined: dict = {}
+        counts: dict = {}
+        for key, delta in zip(keys, deltas):
+            combined[key] = combined.get(key, 0.0) + delta
+            counts[key] = counts.get(key, 0) + 1
+        return {key: combined[key] / counts[key] for key in combined}
+
+    def commit(self) -> None:
+        self.db.commit()
+
+    # --- Queries ---
+
+    def leaderboard(self, limit: int = 20, versions: bool = False) -> list[tuple]:
+        if versions:
+            return self.db.execute(
+                "SELECT b.name, b.version, v.rating, v.games, v.wins FROM version_ratings v "
+                "JOIN bots b ON b.id = v.bot_id ORDER BY v.rating DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return self.db.execute(
+            "SELECT name, rating, games, wins FROM bot_ratings ORDER BY rating DESC LIMIT ?", (limit,)
+        ).fetchall()
+
+    def head_to_head(self, bot: str, opponent: str) -> tuple[int, int, int]:
+        row = self.db.execute(
+            "SELECT wins, losses, draws FROM head_to_head WHERE bot = ? AND opponent = ?", (bot, opponent)
+        ).fetchone()
+        return row if row else (0, 0, 0)
+
+    def history(self, bot: str, limit: int = 20) -> list[tuple]:
+        return self.db.execute(
+            "SELECT r.match_id, b.version, r.rank, m.participants, r.total_score, r.rating_after "
+            "FROM results r JOIN bots b ON b.id = r.bot_id JOIN matches m ON m.id = r.match_id "
+            "WHERE r.name = ? ORDER BY r.match_id DESC LIMIT ?", (bot, limit)
+        ).fetchall()
+
+
+def results_from_recording(path: Path) -> Iterable[tuple[dict, Optional[dict], Optional[dict]]]:
+    """Yield (GameEnded, GameStarted, last tick) from a recording."""
+    game_started = last_tick = None
+    for message in read_recording(path):
+        message_type = message.get("type")
+        if message_type == TICK:
+            last_tick = message
+        elif message_type == GAME_STARTED:
+            game_started, last_tick = message, None
+        elif message_type == GAME_ENDED:
+            yield message, game_started, last_tick
+
+
+def ingest_recordings(store: ResultsStore, paths: list[Path], batch_size: int = 500) -> None:
+    print_step("Importing results from recordings...")
+    added = skipped = 0
+    for path in iter_recordings(paths):
+        try:
+            for game_ended, game_started, last_tick in results_from_recording(path):
+                if store.add_result(game_ended, game_started, source=str(path), last_tick=last_tick):
+                    added += 1
+                    if added % batch_size == 0:
+                        store.commit()
+                else:
+                    skipped += 1
+        except (OSError, ValueError) as e:
+            print_warning(f"Skipping {path}: {e}")
+    store.commit()
+    print_success(f"Stored {added} new results ({skipped} already known)")
+
+
+async def watch_server(store: ResultsStore, url: str, secret: Optional[str]) -> None:
+    from observer import observe
+
+    print_step(f"Storing results from {url} (Ctrl+C to stop)...")
+    game_started = None
+    last_tick: Optional[str] = None
+    async for raw in observe(url, secret, name="Tank Royale Results Store", decode=False):
+        # Only the last tick of a game is needed, so ticks are kept as text and not decoded
+        if TICK_MARKER in raw:
+            last_tick = raw
+            continue
+        message = json.loads(raw)
+        message_type = message.get("type")
+        if message_type == GAME_STARTED:
+            game_started, last_tick = message, None
+        elif message_type == GAME_ENDED:
+            tick = json.loads(last_tick) if last_tick else None
+            if store.add_result(message, game_started, source=url, last_tick=tick):
+                store.commit()
+                winner = min(message.get("results", []), key=lambda r: r.get("rank", 0), default={})
+                print_success(f"Stored game won by {winner.get('name', '?')}")
+            game_started = last_tick = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tank Royale results store and ratings")
+    parser.add_argument("--db", type=Path, default=Path(__file__).parent / DEFAULT_DB_FILENAME,
+                        help=f"SQLite database (default: {DEFAULT_DB_FILENAME})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ingest = subparsers.add_parser("ingest", help="Import results from recordings")
+    ingest.add_argument("paths", nargs="+", type=Path, help="Recording files or directories")
+
+    watch = subparsers.add_parser("watch", help="Store results from a running server")
+    watch.add_argument("--url", default="ws://localhost:7655", help="Server URL")
+    watch.add_argument("--secret", help="Controller secret (default: from server.properties)")
+
+    leaderboard = subparsers.add_parser("leaderboard", help="Show the highest rated bots")
+    leaderboard.add_argument("--limit", type=int, default=20)
+    leaderboard.add_argument("--versions", action="store_true", help="Rate each bot version separately")
+
+    h2h = subparsers.add_parser("h2h", help="Head-to-head record of two bots")
+    h2h.add_argument("bot")
+    h2h.add_argument("opponent")
+
+    history = subparsers.add_parser("history", help="Recent results of a bot")
+    history.add_argument("bot")
+    history.add_argument("--limit", type=int, default=20)
+
+    args = parser.parse_args()
+
+    with ResultsStore(args.db) as store:
+        if args.command == "ingest":
+            ingest_recordings(store, args.paths)
+        elif args.command == "watch":
+            from observer import default_secret
+            try:
+                asyncio.run(watch_server(store, args.url, args.secret or default_secret()))
+            except KeyboardInterrupt:
+                print_info("Stopped watching")
+            except OSError as e:
+                print_error(f"Could not connect to {args.url}: {e}")
+                sys.exit(1)
+        else:
+            started = time.perf_counter()
+            if args.command == "leaderboard":
+                rows = store.leaderboard(args.limit, args.versions)
+                print_step("🏆 Leaderboard" + (" (per version)" if args.versions else ""))
+                for position, row in enumerate(rows, 1):
+                    *label, rating, games, wins = row
+                    print_info(f"{position:>3}. {' '.join(label):<32} {rating:7.1f}  {games:>6} games  {wins:>6} wins")
+            elif args.command == "h2h":
+                wins, losses, draws = store.head_to_head(args.bot, args.opponent)
+                print_step(f"⚔️  {args.bot} vs {args.opponent}")
+                print_info(f"Wins: {wins}  Losses: {losses}  Draws: {draws}")
+            elif args.command == "history":
+                print_step(f"📜 Recent results of {args.bot}")
+                for match_id, version, rank, participants, score, rating in store.history(args.bot, args.limit):
+                    print_info(f"match {match_id:>8}  v{version:<8} rank {rank}/{participants}  "
+                               f"score {score or 0:8.1f}  rating {rating:7.1f}")
+            print_info(f"({(time.perf_counter() - started) * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
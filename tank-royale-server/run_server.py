@@ -10,15 +10,36 @@ It performs the following steps:
 3.  Builds a Docker image using the provided Dockerfile.
 4.  Runs the Docker container to start the server on port 7654.
 
+With --headless the standalone server JAR is used instead of the GUI JAR and
+the slim image from docker/Dockerfile.headless is built. That image has no
+Xvfb or X11 packages and starts the JVM directly.
+
+With --reuse a running container is kept when it already runs the current
+image and config. When only the .properties files changed it is replaced by a
+standby started with the new files, or restarted if there are no standbys.
+--standby N keeps N running standby containers ready to replace it; the
+server port is then published by a small proxy container instead.
+--supervise keeps running afterwards and restarts the server when it stalls
+or dies (see supervisor.py).
+
+Every run records a startup trace (see startup_trace.py) in traces/.
+
 Usage:
     python run_tank_royale_server.py
+    python run_tank_royale_server.py --headless
 """
+import argparse
+import hashlib
 import os
 import platform
+import shutil
 import subprocess
 import sys
 import time
 from pathlib import Path
+from typing import Optional
+
+from startup_trace import StartupTrace, load_history, print_summary
 
 try:
     import requests
@@ -31,9 +52,22 @@ except ImportError:
 # --- Configuration ---
 API_URL = "https://api.github.com/repos/robocode-dev/tank-royale/releases/latest"
 JAR_FILENAME = "robocode-tankroyale-gui.jar"  # Will be renamed after download
+SERVER_JAR_FILENAME = "robocode-tankroyale-server.jar"  # Standalone server JAR (headless mode)
 DOCKER_IMAGE_NAME = "tank-royale-server"
+HEADLESS_IMAGE_NAME = "tank-royale-server-headless"
 DOCKERFILE_DIR = "docker"
+LOG_SINK_SCRIPT = "log_sink.py"  # Copied into the image next to the JAR
+STANDBY_PREFIX = f"{DOCKER_IMAGE_NAME}-standby-"
+STANDBY_NETWORK = f"{DOCKER_IMAGE_NAME}-net"
+ACTIVE_ALIAS = f"{DOCKER_IMAGE_NAME}-active"  # Network alias of the container serving clients
+PROXY_CONTAINER = f"{DOCKER_IMAGE_NAME}-proxy"
+PROXY_IMAGE = "alpine/socat"
+CONFIG_HASH_LABEL = "tank-royale.config-hash"
+PROXIED_LABEL = "tank-royale.proxied"
+APPLIED_CONFIG_FILE = "/app/.config-hash"
+HEADLESS_DOCKERFILE = "Dockerfile.headless"
 SERVER_PORT = 7655  # Using different port to avoid conflict
+SERVER_READY_TIMEOUT = 60  # Seconds to wait for the server to answer after start
 
 # --- ANSI Color Codes ---
 class Colors:
@@ -75,24 +109,28 @@ def run_command(cmd: list[str], cwd: Path, check: bool = True) -> subprocess.Com
         print_error(f"Command not found: {cmd[0]}. Is Docker installed and in your PATH?")
         raise
 
-def get_latest_release_url() -> tuple[str, str]:
-    """Fetches the download URL for the latest server JAR from GitHub."""
+def get_latest_release_url(headless: bool = False) -> tuple[str, str]:
+    """Fetches the download URL for the latest server JAR from GitHub.
+
+    By default the GUI JAR (which contains the server) is selected. In headless
+    mode the standalone server JAR is selected instead.
+    """
     print_step("Finding latest Tank Royale server release...")
+    prefix, label = ("robocode-tankroyale-server-", "Server") if headless else ("robocode-tankroyale-gui-", "GUI")
     try:
         response = requests.get(API_URL)
         response.raise_for_status()  # Raise an exception for bad status codes
         release_data = response.json()
 
-        # Look for the GUI JAR file which contains the server
         for asset in release_data.get("assets", []):
             asset_name = asset["name"]
-            if asset_name.startswith("robocode-tankroyale-gui-") and asset_name.endswith(".jar"):
+            if asset_name.startswith(prefix) and asset_name.endswith(".jar"):
                 url = asset["browser_download_url"]
                 print_success(f"Found latest release: {release_data['tag_name']}")
-                print_info(f"GUI JAR file: {asset_name}")
+                print_info(f"{label} JAR file: {asset_name}")
                 return url, asset_name
 
-        raise ValueError("No Tank Royale GUI JAR file found in the latest release.")
+        raise ValueError(f"No Tank Royale {label} JAR file found in the latest release.")
 
     except requests.exceptions.RequestException as e:
         print_error(f"Failed to fetch release information from GitHub: {e}")
@@ -138,75 +176,310 @@ def download_server_jar(url: str, dest: Path, original_filename: str) -> None:
             os.remove(dest)  # Clean up partial download
         raise
 
-def build_docker_image(work_dir: Path) -> None:
+def build_docker_image(work_dir: Path, headless: bool = False) -> None:
     """Builds the Docker image for the server."""
-    print_step(f"Building Docker image: {DOCKER_IMAGE_NAME}...")
+    image_name = HEADLESS_IMAGE_NAME if headless else DOCKER_IMAGE_NAME
+    jar_filename = SERVER_JAR_FILENAME if headless else JAR_FILENAME
+    print_step(f"Building Docker image: {image_name}...")
     try:
         dockerfile_path = work_dir / DOCKERFILE_DIR
-        jar_source = work_dir / JAR_FILENAME
-        jar_dest = dockerfile_path / JAR_FILENAME
+        jar_source = work_dir / jar_filename
+        jar_dest = dockerfile_path / jar_filename
         
         # Copy the JAR file into the docker directory for build context
         if jar_source.exists():
-            import shutil
             shutil.copy2(jar_source, jar_dest)
             print_info(f"Copied JAR file to Docker build context: {jar_dest}")
         else:
             raise FileNotFoundError(f"JAR file not found: {jar_source}")
+        shutil.copy2(work_dir / LOG_SINK_SCRIPT, dockerfile_path / LOG_SINK_SCRIPT)
             
-        run_command(["docker", "build", "-t", DOCKER_IMAGE_NAME, "."], cwd=dockerfile_path)
+        cmd = ["docker", "build", "-t", image_name]
+        if headless:
+            cmd.extend(["-f", HEADLESS_DOCKERFILE])
+        cmd.append(".")
+        run_command(cmd, cwd=dockerfile_path)
         print_success("Docker image built successfully.")
     except (subprocess.CalledProcessError, FileNotFoundError):
         print_error("Failed to build Docker image.")
         raise
 
-def run_docker_container(work_dir: Path) -> None:
+def wait_for_server(port: int, timeout: float = SERVER_READY_TIMEOUT) -> bool:
+    """Polls the server until it answers HTTP requests or the timeout expires.
+
+    Any HTTP response counts, since the WebSocket endpoint may reject plain
+    GET requests. A bare TCP connect is not enough because Docker's port proxy
+    accepts connections before the server inside the container is up.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return True
+        except requests.exceptions.RequestException:
+            time.sleep(0.1)
+    return False
+
+def record_startup_trace(trace: StartupTrace, container_name: str, work_dir: Path) -> None:
+    """Merges the container's startup log into the trace, saves it and prints a summary."""
+    result = run_command(["docker", "exec", container_name, "cat", "/app/logs/startup.log"],
+                         cwd=work_dir, check=False)
+    if result.returncode == 0:
+        trace.merge_container_log(result.stdout)
+    else:
+        print_warning("Could not read /app/logs/startup.log, trace has host phases only")
+
+    history = load_history(work_dir)
+    trace_path = trace.write(work_dir)
+    print_summary(trace, history)
+    print_info(f"Trace written to: {trace_path}")
+
+def config_hash(config_dir: Path) -> str:
+    """Hash of the .properties files that get mounted into the container."""
+    digest = hashlib.sha256()
+    for path in sorted(config_dir.glob("*.properties")):
+        digest.update(path.name.encode("utf-8") + b"\0" + path.read_bytes() + b"\0")
+    return digest.hexdigest()[:16]
+
+def inspect_format(target: str, fmt: str, work_dir: Path) -> Optional[str]:
+    """Returns a single docker inspect field, or None if the target doesn't exist."""
+    result = run_command(["docker", "inspect", "--format", fmt, target], cwd=work_dir, check=False)
+    return result.stdout.strip() if result.returncode == 0 else None
+
+def applied_config_hash(container_name: str, work_dir: Path) -> Optional[str]:
+    """The config hash the container is currently running with.
+
+    An in-place restart records the new hash inside the container, because
+    the label set at creation time cannot be changed afterwards.
+    """
+    result = run_command(["docker", "exec", container_name, "cat", APPLIED_CONFIG_FILE], cwd=work_dir, check=False)
+    if result.returncode == 0 and result.stdout.strip():
+        return result.stdout.strip()
+    return container_label(container_name, CONFIG_HASH_LABEL, work_dir)
+
+def container_args(container_name: str, image_name: str, config_dir: Path, proxied: bool = False,
+                   alias: Optional[str] = None) -> list[str]:
+    """Arguments for `docker run` of server containers.
+
+    A proxied container publishes no port; it joins the standby network, and
+    the proxy forwards the server port to whichever container holds `alias`.
+    """
+    # Determine the correct host based on the OS
+    host = "host.docker.internal" if platform.system() != "Linux" else "172.17.0.1"
+    if proxied:
+        network = ["--network", STANDBY_NETWORK] + (["--network-alias", alias] if alias else [])
+    else:
+        network = ["-p", f"127.0.0.1:{SERVER_PORT}:{SERVER_PORT}"]
+    return [
+        "--name", container_name,
+        *network,
+        "-v", f"{config_dir}:/app/config:ro",  # Mount config as read-only
+        "--add-host", f"{host}:host-gateway",
+        "--restart", "unless-stopped",  # Auto-restart policy
+        "--label", f"{CONFIG_HASH_LABEL}={config_hash(config_dir)}",
+        "--label", f"{PROXIED_LABEL}={int(proxied)}",
+        image_name
+    ]
+
+def container_label(container_name: str, label: str, work_dir: Path) -> Optional[str]:
+    return inspect_format(container_name, f'{{{{index .Config.Labels "{label}"}}}}', work_dir)
+
+def is_running(container_name: str, work_dir: Path) -> bool:
+    return inspect_format(container_name, "{{.State.Running}}", work_dir) == "true"
+
+def wait_for_container_server(container_name: str, work_dir: Path, timeout: float = SERVER_READY_TIMEOUT) -> bool:
+    """Like wait_for_server, for a container without a published port."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        # Without -f curl succeeds on any HTTP response
+        result = run_command(["docker", "exec", container_name, "curl", "-s", "-o", "/dev/null", "--max-time", "1",
+                              f"http://localhost:{SERVER_PORT}/"], cwd=work_dir, check=False)
+        if result.returncode == 0:
+            return True
+        time.sleep(0.5)
+    return False
+
+def ensure_proxy(work_dir: Path) -> None:
+    """Publishes the server port through a TCP proxy to the container holding ACTIVE_ALIAS.
+
+    Docker cannot move a published port between running containers, but a
+    network alias can move. socat resolves the alias for every new
+    connection, so moving it switches new clients over without touching the
+    proxy.
+    """
+    if inspect_format(STANDBY_NETWORK, "{{.Id}}", work_dir) is None:
+        run_command(["docker", "network", "create", STANDBY_NETWORK], cwd=work_dir)
+    if is_running(PROXY_CONTAINER, work_dir):
+        return
+    run_command(["docker", "rm", "-f", PROXY_CONTAINER], cwd=work_dir, check=False)
+    run_command(["docker", "run", "-d", "--name", PROXY_CONTAINER, "--network", STANDBY_NETWORK,
+                 "-p", f"127.0.0.1:{SERVER_PORT}:{SERVER_PORT}", "--restart", "unless-stopped", PROXY_IMAGE,
+                 f"TCP-LISTEN:{SERVER_PORT},fork,reuseaddr", f"TCP:{ACTIVE_ALIAS}:{SERVER_PORT}"], cwd=work_dir)
+
+def remove_proxy(work_dir: Path) -> None:
+    run_command(["docker", "rm", "-f", PROXY_CONTAINER], cwd=work_dir, check=False)
+
+def reuse_container(container_name: str, image_name: str, config_dir: Path, work_dir: Path,
+                    standby: int = 0) -> bool:
+    """Keeps a running container that matches the current image and config.
+
+    If only the .properties files changed, a standby started with the new
+    files replaces it, so the old server keeps serving until the new one is
+    up. Without standbys the container is restarted, which copies the new
+    files in on start but pays a full server start. Returns False if the
+    container has to be recreated.
+    """
+    result = run_command(["docker", "ps", "-q", "-f", f"name=^{container_name}$"], cwd=work_dir)
+    if not result.stdout.strip():
+        return False
+
+    image_id = inspect_format(image_name, "{{.Id}}", work_dir)
+    if not image_id or image_id != inspect_format(container_name, "{{.Image}}", work_dir):
+        print_info("Running container was created from an older image, recreating it")
+        return False
+    if container_label(container_name, PROXIED_LABEL, work_dir) != str(int(standby > 0)):
+        print_info("Running container was started with a different standby setup, recreating it")
+        return False
+
+    wanted = config_hash(config_dir)
+    if applied_config_hash(container_name, work_dir) == wanted:
+        print_success(f"Container '{container_name}' matches the current image and config, keeping it")
+        return True
+
+    if standby:
+        print_step("Only the .properties files changed, switching to a standby with the new config...")
+        ensure_proxy(work_dir)
+        ensure_standby_containers(standby, image_name, config_dir, work_dir)
+        standbys = list_standby_containers(work_dir)
+        if standbys and wait_for_container_server(standbys[0], work_dir) and promote_standby(container_name, work_dir):
+            return True
+        print_warning("No standby became ready, restarting the container instead")
+
+    print_step("Only the .properties files changed, restarting the container...")
+    run_command(["docker", "restart", "-t", "5", container_name], cwd=work_dir)
+    run_command(["docker", "exec", container_name, "sh", "-c", f"echo {wanted} > {APPLIED_CONFIG_FILE}"],
+                cwd=work_dir, check=False)
+    return True
+
+def list_standby_containers(work_dir: Path) -> list[str]:
+    result = run_command(["docker", "ps", "-a", "--format", "{{.Names}}", "-f", f"name=^{STANDBY_PREFIX}"],
+                         cwd=work_dir, check=False)
+    return sorted(result.stdout.split()) if result.returncode == 0 else []
+
+def ensure_standby_containers(count: int, image_name: str, config_dir: Path, work_dir: Path) -> None:
+    """Keeps `count` running standby containers of the current image and config.
+
+    Standbys run on the standby network without a published port, with the
+    server already started, so promoting one only moves the proxy's alias.
+    """
+    image_id = inspect_format(image_name, "{{.Id}}", work_dir)
+    wanted_hash = config_hash(config_dir)
+    wanted = {f"{STANDBY_PREFIX}{i}" for i in range(1, count + 1)}
+
+    kept = set()
+    for name in list_standby_containers(work_dir):
+        label = container_label(name, CONFIG_HASH_LABEL, work_dir)
+        if (name in wanted and inspect_format(name, "{{.Image}}", work_dir) == image_id and label == wanted_hash
+                and is_running(name, work_dir)):
+            kept.add(name)
+        else:
+            run_command(["docker", "rm", "-f", name], cwd=work_dir, check=False)
+
+    for name in sorted(wanted - kept):
+        run_command(["docker", "run", "-d", *container_args(name, image_name, config_dir, proxied=True)],
+                    cwd=work_dir)
+    if count:
+        print_success(f"{count} standby container(s) ready")
+
+def promote_standby(container_name: str, work_dir: Path) -> bool:
+    """Replaces the primary container with a running standby and refills the pool.
+
+    Returns False if no standby is running.
+    """
+    pool = list_standby_containers(work_dir)
+    running = [name for name in pool if is_running(name, work_dir)]
+    if not running:
+        return False
+    standby = running[0]
+    image_name = inspect_format(standby, "{{.Config.Image}}", work_dir)
+    config_dir = inspect_format(standby, '{{range .Mounts}}{{if eq .Destination "/app/config"}}{{.Source}}'
+                                         '{{end}}{{end}}', work_dir)
+    print_warning(f"Replacing '{container_name}' with standby '{standby}'")
+    run_command(["docker", "rm", "-f", container_name], cwd=work_dir, check=False)
+    # Aliases can only be set when connecting, so reconnect the standby under the active alias
+    run_command(["docker", "network", "disconnect", STANDBY_NETWORK, standby], cwd=work_dir)
+    run_command(["docker", "network", "connect", "--alias", ACTIVE_ALIAS, STANDBY_NETWORK, standby], cwd=work_dir)
+    run_command(["docker", "rename", standby, container_name], cwd=work_dir)
+    if image_name and config_dir:
+        ensure_standby_containers(len(pool), image_name, Path(config_dir), work_dir)
+    return True
+
+def run_docker_container(work_dir: Path, headless: bool = False, trace: Optional[StartupTrace] = None,
+                         reuse: bool = False, standby: int = 0, interactive: bool = True) -> None:
     """Runs the Docker container to start the server."""
     print_step("Starting Tank Royale server in Docker...")
+    trace = trace or StartupTrace("headless" if headless else "gui")
 
-    # Check if a container with the same name is already running
+    # The container keeps the same name in both modes so the other tools find it
     container_name = DOCKER_IMAGE_NAME
+    image_name = HEADLESS_IMAGE_NAME if headless else DOCKER_IMAGE_NAME
+    # Mount the current directory to preserve server configuration
+    current_dir = Path.cwd()
+    container_start = trace.now()
+    proxied = standby > 0
+
+    reused = False
     try:
-        result = run_command(["docker", "ps", "-q", "-f", f"name={container_name}"], cwd=work_dir)
-        if result.stdout.strip():
-            print_warning(f"Container '{container_name}' is already running. Stopping and removing it.")
-            run_command(["docker", "stop", container_name], cwd=work_dir)
-            run_command(["docker", "rm", container_name], cwd=work_dir)
-
-        # Check for exited containers with the same name
-        result = run_command(["docker", "ps", "-aq", "-f", f"name={container_name}"], cwd=work_dir)
-        if result.stdout.strip():
-            print_warning(f"Removing exited container '{container_name}'.")
-            run_command(["docker", "rm", container_name], cwd=work_dir)
+        if reuse:
+            reused = reuse_container(container_name, image_name, current_dir, work_dir, standby)
+
+        if not reused:
+            result = run_command(["docker", "ps", "-q", "-f", f"name=^{container_name}$"], cwd=work_dir)
+            if result.stdout.strip():
+                print_warning(f"Container '{container_name}' is already running. Stopping and removing it.")
+                run_command(["docker", "stop", container_name], cwd=work_dir)
+                run_command(["docker", "rm", container_name], cwd=work_dir)
+
+            # Check for exited containers with the same name
+            result = run_command(["docker", "ps", "-aq", "-f", f"name=^{container_name}$"], cwd=work_dir)
+            if result.stdout.strip():
+                print_warning(f"Removing exited container '{container_name}'.")
+                run_command(["docker", "rm", container_name], cwd=work_dir)
 
     except (subprocess.CalledProcessError, FileNotFoundError):
         print_error("Failed to check for existing Docker containers. Please check your Docker installation.")
         raise
 
     try:
-        # Determine the correct host based on the OS
-        host = "host.docker.internal" if platform.system() != "Linux" else "172.17.0.1"
-
-        # Mount the current directory to preserve server configuration
-        current_dir = Path.cwd()
-        
-        cmd = [
-            "docker", "run", "-d", "--name", container_name,
-            "-p", f"127.0.0.1:{SERVER_PORT}:{SERVER_PORT}",
-            "-v", f"{current_dir}:/app/config:ro",  # Mount config as read-only
-            "--add-host", f"{host}:host-gateway",
-            "--restart", "unless-stopped",  # Auto-restart policy
-            DOCKER_IMAGE_NAME
-        ]
-        run_command(cmd, cwd=work_dir)
-        print_success(f"Server container '{container_name}' started successfully!")
+        if proxied:
+            ensure_proxy(work_dir)
+        elif not reused:
+            remove_proxy(work_dir)  # Frees the port from an earlier run with standbys
+        if not reused:
+            run_command(["docker", "run", "-d", *container_args(container_name, image_name, current_dir, proxied,
+                                                                 ACTIVE_ALIAS if proxied else None)], cwd=work_dir)
+        trace.add_phase("container_start", container_start, trace.now(), source="host")
+        print_success(f"Server container '{container_name}' {'reused' if reused else 'started successfully'}!")
         print_info(f"🌐 Server URL: ws://localhost:{SERVER_PORT}")
-        print_info(f"🔗 Port forwarding: 127.0.0.1:{SERVER_PORT} -> container:{SERVER_PORT}")
+        if proxied:
+            print_info(f"🔗 Port forwarding: 127.0.0.1:{SERVER_PORT} -> {PROXY_CONTAINER} -> {ACTIVE_ALIAS}:{SERVER_PORT}")
+        else:
+            print_info(f"🔗 Port forwarding: 127.0.0.1:{SERVER_PORT} -> container:{SERVER_PORT}")
         print_info(f"📁 Config mounted from: {current_dir}")
         
-        # Wait a moment for container to start
+        # Wait for the server to answer instead of sleeping a fixed time
         print_step("Waiting for server to initialize...")
-        time.sleep(3)
+        with trace.phase("server_ready") as phase:
+            ready = wait_for_server(SERVER_PORT)
+        if ready:
+            print_success(f"Server answered after {phase['end'] - phase['start']:.1f}s")
+        else:
+            print_warning(f"Server did not answer within {SERVER_READY_TIMEOUT}s")
+
+        record_startup_trace(trace, container_name, work_dir)
+
+        # Also removes running standbys left over from an earlier run with more of them
+        ensure_standby_containers(standby, image_name, current_dir, work_dir)
         
         # Check container health
         check_container_health(container_name, work_dir)
@@ -215,7 +488,8 @@ def run_docker_container(work_dir: Path) -> None:
         show_connection_info()
         
         # Offer to show logs
-        show_log_options(container_name)
+        if interactive:
+            show_log_options(container_name, headless)
 
     except (subprocess.CalledProcessError, FileNotFoundError):
         print_error("Failed to start Docker container.")
@@ -225,7 +499,7 @@ def check_container_health(container_name: str, work_dir: Path) -> None:
     """Check if the container is running and healthy."""
     try:
         # Check if container is running
-        result = run_command(["docker", "ps", "-q", "-f", f"name={container_name}"], cwd=work_dir)
+        result = run_command(["docker", "ps", "-q", "-f", f"name=^{container_name}$"], cwd=work_dir)
         if not result.stdout.strip():
             print_error(f"Container '{container_name}' is not running!")
             # Show recent logs for debugging
@@ -291,7 +565,7 @@ def show_connection_info() -> None:
         print_warning("server.properties file not found - secrets may be generated at runtime")
         print_info(f"🌐 Server URL: ws://localhost:{SERVER_PORT}")
 
-def show_log_options(container_name: str) -> None:
+def show_log_options(container_name: str, headless: bool = False) -> None:
     """Show available logging options."""
     print_step("📊 Logging Options")
     print_info("Available log commands:")
@@ -302,13 +576,16 @@ def show_log_options(container_name: str) -> None:
     print_info("")
     print_info("Container log files (accessible via docker exec):")
     print_info("  📋 /app/logs/startup.log  - Container startup logs")
-    print_info("  🎮 /app/logs/server.log   - Tank Royale server logs")
-    print_info("  🖥️  /app/logs/xvfb.log    - Virtual display logs")
+    print_info("  🎮 /app/logs/server/      - Tank Royale server logs (compressed frames)")
+    if not headless:
+        print_info("  🖥️  /app/logs/xvfb.log    - Virtual display logs")
     print_info("  ☕ /app/logs/gc.log       - Java garbage collection logs")
-    print_info("  📊 /app/logs/tank-royale-*.log - Java application logs")
+    if not headless:
+        print_info("  📊 /app/logs/tank-royale-*.log - Java application logs")
     print_info("")
     print_info("Quick log viewing:")
-    print_info(f"  docker exec {container_name} tail -f /app/logs/server.log")
+    print_info(f"  docker exec {container_name} python3 /app/log_sink.py tail -f")
+    print_info(f"  docker exec {container_name} python3 /app/log_sink.py read --since 15m")
     
     # Ask if user wants to monitor logs
     try:
@@ -350,25 +627,45 @@ def monitor_logs_realtime(container_name: str, work_dir: Path) -> None:
 
 def main():
     """Main execution flow."""
+    parser = argparse.ArgumentParser(description="Download and run the Tank Royale server in Docker")
+    parser.add_argument("--headless", action="store_true",
+                        help="Use the standalone server JAR and the slim image without Xvfb")
+    parser.add_argument("--reuse", action="store_true",
+                        help="Keep a running container if image and config are unchanged, replace or restart it if only the config changed")
+    parser.add_argument("--standby", type=int, default=0, metavar="N",
+                        help="Keep N standby containers ready to replace a crashed server")
+    parser.add_argument("--supervise", action="store_true",
+                        help="Keep running and supervise the server, restarting it when it stalls or dies")
+    args = parser.parse_args()
+
     # The script should be run from the `tank-royale-server` directory.
     work_dir = Path(__file__).parent.resolve()
 
     print(f"\n{Colors.BOLD}{Colors.GREEN}Tank Royale Server Runner{Colors.RESET}")
     print("-" * 40)
+    if args.headless:
+        print_info("Headless mode: standalone server JAR, no virtual display")
+
+    trace = StartupTrace("headless" if args.headless else "gui")
 
     try:
         # 1. Get the latest release URL
-        release_url, original_filename = get_latest_release_url()
+        with trace.phase("release_lookup"):
+            release_url, original_filename = get_latest_release_url(args.headless)
+        trace.release = Path(original_filename).stem
 
         # 2. Download the server JAR (rename it to the expected filename)
-        jar_path = work_dir / JAR_FILENAME
-        download_server_jar(release_url, jar_path, original_filename)
+        jar_path = work_dir / (SERVER_JAR_FILENAME if args.headless else JAR_FILENAME)
+        with trace.phase("download"):
+            download_server_jar(release_url, jar_path, original_filename)
 
         # 3. Build the Docker image
-        build_docker_image(work_dir)
+        with trace.phase("image_build"):
+            build_docker_image(work_dir, args.headless)
 
         # 4. Run the Docker container
-        run_docker_container(work_dir)
+        run_docker_container(work_dir, args.headless, trace, reuse=args.reuse, standby=args.standby,
+                             interactive=not args.supervise)
 
         print_success("🎉 Tank Royale server is now running!")
         print_info("")
@@ -383,6 +680,12 @@ def main():
         print_info("  📋 Inspect container:     docker inspect tank-royale-server")
         print_info("  🌐 Test connectivity:     curl -v http://localhost:7655/")
 
+        if args.supervise:
+            from supervisor import run_supervisor
+            print_step("🩺 Supervising server (Ctrl+C to stop)...")
+            run_supervisor(DOCKER_IMAGE_NAME, f"ws://localhost:{SERVER_PORT}",
+                           events_path=work_dir / "supervisor-events.jsonl")
+
     except Exception as e:
         print_error(f"An error occurred: {e}")
         sys.exit(1)
@@ -0,0 +1,65 @@
+"""
+sample_bots.py
+--------------
+Sample bots for bot_host.py.
+
+Usage:
+    python bot_host.py sample_bots:SpinBot*10 sample_bots:Corners*10
+"""
+import math
+
+from bot_host import HostedBot
+
+
+class SpinBot(HostedBot):
+    """Drives in circles with the radar spinning and fires at anything it scans."""
+
+    name = "SpinBot"
+    version = "1.0"
+    authors = ["Tank Royale tools"]
+    description = "Circles and fires when it scans a bot"
+
+    def on_tick(self, tick: dict) -> dict:
+        scanned = any(event.get("type") == "ScannedBotEvent" for event in tick.get("events", []))
+        return {
+            "turnRate": 5,
+            "targetSpeed": 5,
+            "radarTurnRate": 45,
+            "firepower": 2 if scanned else 0,
+        }
+
+
+class Corners(HostedBot):
+    """Moves to the nearest corner, then sweeps the gun over the arena."""
+
+    name = "Corners"
+    version = "1.0"
+    authors = ["Tank Royale tools"]
+    description = "Sits in a corner and sweeps the gun"
+
+    def __init__(self) -> None:
+        self.arena = (800, 600)
+
+    def on_game_started(self, event: dict) -> None:
+        setup = event.get("gameSetup") or {}
+        self.arena = (setup.get("arenaWidth", 800), setup.get("arenaHeight", 600))
+
+    def on_tick(self, tick: dict) -> dict:
+        state = tick.get("botState") or {}
+        x, y = state.get("x", 0.0), state.get("y", 0.0)
+        width, height = self.arena
+        corner_x = 20 if x < width / 2 else width - 20
+        corner_y = 20 if y < height / 2 else height - 20
+        distance = math.hypot(corner_x - x, corner_y - y)
+        # Tank Royale angles are in degrees, counter-clockwise from east
+        bearing = math.degrees(math.atan2(corner_y - y, corner_x - x))
+        turn = (bearing - state.get("direction", 0.0) + 180) % 360 - 180
+        scanned = any(event.get("type") == "ScannedBotEvent" for event in tick.get("events", []))
+        return {
+            "turnRate": max(-10, min(10, turn)),
+            "targetSpeed": min(8, distance / 4) if abs(turn) < 30 else 0,
+            "gunTurnRate": 10,
+            "radarTurnRate": 0,
+            "adjustRadarForGunTurn": False,
+            "firepower": 1.5 if scanned else 0,
+        }
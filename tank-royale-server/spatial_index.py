@@ -0,0 +1,454 @@
+#!/usr/bin/env python3
+"""
+spatial_index.py
+----------------
+Per-tick spatial index for bot and bullet positions.
+
+A uniform grid over the points of one tick, built with a single argsort:
+points are sorted by cell, and a prefix sum over the cell counts gives each
+cell's range in the sorted order. Because cells are numbered row by row,
+the cells of one grid row inside a query box form one contiguous range, so
+a box query is a few slices instead of a loop over cells. Building the grid
+is O(N log N) and cheap enough to redo every tick.
+
+Queries:
+
+- within(x, y, r): points within radius r of a point
+- nearest(x, y, k): the k nearest points
+- raycast(x, y, direction, ...): the first point whose disc a ray hits,
+  e.g. which bot a bullet on its current heading will hit
+- pairs_within(r): all pairs of points closer than r, e.g. collision risks
+
+Directions are Tank Royale degrees: counter-clockwise, 0 pointing east.
+
+Usage:
+    python spatial_index.py compare                     # Grid vs brute force, 10 to 1000 bots
+    python spatial_index.py compare --bots 50 500 --ticks 100
+"""
+import argparse
+import math
+import sys
+import time
+from typing import Optional
+
+try:
+    import numpy as np
+except ImportError:
+    print("Error: 'numpy' library is not installed.")
+    print("Please install it by running: pip install numpy")
+    print("Or install all dependencies: pip install -r requirements.txt")
+    sys.exit(1)
+
+BOT_RADIUS = 18.0            # Bot hit radius in the Tank Royale rules
+POINTS_PER_CELL = 2.0        # Target occupancy when the cell size is chosen automatically
+MAX_CELLS = 1 << 20
+RAY_SEGMENT_CELLS = 4        # Cells covered per step of a ray cast
+BRUTE_FORCE_MAX = 100        # Up to this many points, batch queries use a distance matrix instead
+
+# ANSI Color Codes
+class Colors:
+    RESET = "\033[0m"
+    BOLD = "\033[1m"
+    GREEN = "\033[92m"
+    BLUE = "\033[94m"
+    YELLOW = "\033[93m"
+    RED = "\033[91m"
+    CYAN = "\033[96m"
+
+def print_step(message: str) -> None:
+    print(f"{Colors.CYAN}{Colors.BOLD}==> {message}{Colors.RESET}")
+
+def print_success(message: str) -> None:
+    print(f"{Colors.GREEN}{Colors.BOLD}✓ {message}{Colors.RESET}")
+
+def print_error(message: str) -> None:
+    print(f"{Colors.RED}✗ {message}{Colors.RESET}")
+
+def print_info(message: str) -> None:
+    print(f"{Colors.BLUE}  {message}{Colors.RESET}")
+
+
+def concatenated_ranges(starts: np.ndarray, ends: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """All of range(start, end) for each pair, concatenated, and the pair each value came from."""
+    counts = np.maximum(ends - starts, 0)
+    total = int(counts.sum())
+    owner = np.repeat(np.arange(len(counts)), counts)
+    return starts[owner] + np.arange(total) - (np.cumsum(counts) - counts)[owner], owner
+
+
+def order_by_query(query: np.ndarray, d2: np.ndarray) -> np.ndarray:
+    """Order of (query, distance) pairs by query, then distance.
+
+    Two argsorts, the second stable, are several times faster than lexsort here.
+    """
+    by_distance = np.argsort(d2)
+    return by_distance[np.argsort(query[by_distance], kind="stable")]
+
+
+class SpatialIndex:
+    """Uniform grid over a set of 2D points. Queries return indexes into the input."""
+
+    def __init__(self, x, y, ids=None, cell_size: Optional[float] = None) -> None:
+        self.x = np.ascontiguousarray(x, dtype=np.float64)
+        self.y = np.ascontiguousarray(y, dtype=np.float64)
+        self.ids = None if ids is None else np.asarray(ids)
+        count = len(self.x)
+
+        if count:
+            self.min_x, self.min_y = float(self.x.min()), float(self.y.min())
+            width = float(self.x.max()) - self.min_x
+            height = float(self.y.max()) - self.min_y
+        else:
+            self.min_x = self.min_y = width = height = 0.0
+        if cell_size is None:
+            cell_size = math.sqrt(max(width, 1.0) * max(height, 1.0) * POINTS_PER_CELL / max(count, 1))
+        cell_size = max(cell_size, 1e-9)
+        # Keep the grid small for degenerate inputs, e.g. all points on one long line
+        while (width // cell_size + 1) * (height // cell_size + 1) > MAX_CELLS:
+            cell_size *= 2
+        self.cell_size = cell_size
+        self.columns = int(width // cell_size) + 1
+        self.rows = int(height // cell_size) + 1
+
+        cell = self.cell_of(self.x, self.y)
+        self.order = np.argsort(cell, kind="stable")
+        self.sorted_x = self.x[self.order]
+        self.sorted_y = self.y[self.order]
+        counts = np.bincount(cell, minlength=self.columns * self.rows)
+        # cell_start[c]:cell_start[c + 1] is cell c's range in the sorted order
+        self.cell_start = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.cell_start[1:])
+
+    @classmethod
+    def from_states(cls, states: list[dict], cell_size: Optional[float] = None) -> "SpatialIndex":
+        """Index the BotStates or BulletStates of a tick; ids are the bot or bullet ids."""
+        id_field = "bulletId" if states and "bulletId" in states[0] else "id"
+        x = np.fromiter((s["x"] for s in states), dtype=np.float64, count=len(states))
+        y = np.fromiter((s["y"] for s in states), dtype=np.float64, count=len(states))
+        ids = np.fromiter((s[id_field] for s in states), dtype=np.int64, count=len(states))
+        return cls(x, y, ids, cell_size)
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def cell_of(self, x, y):
+        column = np.clip(((x - self.min_x) // self.cell_size).astype(np.int64), 0, self.columns - 1)
+        row = np.clip(((y - self.min_y) // self.cell_size).astype(np.int64), 0, self.rows - 1)
+        return row * self.columns + column
+
+    def in_box(self, x0: float, y0: float, x1: float, y1: float) -> np.ndarray:
+        """Indexes of the points in the cells overlapping a box (a superset of the points inside it)."""
+        column0 = int(max(0, (x0 - self.min_x) // self.cell_size))
+        column1 = int(min(self.columns - 1, (x1 - self.min_x) // self.cell_size))
+        row0 = int(max(0, (y0 - self.min_y) // self.cell_size))
+        row1 = int(min(self.rows - 1, (y1 - self.min_y) // self.cell_size))
+        if column0 > column1 or row0 > row1:
+            return np.empty(0, dtype=np.int64)
+        rows = np.arange(row0, row1 + 1) * self.columns
+        starts = self.cell_start[rows + column0]
+        ends = self.cell_start[rows + column1 + 1]
+        if len(rows) == 1:
+            return self.order[starts[0]:ends[0]]
+        return self.order[concatenated_ranges(starts, ends)[0]]
+
+    def within(self, x: float, y: float, r: float, exclude: Optional[int] = None) -> np.ndarray:
+        """Indexes of the points within distance r of (x, y), nearest first."""
+        candidates = self.in_box(x - r, y - r, x + r, y + r)
+        if exclude is not None:
+            candidates = candidates[candidates != exclude]
+        d2 = (self.x[candidates] - x) ** 2 + (self.y[candidates] - y) ** 2
+        inside = d2 <= r * r
+        candidates, d2 = candidates[inside], d2[inside]
+        return candidates[np.argsort(d2, kind="stable")]
+
+    def nearest(self, x: float, y: float, k: int = 1, exclude: Optional[int] = None) -> np.ndarray:
+        """Indexes of the k points nearest to (x, y), nearest first."""
+        available = len(self) - (exclude is not None and 0 <= exclude < len(self))
+        k = min(k, available)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64)
+        r = self.cell_size
+        final = False
+        while True:
+            candidates = self.in_box(x - r, y - r, x + r, y + r)
+            if exclude is not None:
+                candidates = candidates[candidates != exclude]
+            if len(candidates) >= k:
+                d2 = (self.x[candidates] - x) ** 2 + (self.y[candidates] - y) ** 2
+                if final or float(np.partition(d2, k - 1)[k - 1]) <= r * r:
+                    # Every point closer than the k-th candidate lies inside the box
+                    best = np.argsort(d2, kind="stable")[:k]
+                    return candidates[best]
+                # The box holds k points, but closer ones may lie just outside it;
+                # a box reaching the k-th distance holds all of them
+                r = math.sqrt(float(np.partition(d2, k - 1)[k - 1])) * (1 + 1e-9)
+                final = True
+                continue
+            r *= 2
+
+    def raycast(self, x: float, y: float, direction: float, max_distance: float = math.inf,
+                radius: float = BOT_RADIUS, exclude: Optional[int] = None) -> Optional[tuple[int, float]]:
+        """The first point whose disc of the given radius the ray hits, and the distance to it.
+
+        The ray is walked in segments of a few cells; only points near the
+        current segment are tested, so a ray that hits early is cheap.
+        """
+        if not len(self):
+            return None
+        dx, dy = math.cos(math.radians(direction)), math.sin(math.radians(direction))
+        # The ray can only meet a disc while it is within radius of the indexed points
+        start, limit = self.ray_span(x, y, dx, dy, radius)
+        limit = min(max_distance, limit)
+        step = self.cell_size * RAY_SEGMENT_CELLS
+        while start <= limit:
+            end = min(start + step, limit)
+            ax, ay, bx, by = x + dx * start, y + dy * start, x + dx * end, y + dy * end
+            candidates = self.in_box(min(ax, bx) - radius, min(ay, by) - radius,
+                                     max(ax, bx) + radius, max(ay, by) + radius)
+            if exclude is not None:
+                candidates = candidates[candidates != exclude]
+            if len(candidates):
+                # Ray-circle intersection: t^2 - 2bt + c = 0 with the ray direction of unit length
+                ox, oy = self.x[candidates] - x, self.y[candidates] - y
+                b = ox * dx + oy * dy
+                c = ox * ox + oy * oy - radius * radius
+                disc = b * b - c
+                t = np.where(c <= 0, 0.0, b - np.sqrt(np.maximum(disc, 0.0)))
+                hit = (disc >= 0) & ((c <= 0) | (b > 0)) & (t <= end)
+                if hit.any():
+                    # A disc entered on this segment has its centre within radius of it,
+                    # and discs entered earlier were found on an earlier segment
+                    t, candidates = t[hit], candidates[hit]
+                    first = int(np.argmin(t))
+                    return int(candidates[first]), float(t[first])
+            if end >= limit:
+                break
+            start = end
+        return None
+
+    def ray_span(self, x: float, y: float, dx: float, dy: float, margin: float) -> tuple[float, float]:
+        """Distances along the ray where it enters and leaves the grid grown by margin.
+
+        The entry is after the exit when the ray misses the grid.
+        """
+        x0, y0 = self.min_x - margin, self.min_y - margin
+        x1 = self.min_x + self.columns * self.cell_size + margin
+        y1 = self.min_y + self.rows * self.cell_size + margin
+        entry, exit_distance = 0.0, math.inf
+        for origin, d, low, high in ((x, dx, x0, x1), (y, dy, y0, y1)):
+            if abs(d) < 1e-12:
+                if not low <= origin <= high:
+                    return 1.0, 0.0
+                continue
+            near, far = sorted(((low - origin) / d, (high - origin) / d))
+            entry, exit_distance = max(entry, near), min(exit_distance, far)
+        return entry, exit_distance
+
+    def neighbourhood(self, qx: np.ndarray, qy: np.ndarray, reach: int,
+                      after: Optional[np.ndarray] = None) -> tuple[np.ndarray, np.ndarray]:
+        """Candidate (query, sorted position) pairs for many queries at once.
+
+        A query's candidates are the points in the cells up to reach cells
+        away from its own, so they include every point within
+        reach * cell_size of it. Queries outside the grid use the nearest
+        edge cell, which only moves them closer to the points. With after,
+        only positions after after[query] are returned, to list pairs once.
+        """
+        cell = self.cell_of(qx, qy)
+        column, row = cell % self.columns, cell // self.columns
+        queries = np.arange(len(qx))
+        first, second = [], []
+        # One range of cells per row offset, as in in_box()
+        for row_offset in range(-reach, reach + 1):
+            other_row = row + row_offset
+            valid = (other_row >= 0) & (other_row < self.rows)
+            base = other_row[valid] * self.columns
+            starts = self.cell_start[base + np.maximum(column[valid] - reach, 0)]
+            ends = self.cell_start[base + np.minimum(column[valid] + reach, self.columns - 1) + 1]
+            if after is not None:
+                starts = np.maximum(starts, after[valid] + 1)
+            positions, owner = concatenated_ranges(starts, ends)
+            first.append(queries[valid][owner])
+            second.append(positions)
+        return np.concatenate(first), np.concatenate(second)
+
+    def within_many(self, qx, qy, r: float) -> tuple[np.ndarray, np.ndarray]:
+        """Points within r of each query, as parallel (query, index) arrays ordered by query, then distance."""
+        qx, qy = np.asarray(qx, dtype=np.float64), np.asarray(qy, dtype=np.float64)
+        if len(self) <= BRUTE_FORCE_MAX:
+            return brute_within_many(self.x, self.y, qx, qy, r)
+        query, position = self.neighbourhood(qx, qy, max(1, int(math.ceil(r / self.cell_size))))
+        d2 = (self.sorted_x[position] - qx[query]) ** 2 + (self.sorted_y[position] - qy[query]) ** 2
+        inside = d2 <= r * r
+        query, position, d2 = query[inside], position[inside], d2[inside]
+        order = order_by_query(query, d2)
+        return query[order], self.order[position[order]]
+
+    def nearest_many(self, qx, qy, k: int = 1, exclude: Optional[np.ndarray] = None) -> np.ndarray:
+        """The k nearest points of each query as a (queries, k) array, padded with -1.
+
+        exclude holds one index per query to leave out (e.g. the query's own
+        bot), or -1. Queries whose k-th nearest point lies beyond the cells
+        next to them fall back to nearest().
+        """
+        qx, qy = np.asarray(qx, dtype=np.float64), np.asarray(qy, dtype=np.float64)
+        if len(self) <= BRUTE_FORCE_MAX:
+            return brute_nearest_many(self.x, self.y, qx, qy, k, exclude)
+        result = np.full((len(qx), k), -1, dtype=np.int64)
+        if not len(qx):
+            return result
+        query, position = self.neighbourhood(qx, qy, 1)
+        index = self.order[position]
+        if exclude is not None:
+            keep = index != np.asarray(exclude)[query]
+            query, index, position = query[keep], index[keep], position[keep]
+        d2 = (self.sorted_x[position] - qx[query]) ** 2 + (self.sorted_y[position] - qy[query]) ** 2
+        order = order_by_query(query, d2)
+        query, index, d2 = query[order], index[order], d2[order]
+        group_start = np.searchsorted(query, np.arange(len(qx)))
+        rank = np.arange(len(query)) - group_start[query]
+        best = rank < k
+        result[query[best], rank[best]] = index[best]
+
+        # Candidates cover a radius of one cell; a k-th nearest beyond that
+        # (or fewer than k candidates) is not certain
+        kth_d2 = np.full(len(qx), np.inf)
+        last = rank == k - 1
+        kth_d2[query[last]] = d2[last]
+        for q in np.flatnonzero(kth_d2 > self.cell_size ** 2):
+            skip = None if exclude is None or exclude[q] < 0 else int(exclude[q])
+            nearest = self.nearest(qx[q], qy[q], k, exclude=skip)
+            result[q] = -1
+            result[q, :len(nearest)] = nearest
+        return result
+
+    def pairs_within(self, r: float) -> np.ndarray:
+        """All pairs (i, j), i < j, of points closer than r, as an (n, 2) array."""
+        if len(self) <= BRUTE_FORCE_MAX:
+            return brute_pairs_within(self.x, self.y, r)
+        reach = max(1, int(math.ceil(r / self.cell_size)))
+        first, second = self.neighbourhood(self.sorted_x, self.sorted_y, reach, after=np.arange(len(self)))
+        d2 = (self.sorted_x[first] - self.sorted_x[second]) ** 2 + (self.sorted_y[first] - self.sorted_y[second]) ** 2
+        close = d2 < r * r
+        pairs = np.sort(np.stack([self.order[first[close]], self.order[second[close]]], axis=1), axis=1)
+        return pairs[np.argsort(pairs[:, 0] * len(self) + pairs[:, 1])]
+
+
+# --- Brute force, for checking and comparison ---
+
+def distance_matrix(x: np.ndarray, y: np.ndarray, qx: np.ndarray, qy: np.ndarray) -> np.ndarray:
+    return (qx[:, None] - x[None, :]) ** 2 + (qy[:, None] - y[None, :]) ** 2
+
+
+def brute_within_many(x: np.ndarray, y: np.ndarray, qx: np.ndarray, qy: np.ndarray,
+                      r: float) -> tuple[np.ndarray, np.ndarray]:
+    d2 = distance_matrix(x, y, qx, qy)
+    query, index = np.nonzero(d2 <= r * r)
+    order = order_by_query(query, d2[query, index])
+    return query[order], index[order]
+
+
+def brute_nearest_many(x: np.ndarray, y: np.ndarray, qx: np.ndarray, qy: np.ndarray, k: int = 1,
+                       exclude: Optional[np.ndarray] = None) -> np.ndarray:
+    d2 = distance_matrix(x, y, qx, qy)
+    if exclude is not None:
+        exclude = np.asarray(exclude)
+        rows = np.flatnonzero(exclude >= 0)
+        d2[rows, exclude[rows]] = np.inf
+    result = np.full((len(qx), k), -1, dtype=np.int64)
+    nearest = np.argsort(d2, axis=1, kind="stable")[:, :k]
+    result[:, :nearest.shape[1]] = np.where(np.isinf(np.take_along_axis(d2, nearest, axis=1)), -1, nearest)
+    return result
+
+
+def brute_pairs_within(x: np.ndarray, y: np.ndarray, r: float) -> np.ndarray:
+    first, second = np.nonzero(np.triu(distance_matrix(x, y, x, y) < r * r, k=1))
+    return np.stack([first, second], axis=1)
+
+
+# --- Comparison ---
+
+def random_positions(rnd: np.random.Generator, bots: int) -> tuple[np.ndarray, np.ndarray]:
+    """Bot positions in an arena sized to keep the melee density of 10 bots on 800x600."""
+    scale = math.sqrt(max(bots, 10) / 10)
+    return (rnd.uniform(BOT_RADIUS, 800 * scale - BOT_RADIUS, bots),
+            rnd.uniform(BOT_RADIUS, 600 * scale - BOT_RADIUS, bots))
+
+
+def tick_queries_grid(x: np.ndarray, y: np.ndarray, radius: float) -> int:
+    """What analytics do per tick: nearest enemy and neighbours of every bot, plus collision risks."""
+    index = SpatialIndex(x, y)
+    nearest = index.nearest_many(x, y, 1, exclude=np.arange(len(x)))
+    query, _ = index.within_many(x, y, radius)
+    return len(nearest) + len(query) + len(index.pairs_within(2 * BOT_RADIUS))
+
+
+def tick_queries_brute(x: np.ndarray, y: np.ndarray, radius: float) -> int:
+    nearest = brute_nearest_many(x, y, x, y, 1, exclude=np.arange(len(x)))
+    query, _ = brute_within_many(x, y, x, y, radius)
+    return len(nearest) + len(query) + len(brute_pairs_within(x, y, 2 * BOT_RADIUS))
+
+
+def check(x: np.ndarray, y: np.ndarray, radius: float, k: int = 3) -> None:
+    """Raise AssertionError naming the query kind where the grid and brute force disagree."""
+    index = SpatialIndex(x, y)
+    own = np.arange(len(x))
+    got = index.within_many(x, y, radius)
+    expected = brute_within_many(x, y, x, y, radius)
+    assert all(np.array_equal(np.sort(got[1][got[0] == q]), np.sort(expected[1][expected[0] == q]))
+               for q in own), "within"
+    got, expected = index.nearest_many(x, y, k, exclude=own), brute_nearest_many(x, y, x, y, k, exclude=own)
+    d_got = np.hypot(x[got] - x[:, None], y[got] - y[:, None])
+    d_expected = np.hypot(x[expected] - x[:, None], y[expected] - y[:, None])
+    assert np.allclose(d_got, d_expected), "nearest"
+    for q in own[:20]:
+        assert np.allclose(np.hypot(x[index.nearest(x[q], y[q], k, exclude=q)] - x[q],
+                                    y[index.nearest(x[q], y[q], k, exclude=q)] - y[q]), d_expected[q]), "nearest"
+    assert np.array_equal(index.pairs_within(2 * BOT_RADIUS), brute_pairs_within(x, y, 2 * BOT_RADIUS)), "pairs"
+    # A ray from each bot along its line to another bot hits that bot or one in front of it
+    for q in own[:20]:
+        target = (q + 1) % len(x)
+        direction = math.degrees(math.atan2(y[target] - y[q], x[target] - x[q]))
+        hit = index.raycast(x[q], y[q], direction, exclude=q)
+        assert hit is not None and hit[1] <= math.hypot(x[target] - x[q], y[target] - y[q]), "raycast"
+
+
+def compare(bot_counts: list[int], ticks: int, radius: float, seed: int) -> None:
+    rnd = np.random.default_rng(seed)
+    print_step(f"Per-tick queries: nearest, within {radius:g} for every bot, and collision pairs")
+    print(f"{Colors.BOLD}{'Bots':>6}  {'Grid':>12}  {'Brute force':>12}  {'Speed-up':>8}{Colors.RESET}")
+    for bots in bot_counts:
+        positions = [random_positions(rnd, bots) for _ in range(ticks)]
+        check(*positions[0], radius)
+        timings = {}
+        for label, queries in (("grid", tick_queries_grid), ("brute", tick_queries_brute)):
+            started = time.perf_counter()
+            for x, y in positions:
+                queries(x, y, radius)
+            timings[label] = (time.perf_counter() - started) / ticks
+        print(f"{bots:>6}  {timings['grid'] * 1000:>9.2f} ms  {timings['brute'] * 1000:>9.2f} ms  "
+              f"{timings['brute'] / timings['grid']:>7.1f}x")
+    print_success("Grid and brute force results agree")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-tick spatial index for bot and bullet positions")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    compare_parser = subparsers.add_parser("compare", help="Check the grid against brute force and time both")
+    compare_parser.add_argument("--bots", type=int, nargs="+", default=[10, 100, 1000])
+    compare_parser.add_argument("--ticks", type=int, default=20, help="Ticks per bot count (default: 20)")
+    compare_parser.add_argument("--radius", type=float, default=200.0, help="Neighbour radius (default: 200)")
+    compare_parser.add_argument("--seed", type=int, default=1)
+
+    args = parser.parse_args()
+    if args.command == "compare":
+        try:
+            compare(args.bots, args.ticks, args.radius, args.seed)
+        except AssertionError as e:
+            print_error(f"Grid and brute force disagree on {e} queries")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
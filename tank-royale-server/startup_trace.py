@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+startup_trace.py
+----------------
+Phase-level startup tracing for run_server.py.
+
+Every phase of a server launch (release lookup, download, image build,
+container start, waiting for the server) is recorded with monotonic
+timestamps. The in-container phases (entrypoint, Xvfb wait, JVM boot) are
+merged in from /app/logs/startup.log. Each trace is written as JSON to the
+traces directory and summarised in startup-history.jsonl, so startup
+regressions between server releases are easy to spot.
+
+Usage:
+    python startup_trace.py              # Show startup history per release
+    python startup_trace.py --last 20    # Only consider the last 20 runs
+    python startup_trace.py --show FILE  # Print the summary of one trace
+"""
+import argparse
+import json
+import re
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterator, Optional
+
+TRACE_DIR = "traces"
+HISTORY_FILENAME = "startup-history.jsonl"
+BAR_WIDTH = 40
+
+# A phase is flagged as a regression if it is this much slower than the
+# median of previous runs and the absolute difference is noticeable.
+REGRESSION_RATIO = 1.5
+REGRESSION_MIN_SECONDS = 0.5
+
+# Lines written by the container's log() helper: "[2024-01-01 12:00:00.123] message"
+STARTUP_LOG_LINE = re.compile(r"^\[(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})(?:\.(\d+))?\] (.*)$")
+
+# Markers in startup.log that open and close in-container phases.
+# (phase name, start marker, end marker); an end marker of None means the
+# phase ends when the host sees the server answering.
+CONTAINER_PHASES = [
+    ("entrypoint", "Starting", "Launching Tank Royale server"),
+    ("xvfb_wait", "Starting virtual display", "Xvfb started successfully"),
+    ("jvm_boot", "Launching Tank Royale server", None),
+]
+
+# ANSI Color Codes
+class Colors:
+    RESET = "\033[0m"
+    BOLD = "\033[1m"
+    GREEN = "\033[92m"
+    BLUE = "\033[94m"
+    YELLOW = "\033[93m"
+    RED = "\033[91m"
+    CYAN = "\033[96m"
+
+
+class StartupTrace:
+    """Records named phases relative to a single monotonic origin."""
+
+    def __init__(self, mode: str = "gui") -> None:
+        self.origin_monotonic = time.monotonic()
+        self.origin_wall = time.time()
+        self.mode = mode
+        self.release: Optional[str] = None
+        self.phases: list[dict] = []
+
+    def now(self) -> float:
+        """Seconds since the trace started."""
+        return time.monotonic() - self.origin_monotonic
+
+    @contextmanager
+    def phase(self, name: str, parent: Optional[str] = None) -> Iterator[dict]:
+        """Time a block of code as one phase."""
+        entry = {"name": name, "parent": parent, "source": "host", "start": self.now(), "end": None}
+        self.phases.append(entry)
+        try:
+            yield entry
+        finally:
+            entry["end"] = self.now()
+
+    def add_phase(self, name: str, start: float, end: float, parent: Optional[str] = None,
+                  source: str = "container") -> None:
+        self.phases.append({"name": name, "parent": parent, "source": source, "start": start, "end": end})
+
+    def get_phase(self, name: str) -> Optional[dict]:
+        return next((p for p in self.phases if p["name"] == name), None)
+
+    def wall_to_trace(self, wall: float) -> float:
+        """Convert a wall-clock timestamp to seconds since the trace started."""
+        return wall - self.origin_wall
+
+    def merge_container_log(self, text: str, parent: Optional[str] = None) -> int:
+        """Merge the timestamps from the container's startup.log into the trace.
+
+        Only lines written after this trace started are considered, since the
+        log is appended to across container restarts. The phases are added at
+        top level by default: they overlap both container_start and
+        server_ready, so they fit under neither. Returns the number of phases
+        added.
+        """
+        events = []
+        for line in text.splitlines():
+            match = STARTUP_LOG_LINE.match(line.strip())
+            if not match:
+                continue
+            stamp, fraction, message = match.groups()
+            # The container has no TZ set, so its date output is UTC
+            wall = datetime.strptime(stamp, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc).timestamp()
+            if fraction:
+                wall += float(f"0.{fraction}")
+            offset = self.wall_to_trace(wall)
+            # startup.log has at best millisecond resolution, allow for truncation
+            if offset >= -1.0:
+                events.append((offset, message))
+
+        ready = self.get_phase("server_ready")
+        ready_at = ready["end"] if ready else None
+        added = 0
+        for name, start_marker, end_marker in CONTAINER_PHASES:
+            start = next((t for t, m in events if start_marker in m), None)
+            if start is None:
+                continue
+            if end_marker is None:
+                end = ready_at
+            else:
+                end = next((t for t, m in events if end_marker in m and t >= start), None)
+            if end is None:
+                continue
+            self.add_phase(name, max(start, 0.0), end, parent=parent)
+            added += 1
+        return added
+
+    def durations(self) -> dict[str, float]:
+        return {p["name"]: p["end"] - p["start"] for p in self.phases if p["end"] is not None}
+
+    def total(self) -> float:
+        ends = [p["end"] for p in self.phases if p["end"] is not None]
+        return max(ends) if ends else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "started_at": datetime.fromtimestamp(self.origin_wall).isoformat(timespec="seconds"),
+            "mode": self.mode,
+            "release": self.release,
+            "total": self.total(),
+            "phases": self.phases,
+        }
+
+    def write(self, work_dir: Path) -> Path:
+        """Write the trace as JSON and append it to the history file."""
+        trace_dir = work_dir / TRACE_DIR
+        trace_dir.mkdir(exist_ok=True)
+        stamp = datetime.fromtimestamp(self.origin_wall).strftime("%Y%m%d-%H%M%S")
+        trace_path = trace_dir / f"startup-{stamp}.json"
+        data = self.to_dict()
+        trace_path.write_text(json.dumps(data, indent=2))
+
+        history_entry = {
+            "started_at": data["started_at"],
+            "mode": self.mode,
+            "release": self.release,
+            "total": data["total"],
+            "phases": self.durations(),
+        }
+        with open(trace_dir / HISTORY_FILENAME, "a") as f:
+            f.write(json.dumps(history_entry) + "\n")
+        return trace_path
+
+
+def load_history(work_dir: Path, last: Optional[int] = None) -> list[dict]:
+    """Load previous runs from the history file, oldest first."""
+    path = work_dir / TRACE_DIR / HISTORY_FILENAME
+    if not path.exists():
+        return []
+    entries = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return entries[-last:] if last else entries
+
+
+def format_flame(trace: dict) -> list[str]:
+    """Render the phases of a trace as a flame-style timeline, one bar per phase."""
+    phases = trace["phases"]
+    total = trace["total"] or 1e-9
+    by_parent: dict[Optional[str], list[dict]] = {}
+    for phase in phases:
+        by_parent.setdefault(phase["parent"], []).append(phase)
+
+    lines = []
+    name_width = max((len(p["name"]) + 2 for p in phases), default=10)
+
+    def render(parent: Optional[str], depth: int) -> None:
+        for phase in sorted(by_parent.get(parent, []), key=lambda p: p["start"]):
+            start, end = phase["start"], phase["end"] if phase["end"] is not None else phase["start"]
+            offset = int(start / total * BAR_WIDTH)
+            width = max(1, int(round((end - start) / total * BAR_WIDTH)))
+            width = min(width, BAR_WIDTH - offset) if offset < BAR_WIDTH else 1
+            bar = " " * offset + "█" * width
+            label = ("  " * depth + phase["name"]).ljust(name_width)
+            color = Colors.CYAN if phase["source"] == "container" else Colors.GREEN
+            lines.append(f"{label} |{color}{bar.ljust(BAR_WIDTH)}{Colors.RESET}| {end - start:7.2f}s")
+            render(phase["name"], depth + 1)
+
+    render(None, 0)
+    lines.append(f"{'total'.ljust(name_width)}  {' ' * BAR_WIDTH}  {trace['total']:7.2f}s")
+    return lines
+
+
+def find_regressions(current: dict[str, float], history: list[dict], mode: str) -> list[str]:
+    """Compare phase durations against the median of previous runs in the same mode."""
+    previous = [h for h in history if h.get("mode") == mode]
+    messages = []
+    for name, duration in current.items():
+        samples = [h["phases"][name] for h in previous if name in h.get("phases", {})]
+        if len(samples) < 3:
+            continue
+        median = statistics.median(samples)
+        if duration > median * REGRESSION_RATIO and duration - median > REGRESSION_MIN_SECONDS:
+            messages.append(f"{name}: {duration:.2f}s vs median {median:.2f}s over {len(samples)} runs")
+    return messages
+
+
+def print_summary(trace: StartupTrace, history: list[dict]) -> None:
+    """Print the flame-style summary and any regressions against past runs."""
+    print(f"{Colors.CYAN}{Colors.BOLD}==> ⏱️  Startup trace{Colors.RESET}")
+    for line in format_flame(trace.to_dict()):
+        print(f"  {line}")
+
+    regressions = find_regressions(trace.durations(), history, trace.mode)
+    for message in regressions:
+        print(f"{Colors.YELLOW}⚠ Slower than usual: {message}{Colors.RESET}")
+
+    release_totals = summarize_releases(history, trace.mode)
+    previous_releases = [r for r in release_totals if r != (trace.release or "unknown")]
+    if previous_releases:
+        last_release = previous_releases[-1]
+        print(f"{Colors.BLUE}  Previous release {last_release}: median total "
+              f"{release_totals[last_release]['total']:.2f}s over {release_totals[last_release]['runs']} runs{Colors.RESET}")
+
+
+def summarize_releases(history: list[dict], mode: Optional[str] = None) -> dict[str, dict]:
+    """Median phase durations per release, in the order releases first appeared."""
+    grouped: dict[str, list[dict]] = {}
+    for entry in history:
+        if mode and entry.get("mode") != mode:
+            continue
+        grouped.setdefault(entry.get("release") or "unknown", []).append(entry)
+
+    summary = {}
+    for release, entries in grouped.items():
+        names = sorted({name for e in entries for name in e.get("phases", {})})
+        summary[release] = {
+            "runs": len(entries),
+            "total": statistics.median(e["total"] for e in entries),
+            "phases": {
+                name: statistics.median(e["phases"][name] for e in entries if name in e["phases"])
+                for name in names
+            },
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tank Royale startup trace history")
+    parser.add_argument("--last", type=int, help="Only consider the last N runs")
+    parser.add_argument("--mode", choices=["gui", "headless"], help="Only show runs in this launch mode")
+    parser.add_argument("--show", type=Path, help="Print the flame summary of a single trace file")
+    args = parser.parse_args()
+
+    work_dir = Path(__file__).parent.resolve()
+
+    if args.show:
+        for line in format_flame(json.loads(args.show.read_text())):
+            print(line)
+        return
+
+    history = load_history(work_dir, args.last)
+    if not history:
+        print(f"{Colors.YELLOW}⚠ No startup history yet. Run run_server.py first.{Colors.RESET}")
+        return
+
+    for release, data in summarize_releases(history, args.mode).items():
+        print(f"{Colors.CYAN}{Colors.BOLD}==> {release}{Colors.RESET} "
+              f"({data['runs']} runs, median total {data['total']:.2f}s)")
+        for name, median in data["phases"].items():
+            print(f"{Colors.BLUE}  {name:<18} {median:7.2f}s{Colors.RESET}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+supervisor.py
+-------------
+Long-running asyncio supervisor for the Tank Royale server container.
+
+Replaces the one-shot health check after start with continuous monitoring:
+
+- Docker state and health status of the container
+- An observer connection, used as heartbeat and to follow tick progress
+- CPU and memory use of the container
+
+A running game that produces no tick for K turn intervals is treated as a
+stall. Stalls, a dead or unhealthy container and a lost heartbeat all lead
+to a restart with exponential backoff. If standby containers exist (see
+run_server.py --standby) one of them is promoted instead of restarting.
+
+Every finding is emitted as one JSON object per line, on stdout and
+optionally appended to a file. Other output, such as the progress of a
+standby promotion, goes to stderr.
+
+The observer only looks for the tick message type in the raw text instead
+of decoding each tick, so following even a fast battle costs little CPU.
+
+Usage:
+    python supervisor.py
+    python supervisor.py --stall-turns 50 --events-file supervisor.jsonl
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, TextIO
+
+from observer import default_secret, observe, read_properties
+
+CONTAINER_NAME = "tank-royale-server"
+DEFAULT_SERVER_URL = "ws://localhost:7655"
+
+HEALTH_INTERVAL = 5.0        # Seconds between docker state checks
+RESOURCE_INTERVAL = 15.0     # Seconds between docker stats samples
+STALL_CHECK_INTERVAL = 0.25  # Seconds between tick progress checks
+STALL_TURNS = 50             # Turn intervals without a tick before a running game counts as stalled
+MIN_STALL_SECONDS = 2.0      # Never report a stall sooner than this
+HEARTBEAT_TIMEOUT = 30.0     # Seconds without an observer connection before restarting
+STARTUP_GRACE = 60.0         # Seconds after a (re)start before failures count
+BACKOFF_INITIAL = 2.0
+BACKOFF_MAX = 300.0
+BACKOFF_RESET_AFTER = 600.0  # Seconds of stable running that reset the backoff
+MEMORY_WARNING_PERCENT = 90.0
+
+TICK_MARKER = '"TickEventForObserver"'
+
+
+class Supervisor:
+    """Watches one server container and restarts it when it stops making progress."""
+
+    def __init__(self, container_name: str = CONTAINER_NAME, url: str = DEFAULT_SERVER_URL,
+                 secret: Optional[str] = None, stall_turns: int = STALL_TURNS,
+                 events_file: Optional[TextIO] = None, work_dir: Optional[Path] = None) -> None:
+        self.container_name = container_name
+        self.url = url
+        self.secret = secret
+        self.stall_turns = stall_turns
+        self.events_file = events_file
+        self.work_dir = work_dir or Path(__file__).parent.resolve()
+
+        # Progress, all in time.monotonic() seconds
+        self.started_at = time.monotonic()
+        self.connected = False
+        self.last_heartbeat = self.started_at
+        self.last_tick = self.started_at
+        self.game_running = False
+        self.game_paused = False
+        self.turn_timeout = 0.03
+        self.tps = self._configured_tps()
+        self.ticks = 0
+
+        # Restart state
+        self.failures = 0
+        self.restarting = asyncio.Lock()
+        self.last_restart: Optional[float] = None
+        self.restart_failing = False  # The last attempt failed; keep backing off
+        self.stdout = sys.stdout
+
+    def _configured_tps(self) -> float:
+        try:
+            return float(read_properties(self.work_dir / "server.properties").get("tps", 30))
+        except ValueError:
+            return 30.0
+
+    # --- Events ---
+
+    def emit(self, event: str, **fields) -> None:
+        record = {"ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"), "event": event, **fields}
+        line = json.dumps(record)
+        print(line, file=self.stdout, flush=True)
+        if self.events_file:
+            self.events_file.write(line + "\n")
+            self.events_file.flush()
+
+    # --- Helpers ---
+
+    async def docker(self, *args: str, timeout: float = 30.0) -> tuple[int, str]:
+        process = await asyncio.create_subprocess_exec(
+            "docker", *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT)
+        try:
+            stdout, _ = await asyncio.wait_for(process.communicate(), timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            return -1, "timeout"
+        return process.returncode, stdout.decode("utf-8", "replace").strip()
+
+    def in_grace_period(self) -> bool:
+        since = self.last_restart if self.last_restart is not None else self.started_at
+        return time.monotonic() - since < STARTUP_GRACE
+
+    def turn_interval(self) -> float:
+        """Expected seconds between ticks: the turn timeout, or slower if TPS is limited."""
+        interval = self.turn_timeout
+        if self.tps > 0:
+            interval = max(interval, 1.0 / self.tps)
+        return interval
+
+    def stall_threshold(self) -> float:
+        return max(self.stall_turns * self.turn_interval(), MIN_STALL_SECONDS)
+
+    # --- Watchers ---
+
+    async def watch_stream(self) -> None:
+        """Follow the battle stream as an observer, reconnecting as needed."""
+        while True:
+            try:
+                async for raw in observe(self.url, self.secret, name="Tank Royale Supervisor", decode=False,
+                                         on_connect=self.on_connect):
+                    now = time.monotonic()
+                    self.last_heartbeat = now
+                    if TICK_MARKER in raw:
+                        self.last_tick = now
+                        self.ticks += 1
+                        if not self.game_running:
+                            # Joined a game in progress
+                            self.game_running = True
+                            self.emit("game_detected")
+                        continue
+                    self.handle_message(json.loads(raw), now)
+            except Exception as e:  # OSError, bad JSON and the websockets ConnectionClosed hierarchy
+                if self.connected:
+                    self.emit("observer_disconnected", error=f"{type(e).__name__}: {e}")
+            self.connected = False
+            self.game_running = False
+            await asyncio.sleep(1.0)
+
+    def on_connect(self) -> None:
+        self.connected = True
+        self.last_heartbeat = time.monotonic()
+        self.emit("observer_connected", url=self.url)
+
+    def handle_message(self, message: dict, now: float) -> None:
+        message_type = message.get("type")
+        if message_type == "GameStartedEventForObserver":
+            setup = message.get("gameSetup") or {}
+            # turnTimeout is given in microseconds
+            self.turn_timeout = setup.get("turnTimeout", 30000) / 1_000_000
+            self.game_running = True
+            self.game_paused = False
+            self.last_tick = now
+            self.emit("game_started", participants=len(message.get("participants", [])),
+                      turn_timeout_ms=self.turn_timeout * 1000, stall_threshold_s=round(self.stall_threshold(), 2))
+        elif message_type in ("GameEndedEventForObserver", "GameAbortedEventForObserver"):
+            self.game_running = False
+            self.emit("game_ended", aborted=message_type == "GameAbortedEventForObserver", ticks=self.ticks)
+        elif message_type == "GamePausedEventForObserver":
+            self.game_paused = True
+        elif message_type == "GameResumedEventForObserver":
+            self.game_paused = False
+            self.last_tick = now
+        elif message_type == "TpsChangedEvent":
+            self.tps = float(message.get("tps", self.tps))
+            self.last_tick = now
+
+    async def watch_progress(self) -> None:
+        """Detect stalled games and lost heartbeats."""
+        while True:
+            await asyncio.sleep(STALL_CHECK_INTERVAL)
+            now = time.monotonic()
+            if self.game_running and not self.game_paused and self.connected:
+                silent = now - self.last_tick
+                if silent > self.stall_threshold():
+                    self.emit("stall_detected", seconds_without_tick=round(silent, 2),
+                              threshold_s=round(self.stall_threshold(), 2))
+                    await self.restart("stall")
+            elif not self.connected and not self.in_grace_period():
+                silent = now - self.last_heartbeat
+                if silent > HEARTBEAT_TIMEOUT:
+                    self.emit("heartbeat_lost", seconds=round(silent, 1))
+                    await self.restart("heartbeat")
+
+            if (self.failures and self.last_restart and not self.restart_failing
+                    and now - self.last_restart > BACKOFF_RESET_AFTER):
+                self.failures = 0
+                self.emit("backoff_reset")
+
+    async def watch_health(self) -> None:
+        """Follow the Docker state and health status of the container."""
+        previous = None
+        while True:
+            code, output = await self.docker("inspect", "--format", "{{json .State}}", self.container_name)
+            if code != 0:
+                state = {"Status": "missing"}
+            else:
+                try:
+                    state = json.loads(output)
+                except ValueError:
+                    state = {"Status": "unknown"}
+            status = state.get("Status")
+            health = (state.get("Health") or {}).get("Status")
+            if (status, health) != previous:
+                self.emit("container_state", status=status, health=health,
+                          restart_count=state.get("RestartCount"))
+                previous = (status, health)
+
+            if not self.in_grace_period():
+                if status != "running":
+                    await self.restart(f"container {status}")
+                elif health == "unhealthy":
+                    await self.restart("unhealthy")
+            await asyncio.sleep(HEALTH_INTERVAL)
+
+    async def watch_resources(self) -> None:
+        """Sample CPU and memory use of the container."""
+        while True:
+            code, output = await self.docker("stats", "--no-stream", "--format", "{{json .}}", self.container_name)
+            if code == 0 and output:
+                try:
+                    stats = json.loads(output.splitlines()[-1])
+                    memory_percent = float(stats.get("MemPerc", "0").rstrip("%") or 0)
+                    self.emit("resources", cpu=stats.get("CPUPerc"), memory=stats.get("MemUsage"),
+                              memory_percent=memory_percent, pids=stats.get("PIDs"))
+                    if memory_percent > MEMORY_WARNING_PERCENT:
+                        self.emit("memory_high", memory_percent=memory_percent)
+                except ValueError:
+                    pass
+            await asyncio.sleep(RESOURCE_INTERVAL)
+
+    # --- Recovery ---
+
+    async def restart(self, reason: str) -> None:
+        """Restart the server with exponential backoff between attempts.
+
+        A failed attempt leaves the progress state as it was, so the watchers
+        see the failure again and schedule the next attempt.
+        """
+        if self.restarting.locked():
+            return
+        async with self.restarting:
+            delay = min(BACKOFF_INITIAL * (2 ** self.failures), BACKOFF_MAX)
+            self.failures += 1
+            self.emit("restart_scheduled", reason=reason, attempt=self.failures, delay_s=delay)
+            await asyncio.sleep(delay)
+
+            promoted = False
+            if await self.has_standby():
+                try:
+                    promoted = await asyncio.to_thread(promote_quietly, self.container_name, self.work_dir)
+                except (subprocess.CalledProcessError, OSError) as e:
+                    self.emit("promotion_failed", reason=reason, error=f"{type(e).__name__}: {e}")
+            if not promoted:
+                code, output = await self.docker("restart", "-t", "5", self.container_name, timeout=60.0)
+                if code != 0:
+                    self.emit("restart_failed", reason=reason, error=output)
+                    self.restart_failing = True
+                    return
+            self.emit("restarted", reason=reason, standby=promoted)
+            self.restart_failing = False
+
+            self.last_restart = time.monotonic()
+            self.last_tick = self.last_heartbeat = self.last_restart
+            self.game_running = False
+
+    async def has_standby(self) -> bool:
+        code, output = await self.docker("ps", "-a", "-q", "-f", f"name=^{self.container_name}-standby-")
+        return code == 0 and bool(output)
+
+    async def run(self) -> None:
+        self.emit("supervisor_started", container=self.container_name, url=self.url, stall_turns=self.stall_turns)
+        await asyncio.gather(self.watch_stream(), self.watch_progress(), self.watch_health(), self.watch_resources())
+
+
+def promote_quietly(container_name: str, work_dir: Path) -> bool:
+    """run_server.promote_standby with its progress on stderr, keeping stdout JSON lines."""
+    from run_server import promote_standby
+    with contextlib.redirect_stdout(sys.stderr):
+        return promote_standby(container_name, work_dir)
+
+
+def run_supervisor(container_name: str = CONTAINER_NAME, url: str = DEFAULT_SERVER_URL,
+                   secret: Optional[str] = None, stall_turns: int = STALL_TURNS,
+                   events_path: Optional[Path] = None) -> None:
+    """Run the supervisor until interrupted."""
+    events_file = open(events_path, "a") if events_path else None
+    try:
+        supervisor = Supervisor(container_name, url, secret or default_secret(), stall_turns, events_file)
+        asyncio.run(supervisor.run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if events_file:
+            events_file.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Supervise the Tank Royale server container")
+    parser.add_argument("--container", default=CONTAINER_NAME, help=f"Container name (default: {CONTAINER_NAME})")
+    parser.add_argument("--url", default=DEFAULT_SERVER_URL, help=f"Server URL (default: {DEFAULT_SERVER_URL})")
+    parser.add_argument("--secret", help="Controller secret (default: from server.properties)")
+    parser.add_argument("--stall-turns", type=int, default=STALL_TURNS,
+                        help=f"Turn intervals without a tick before a game counts as stalled (default: {STALL_TURNS})")
+    parser.add_argument("--events-file", type=Path, help="Also append events to this file")
+    args = parser.parse_args()
+
+    run_supervisor(args.container, args.url, args.secret, args.stall_turns, args.events_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The server tools are standalone scripts; make them importable from the tests
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+from bot_host import BotSession, HostedBot, TurnScheduler
+
+TURN_TIMEOUT = 0.03
+
+
+class SlowBot(HostedBot):
+    name = "SlowBot"
+
+    def on_tick(self, tick):
+        # Burns more CPU than a whole turn allows
+        until = time.perf_counter() + 2 * TURN_TIMEOUT
+        while time.perf_counter() < until:
+            pass
+
+
+class FastBot(HostedBot):
+    name = "FastBot"
+
+    def __init__(self):
+        self.delays = []
+
+    def on_tick(self, tick):
+        # Seconds since the server sent the tick, which is what its turn timeout counts
+        self.delays.append(time.monotonic() - tick["sent"])
+
+
+def session(bot, index, scheduler):
+    session = BotSession(bot, index, "ws://unused", None, scheduler)
+    session.turn_timeout = TURN_TIMEOUT
+    scheduler.join(session)
+    return session
+
+
+def test_demoted_bot_does_not_make_others_late():
+    async def play():
+        scheduler = TurnScheduler()
+        slow = session(SlowBot(), 1, scheduler)
+        fast = session(FastBot(), 2, scheduler)
+        runner = asyncio.create_task(scheduler.run())
+
+        async def turn(number):
+            # The slow bot's tick arrives first; the fast bot's a moment later on its own socket
+            sent = time.monotonic()
+            scheduler.submit(slow, {"roundNumber": 1, "turnNumber": number, "sent": sent})
+            await asyncio.sleep(0.002)
+            scheduler.submit(fast, {"roundNumber": 1, "turnNumber": number, "sent": sent})
+            await asyncio.sleep(3 * TURN_TIMEOUT)
+
+        number = 0
+        while not slow.demoted:
+            number += 1
+            await turn(number)
+        fast.bot.delays.clear()
+        for _ in range(10):
+            number += 1
+            await turn(number)
+        runner.cancel()
+        return slow, fast
+
+    slow, fast = asyncio.run(play())
+    assert len(fast.bot.delays) == 10
+    assert max(fast.bot.delays) < TURN_TIMEOUT
+    assert slow.late >= 9
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+import columnar
+from battle_recording import RecordingWriter
+from columnar import ColumnStore, Predicate, decode, export, query
+
+BOTS = ["Walls", "SpinBot", "Corners"]
+TURNS = 20
+
+
+def record(path, seed):
+    with RecordingWriter(path) as writer:
+        writer.write({"type": "GameStartedEventForObserver", "gameSetup": {"arenaWidth": 800, "arenaHeight": 600},
+                      "participants": [{"id": i + 1, "name": name} for i, name in enumerate(BOTS)]})
+        for turn in range(1, TURNS + 1):
+            writer.write({"type": "TickEventForObserver", "roundNumber": 1, "turnNumber": turn,
+                          "botStates": [{"id": i + 1, "energy": 100.0 - turn - i, "x": 50.0 + seed + i * 100,
+                                         "y": 300.0, "direction": 0.0, "speed": 8.0}
+                                        for i in range(len(BOTS))]})
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(columnar, "GROUP_ROWS", 8)
+    record(tmp_path / "a" / "game.battle.gz", seed=0)
+    record(tmp_path / "b" / "game.battle.gz", seed=1)  # Same file name, different game
+    assert export(ColumnStore(tmp_path / "store"), [tmp_path / "a", tmp_path / "b"]) == 2
+    return ColumnStore(tmp_path / "store")
+
+
+def run(store, *predicates, select=("battle", "turn", "bot", "energy")):
+    return query(store, [Predicate(p, store) for p in predicates], select)
+
+
+def test_query_matches_rows(store):
+    rows, stats = run(store)
+    assert len(rows["turn"]) == 2 * TURNS * len(BOTS)
+    assert stats["groups_scanned"] == stats["groups"]
+
+    rows, _ = run(store, "bot=Walls", "energy<85")
+    assert set(decode(store, "bot", rows["bot"])) == {"Walls"}
+    assert sorted(rows["turn"].tolist()) == sorted(list(range(16, TURNS + 1)) * 2)
+    assert len(set(rows["battle"].tolist())) == 2
+
+
+@pytest.mark.parametrize("predicates", [("bot=Walls",), ("turn>=18",), ("bot=Corners", "energy<80")])
+def test_zone_maps_prune_row_groups(store, predicates):
+    everything, all_stats = run(store)
+    rows, stats = run(store, *predicates)
+    assert 0 < stats["groups_scanned"] < stats["groups"] == all_stats["groups"]
+    assert stats["rows_scanned"] < len(everything["turn"])
+
+    # Same rows as filtering everything
+    mask = np.ones(len(everything["turn"]), dtype=bool)
+    for text in predicates:
+        predicate = Predicate(text, store)
+        mask &= predicate.mask(everything[predicate.column])
+    assert sorted(zip(*(rows[c].tolist() for c in rows))) == \
+        sorted(zip(*(everything[c][mask].tolist() for c in everything)))
+
+
+def test_moved_or_copied_recordings_export_once(tmp_path, store):
+    (tmp_path / "c").mkdir()
+    (tmp_path / "c" / "copy.battle.gz").write_bytes((tmp_path / "a" / "game.battle.gz").read_bytes())
+    assert export(store, [tmp_path / "a", tmp_path / "c"]) == 0
@@ -0,0 +1,55 @@
+import gzip
+import json
+
+import pytest
+
+import battle_recording
+from battle_recording import GAME_STARTED, TICK, RecordingWriter, read_recording
+from event_index import EventIndex, EventIndexBuilder, build_index, index_path, seek_ticks
+
+
+def battle(ticks=300):
+    yield {"type": GAME_STARTED, "participants": [{"id": 1, "name": "Walls"}, {"id": 2, "name": "SpinBot"}]}
+    for turn in range(1, ticks + 1):
+        events = [{"type": "BotHitWallEvent", "victimId": 1 + turn % 2}] if turn % 7 == 0 else []
+        yield {"type": TICK, "roundNumber": 1, "turnNumber": turn, "events": events,
+               "botStates": [{"id": 1, "x": turn * 1.5, "y": 100.0}]}
+
+
+def record(path, messages):
+    builder = EventIndexBuilder()
+    with RecordingWriter(path) as writer:
+        for message in messages:
+            builder.add(message, writer.write(message))
+    builder.write_for(path, writer.members)
+    return writer
+
+
+@pytest.mark.parametrize("name", ["game.battle.gz", "game.battle.jsonl"])
+def test_seek_reads_indexed_ticks(tmp_path, monkeypatch, name):
+    monkeypatch.setattr(battle_recording, "MEMBER_BYTES", 2048)
+    path = tmp_path / name
+    writer = record(path, battle())
+    if path.suffix == ".gz":
+        assert len(writer.members) > 10
+    ticks = [m for m in read_recording(path) if m["type"] == TICK]
+
+    index = EventIndex.load(index_path(path))
+    hits = index.query("BotHitWallEvent", "Walls")
+    assert hits and all(ticks[o]["events"][0]["victimId"] == 1 for o in hits)
+    wanted = [0, 5, 6, 150, 151, 148, 299] + hits
+    assert dict(index.seek(0, wanted)) == {o: ticks[o] for o in wanted}
+
+
+def test_seek_without_members_and_without_offsets(tmp_path):
+    path = tmp_path / "legacy.battle.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for message in battle():
+            f.write(json.dumps(message) + "\n")
+    ticks = [m for m in read_recording(path) if m["type"] == TICK]
+    wanted = [3, 120, 299]
+
+    index = EventIndex.load(build_index(path))
+    assert index.members == [[[0, 0]]]
+    assert dict(index.seek(0, wanted)) == {o: ticks[o] for o in wanted}
+    assert dict(seek_ticks(path, wanted)) == {o: ticks[o] for o in wanted}
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from battle_recording import RecordingWriter
+from heatmap_cube import INITIAL_CAPACITY, HeatmapCube, ingest
+
+
+def grid(cube, value=1):
+    return np.full((cube.bins, cube.bins), value, dtype=np.float64)
+
+
+def test_add_grows_past_initial_capacity(tmp_path):
+    cube = HeatmapCube(tmp_path / "cube", bins=4)
+    keys = [("position", f"bot{i}", "melee", "800x600") for i in range(INITIAL_CAPACITY + 10)]
+    for i, key in enumerate(keys):
+        cube.add(key, grid(cube, i + 1))
+
+    assert cube.capacity == 2 * INITIAL_CAPACITY
+    assert len(cube.slots) == len(keys)
+    for i, key in enumerate(keys):
+        assert (cube.query(*key) == i + 1).all()
+
+    cube.flush()
+    reopened = HeatmapCube(tmp_path / "cube")
+    assert (reopened.query(*keys[-1]) == len(keys)).all()
+
+
+def test_merge_opens_source_read_only(tmp_path):
+    other = HeatmapCube(tmp_path / "other", bins=4)
+    other.add_battle("a", {("death", "Walls", "melee", "800x600"): grid(other, 2)})
+    other.flush()
+    before = {p.name: p.read_bytes() for p in (tmp_path / "other").iterdir()}
+
+    cube = HeatmapCube(tmp_path / "cube", bins=4)
+    assert cube.merge(HeatmapCube(tmp_path / "other", read_only=True)) == 1
+    assert (cube.query("death", "Walls") == 2).all()
+    assert {p.name: p.read_bytes() for p in (tmp_path / "other").iterdir()} == before
+
+    with pytest.raises(FileNotFoundError):
+        HeatmapCube(tmp_path / "missing", read_only=True)
+    assert not (tmp_path / "missing").exists()
+
+
+def record(path, x):
+    with RecordingWriter(path) as writer:
+        writer.write({"type": "GameStartedEventForObserver", "gameSetup": {"arenaWidth": 800, "arenaHeight": 600},
+                      "participants": [{"id": 1, "name": "Walls"}, {"id": 2, "name": "SpinBot"}]})
+        for turn in range(1, 4):
+            writer.write({"type": "TickEventForObserver", "roundNumber": 1, "turnNumber": turn,
+                          "botStates": [{"id": 1, "x": x, "y": 100.0}, {"id": 2, "x": 400.0, "y": 300.0}]})
+
+
+def test_moved_or_copied_recordings_count_once(tmp_path):
+    record(tmp_path / "a" / "game.battle.gz", x=100.0)
+    (tmp_path / "b").mkdir()
+    (tmp_path / "b" / "copy.battle.gz").write_bytes((tmp_path / "a" / "game.battle.gz").read_bytes())
+    # Same file name, different game
+    record(tmp_path / "c" / "game.battle.gz", x=200.0)
+
+    cube = HeatmapCube(tmp_path / "cube", bins=4)
+    assert ingest(cube, [tmp_path / "a", tmp_path / "b", tmp_path / "c"]) == 2
+    assert cube.query("position", "Walls").sum() == 6
+
+    (tmp_path / "a").rename(tmp_path / "moved")
+    assert ingest(cube, [tmp_path / "moved"]) == 0
+
+    # A cube built elsewhere from a copy shares the battle ids
+    other = HeatmapCube(tmp_path / "other", bins=4)
+    ingest(other, [tmp_path / "b"])
+    with pytest.raises(ValueError):
+        cube.merge(other)
@@ -0,0 +1,62 @@
+from datetime import datetime, timezone
+
+from log_sink import FrameIndex, LogSink, frames_in_window, load_index, read_window
+
+START = 1_700_000_000.0
+
+
+def line(i):
+    stamp = datetime.fromtimestamp(START + i, timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    return f"[{stamp}] INFO: line {i}\n".encode()
+
+
+def write_log(log_dir, lines=range(1000), **sink_options):
+    sink = LogSink(log_dir, frame_bytes=512, **sink_options)
+    for i in lines:
+        sink.add_line(line(i), now=START + i)
+    sink.close()
+
+
+def test_window_lookup_matches_linear_scan(tmp_path):
+    write_log(tmp_path)
+    index = FrameIndex(tmp_path)
+    assert index.entries == load_index(tmp_path)
+    assert len(index.entries) > 10
+
+    for since, until in [(None, None), (START + 100, START + 250), (START - 50, START + 3),
+                         (START + 999, None), (START + 5000, None), (None, START - 1)]:
+        expected = [e for e in index.entries
+                    if (since is None or e["last"] >= since) and (until is None or e["first"] <= until)]
+        assert index.window(since, until) == expected
+        assert frames_in_window(index.entries, since, until) == expected
+
+
+def test_read_window_lines(tmp_path):
+    write_log(tmp_path)
+    index = FrameIndex(tmp_path)
+    lines = list(read_window(tmp_path, START + 100, START + 110, index))
+    assert lines == [line(i) for i in range(100, 111)]
+
+
+def test_refresh_reads_only_new_entries(tmp_path):
+    write_log(tmp_path, lines=range(200))
+    index = FrameIndex(tmp_path)
+    before = len(index.entries)
+    write_log(tmp_path, lines=range(200, 400))
+
+    added = index.refresh()
+    assert added > 0 and len(index.entries) == before + added
+    assert index.entries == load_index(tmp_path)
+    assert index.refresh() == 0
+    assert index.reloads == 0
+
+
+def test_refresh_after_retention_rewrite(tmp_path):
+    write_log(tmp_path, lines=range(200), segment_bytes=1, max_segments=3)
+    index = FrameIndex(tmp_path)
+    write_log(tmp_path, lines=range(200, 260), segment_bytes=1, max_segments=3)
+
+    index.refresh()
+    assert index.reloads >= 1
+    assert index.entries == load_index(tmp_path)
+    assert index.lasts == [e["last"] for e in index.entries]
@@ -0,0 +1,69 @@
+import asyncio
+import json
+
+import websockets
+
+from observer_relay import GAME_ABORTED, GAME_ENDED, GAME_PAUSED, GAME_RESUMED, GAME_STARTED, TICK, \
+    TPS_CHANGED, GameSnapshot, ObserverRelay
+
+
+def raw(message_type, **fields):
+    return json.dumps({"type": message_type, **fields})
+
+
+def test_snapshot_orders_started_tps_tick_paused():
+    snapshot = GameSnapshot()
+    tps = raw(TPS_CHANGED, tps=30)
+    snapshot.update(tps, TPS_CHANGED)
+    assert snapshot.messages() == [tps]
+
+    started = raw(GAME_STARTED)
+    paused = raw(GAME_PAUSED)
+    snapshot.update(started, GAME_STARTED)
+    snapshot.update(raw(TICK, turnNumber=1), TICK)
+    snapshot.update(paused, GAME_PAUSED)
+    latest = raw(TICK, turnNumber=2)
+    snapshot.update(latest, TICK)
+    assert snapshot.messages() == [started, tps, latest, paused]
+
+    snapshot.update(raw(GAME_RESUMED), GAME_RESUMED)
+    assert snapshot.messages() == [started, tps, latest]
+
+
+def test_snapshot_cleared_on_end_and_abort():
+    snapshot = GameSnapshot()
+    tps = raw(TPS_CHANGED, tps=30)
+    snapshot.update(tps, TPS_CHANGED)
+    for end in (GAME_ENDED, GAME_ABORTED):
+        snapshot.update(raw(GAME_STARTED), GAME_STARTED)
+        snapshot.update(raw(TICK, turnNumber=1), TICK)
+        snapshot.update(raw(GAME_PAUSED), GAME_PAUSED)
+        snapshot.update(raw(end), end)
+        assert snapshot.messages() == [tps]
+
+
+def handshake_closes(relay, handshake):
+    """Connect as a client and return the close code, or None if the relay accepted it."""
+    async def connect():
+        async with websockets.serve(relay.handle_client, "127.0.0.1", 0) as server:
+            port = server.sockets[0].getsockname()[1]
+            async with websockets.connect(f"ws://127.0.0.1:{port}") as ws:
+                await ws.recv()
+                await ws.send(json.dumps(handshake))
+                try:
+                    await asyncio.wait_for(ws.recv(), 0.2)
+                except asyncio.TimeoutError:
+                    return None
+                except websockets.ConnectionClosed as e:
+                    return e.rcvd.code
+    return asyncio.run(connect())
+
+
+def test_client_secret_is_opt_in():
+    # The frontend's handshake carries no secret
+    frontend = {"type": "ObserverHandshake", "name": "frontend"}
+    assert handshake_closes(ObserverRelay("ws://unused", secret="controller"), frontend) is None
+
+    relay = ObserverRelay("ws://unused", secret="controller", client_secret="relay")
+    assert handshake_closes(relay, frontend) == 1008
+    assert handshake_closes(relay, {**frontend, "secret": "relay"}) is None
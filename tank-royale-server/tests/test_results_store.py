@@ -0,0 +1,70 @@
+import pytest
+
+from results_store import K_FACTOR, ResultsStore, elo_deltas
+
+
+def game_ended(*ranked):
+    return {
+        "type": "GameEndedEventForObserver",
+        "numberOfRounds": 10,
+        "results": [
+            {"id": index + 1, "name": name, "version": "1.0", "rank": rank, "totalScore": 100 - rank}
+            for index, (name, rank) in enumerate(ranked)
+        ],
+    }
+
+
+def last_tick(turn, energy=50.0):
+    return {
+        "type": "TickEventForObserver",
+        "roundNumber": 10,
+        "turnNumber": turn,
+        "botStates": [{"id": 2, "x": 10.0, "y": 20.0, "energy": 0.0},
+                      {"id": 1, "x": 400.0, "y": 300.0, "energy": energy}],
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    with ResultsStore(tmp_path / "results.db") as store:
+        yield store
+
+
+def test_elo_deltas_two_equal_bots():
+    assert elo_deltas([1500, 1500], [1, 2]) == pytest.approx([K_FACTOR / 2, -K_FACTOR / 2])
+    assert elo_deltas([1500, 1500], [1, 1]) == pytest.approx([0, 0])
+
+
+def test_elo_deltas_melee_sum_to_zero():
+    deltas = elo_deltas([1600, 1500, 1400, 1500], [2, 1, 4, 3])
+    assert sum(deltas) == pytest.approx(0)
+    assert deltas[1] > 0 > deltas[2]
+    assert elo_deltas([1500], [1]) == [0.0]
+
+
+def test_add_result_updates_ratings_and_head_to_head(store):
+    assert store.add_result(game_ended(("Walls", 1), ("SpinBot", 2)), last_tick=last_tick(100))
+    assert store.add_result(game_ended(("Walls", 1), ("SpinBot", 2)), last_tick=last_tick(200))
+
+    board = {row[0]: row[1:] for row in store.leaderboard()}
+    walls_rating, walls_games, walls_wins = board["Walls"][:3]
+    assert walls_rating > 1500 > board["SpinBot"][0]
+    assert walls_rating - 1500 == pytest.approx(1500 - board["SpinBot"][0])
+    assert (walls_games, walls_wins) == (2, 2)
+    assert store.head_to_head("Walls", "SpinBot") == (2, 0, 0)
+    assert store.head_to_head("SpinBot", "Walls") == (0, 2, 0)
+
+
+def test_same_game_live_and_from_recording_is_stored_once(store):
+    ended = game_ended(("Walls", 1), ("SpinBot", 2))
+    game_started = {"type": "GameStartedEventForObserver", "gameSetup": {"gameType": "1v1"},
+                    "participants": [{"id": 1, "sessionId": "a"}, {"id": 2, "sessionId": "b"}]}
+
+    # The live observer joined after GameStarted; the recording has it
+    assert store.add_result(ended, source="ws://localhost", last_tick=last_tick(100))
+    assert not store.add_result(ended, game_started, source="battle.gz", last_tick=last_tick(100))
+    assert store.db.execute("SELECT COUNT(*) FROM matches").fetchone()[0] == 1
+
+    # Identical results but a different ending is another game
+    assert store.add_result(ended, game_started, last_tick=last_tick(100, energy=49.0))
+    assert store.db.execute("SELECT COUNT(*) FROM matches").fetchone()[0] == 2
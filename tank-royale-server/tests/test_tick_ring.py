@@ -0,0 +1,88 @@
+import os
+import uuid
+
+import pytest
+
+from tick_ring import TRUNCATED_BOTS, RingReader, TickRing
+
+
+def tick(turn, bots=2, events=None):
+    return {
+        "type": "TickEventForObserver",
+        "roundNumber": 1,
+        "turnNumber": turn,
+        "botStates": [{"id": i + 1, "energy": 100.0 - turn, "x": 10.0 * i, "y": 20.0, "direction": 0.0,
+                       "gunDirection": 0.0, "radarDirection": 0.0, "speed": 8.0, "gunHeat": 0.0}
+                      for i in range(bots)],
+        "bulletStates": [{"bulletId": turn, "ownerId": 1, "power": 1.0, "x": 1.0, "y": 2.0, "direction": 90.0}],
+        "events": events or [],
+    }
+
+
+@pytest.fixture
+def ring():
+    ring = TickRing.create(f"tank-royale-test-{os.getpid()}-{uuid.uuid4().hex[:8]}", slots=4, max_bots=4,
+                           max_bullets=4, event_bytes=256)
+    yield ring
+    ring.close()
+
+
+def test_publish_and_read_in_place(ring):
+    reader = RingReader(ring)
+    assert reader.poll() is None
+
+    events = [{"type": "BulletFiredEvent", "turnNumber": 1}]
+    assert ring.publish_tick(tick(1, events=events)) == 1
+    other = TickRing.attach(ring.shm.name)
+    view = RingReader(other, from_oldest=True).poll()
+    assert (view.seq, view.round, view.turn) == (1, 1, 1)
+    assert view.bots["id"].tolist() == [1, 2]
+    assert view.bots["energy"].tolist() == [99.0, 99.0]
+    assert view.bullets["direction"].tolist() == [90.0]
+    assert view.events() == events
+    assert view.valid()
+    del view
+    other.close()
+
+    assert reader.poll().seq == 1
+    assert reader.poll() is None
+    assert (reader.read, reader.overruns) == (1, 0)
+
+
+def test_overrun_skips_to_oldest_slot(ring):
+    reader = RingReader(ring)
+    for turn in range(1, 11):
+        ring.publish_tick(tick(turn))
+
+    assert reader.lag() == 10
+    view = reader.poll()
+    assert (view.seq, view.turn) == (7, 7)
+    assert reader.overruns == 6
+    assert [reader.poll().seq for _ in range(3)] == [8, 9, 10]
+    assert reader.poll() is None
+
+
+def test_reused_slot_is_invalid(ring):
+    ring.publish_tick(tick(1))
+    view = RingReader(ring, from_oldest=True).poll()
+    for turn in range(2, 2 + ring.capacity):
+        ring.publish_tick(tick(turn))
+    assert not view.valid()
+    assert view.turn == 1  # Read before the slot was reused
+
+
+def test_slot_being_written_counts_as_overrun(ring):
+    reader = RingReader(ring)
+    ring.publish_tick(tick(1))
+    ring.publish_tick(tick(2))
+    ring.slots["seq"][1 % ring.capacity] = 0  # As if the writer were still filling the slot
+
+    assert reader.poll().seq == 2
+    assert (reader.read, reader.overruns) == (1, 1)
+
+
+def test_too_many_bots_are_truncated(ring):
+    ring.publish_tick(tick(1, bots=6))
+    view = RingReader(ring, from_oldest=True).poll()
+    assert view.truncated == TRUNCATED_BOTS
+    assert len(view.bots) == 4
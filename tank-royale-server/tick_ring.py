@@ -0,0 +1,558 @@
+#!/usr/bin/env python3
+"""
+tick_ring.py
+------------
+Shared-memory tick ring for local consumers of one battle stream.
+
+One ingest process observes the server (or replays a recording), decodes
+each tick once and writes it into a fixed-layout ring of numpy records in
+multiprocessing.shared_memory. Any number of local consumers (recorder,
+metrics, analytics, a dashboard) attach to the ring by name and read the
+records in place, each at its own pace. The server sees one observer no
+matter how many consumers there are, and the ingest process does not know
+or care how many are attached.
+
+Layout of the segment:
+
+- header: layout sizes, the sequence number of the newest tick, the number
+  of games started and a seqlock for the game info
+- game info: the current GameStartedEventForObserver and, once the game is
+  over, its GameEndedEventForObserver, as JSON
+- slots: one record per tick with round, turn, bot states, bullet states and
+  the tick's events as JSON
+
+Every slot carries the sequence number of the tick in it. The writer clears
+it before writing the slot and sets it when done, so a reader knows a slot
+is complete and still holds its tick when the number matches before and
+after reading. A consumer that falls more than a ring behind skips to the
+oldest tick still in the ring and counts the skipped ones as overruns.
+
+Usage:
+    python tick_ring.py ingest                              # Observe ws://localhost:7655
+    python tick_ring.py ingest --replay recordings/battle-20250101-120000.battle.gz --tps 30
+    python tick_ring.py tail                                # Follow the ring as a consumer
+    python tick_ring.py info
+"""
+import argparse
+import asyncio
+import json
+import operator
+import os
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+from pathlib import Path
+from typing import Iterator, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    print("Error: 'numpy' library is not installed.")
+    print("Please install it by running: pip install numpy")
+    print("Or install all dependencies: pip install -r requirements.txt")
+    sys.exit(1)
+
+from battle_recording import GAME_ABORTED, GAME_ENDED, GAME_STARTED, TICK, read_recording
+
+DEFAULT_RING_NAME = "tank-royale-ticks"
+DEFAULT_SLOTS = 1024
+DEFAULT_MAX_BOTS = 64
+DEFAULT_MAX_BULLETS = 512
+DEFAULT_EVENT_BYTES = 8192
+GAME_INFO_BYTES = 256 * 1024
+POLL_INTERVAL = 0.001        # Seconds a consumer sleeps when it has caught up
+
+RING_MAGIC = 0x54524B31      # "TRK1"
+RING_VERSION = 1
+
+HEADER_DTYPE = np.dtype([
+    ("magic", "<u4"),
+    ("version", "<u4"),
+    ("slots", "<u4"),
+    ("max_bots", "<u4"),
+    ("max_bullets", "<u4"),
+    ("event_bytes", "<u4"),
+    ("writer_pid", "<u4"),
+    ("closed", "<u4"),
+    ("head", "<u8"),            # Sequence number of the newest complete tick; 0 before the first
+    ("games", "<u8"),           # Games started so far
+    ("info_seq", "<u8"),        # Seqlock for the game info: odd while it is being written
+    ("info_length", "<u8"),
+], align=True)
+HEADER_BYTES = 128
+
+BOT_DTYPE = np.dtype([
+    ("id", "<i4"),
+    ("energy", "<f8"),
+    ("x", "<f8"),
+    ("y", "<f8"),
+    ("direction", "<f8"),
+    ("gun_direction", "<f8"),
+    ("radar_direction", "<f8"),
+    ("speed", "<f8"),
+    ("gun_heat", "<f8"),
+], align=True)
+BOT_FIELDS = ("id", "energy", "x", "y", "direction", "gunDirection", "radarDirection", "speed", "gunHeat")
+bot_row = operator.itemgetter(*BOT_FIELDS)
+
+BULLET_DTYPE = np.dtype([
+    ("bullet_id", "<i4"),
+    ("owner_id", "<i4"),
+    ("power", "<f8"),
+    ("x", "<f8"),
+    ("y", "<f8"),
+    ("direction", "<f8"),
+], align=True)
+BULLET_FIELDS = ("bulletId", "ownerId", "power", "x", "y", "direction")
+bullet_row = operator.itemgetter(*BULLET_FIELDS)
+
+TRUNCATED_BOTS = 1
+TRUNCATED_BULLETS = 2
+TRUNCATED_EVENTS = 4
+
+# ANSI Color Codes
+class Colors:
+    RESET = "\033[0m"
+    BOLD = "\033[1m"
+    GREEN = "\033[92m"
+    BLUE = "\033[94m"
+    YELLOW = "\033[93m"
+    RED = "\033[91m"
+    CYAN = "\033[96m"
+
+def print_step(message: str) -> None:
+    print(f"{Colors.CYAN}{Colors.BOLD}==> {message}{Colors.RESET}")
+
+def print_success(message: str) -> None:
+    print(f"{Colors.GREEN}{Colors.BOLD}✓ {message}{Colors.RESET}")
+
+def print_warning(message: str) -> None:
+    print(f"{Colors.YELLOW}⚠ {message}{Colors.RESET}")
+
+def print_error(message: str) -> None:
+    print(f"{Colors.RED}✗ {message}{Colors.RESET}")
+
+def print_info(message: str) -> None:
+    print(f"{Colors.BLUE}  {message}{Colors.RESET}")
+
+
+def slot_dtype(max_bots: int, max_bullets: int, event_bytes: int) -> np.dtype:
+    return np.dtype([
+        ("seq", "<u8"),             # Sequence number of the tick in the slot; 0 while it is written
+        ("game", "<u8"),
+        ("round", "<i4"),
+        ("turn", "<i4"),
+        ("bot_count", "<u4"),
+        ("bullet_count", "<u4"),
+        ("event_length", "<u4"),
+        ("truncated", "<u4"),       # TRUNCATED_* flags when the tick did not fit
+        ("bots", BOT_DTYPE, (max_bots,)),
+        ("bullets", BULLET_DTYPE, (max_bullets,)),
+        ("events", "u1", (event_bytes,)),
+    ], align=True)
+
+
+def state_rows(states: list[dict], row, fields: tuple[str, ...]) -> list[tuple]:
+    """Field values of each state in dtype order; missing optional fields become 0."""
+    try:
+        return list(map(row, states))
+    except KeyError:
+        return [tuple(state.get(field, 0) for field in fields) for state in states]
+
+
+def attach_segment(name: str) -> shared_memory.SharedMemory:
+    """Open an existing segment without letting this process's exit remove it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 every attaching process registers the segment
+        # with its resource tracker, which unlinks it when the process exits
+        shm = shared_memory.SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class TickRing:
+    """The shared segment seen as a header, a game info area and an array of slots."""
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool) -> None:
+        self.shm = shm
+        self.owner = owner
+        self.header = np.ndarray((), dtype=HEADER_DTYPE, buffer=shm.buf)
+        if self.header["magic"] != RING_MAGIC or self.header["version"] != RING_VERSION:
+            raise ValueError(f"Shared memory '{shm.name}' is not a tick ring (version {RING_VERSION})")
+        self.capacity = int(self.header["slots"])
+        self.dtype = slot_dtype(int(self.header["max_bots"]), int(self.header["max_bullets"]),
+                                int(self.header["event_bytes"]))
+        self.info = np.ndarray((GAME_INFO_BYTES,), dtype=np.uint8, buffer=shm.buf, offset=HEADER_BYTES)
+        self.slots = np.ndarray((self.capacity,), dtype=self.dtype, buffer=shm.buf,
+                                offset=HEADER_BYTES + GAME_INFO_BYTES)
+
+    @staticmethod
+    def segment_size(slots: int, max_bots: int, max_bullets: int, event_bytes: int) -> int:
+        return HEADER_BYTES + GAME_INFO_BYTES + slots * slot_dtype(max_bots, max_bullets, event_bytes).itemsize
+
+    @classmethod
+    def create(cls, name: str = DEFAULT_RING_NAME, slots: int = DEFAULT_SLOTS, max_bots: int = DEFAULT_MAX_BOTS,
+               max_bullets: int = DEFAULT_MAX_BULLETS, event_bytes: int = DEFAULT_EVENT_BYTES) -> "TickRing":
+        """Create the segment for the ingest process. Fails if a ring with the name exists."""
+        size = cls.segment_size(slots, max_bots, max_bullets, event_bytes)
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((), dtype=HEADER_DTYPE, buffer=shm.buf)
+        header[()] = (RING_MAGIC, RING_VERSION, slots, max_bots, max_bullets, event_bytes,
+                      0, 0, 0, 0, 0, 0)
+        del header
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str = DEFAULT_RING_NAME) -> "TickRing":
+        return cls(attach_segment(name), owner=False)
+
+    def close(self) -> None:
+        # The numpy views must be gone before the buffer can be released
+        del self.header, self.info, self.slots
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    @property
+    def head(self) -> int:
+        return int(self.header["head"])
+
+    @property
+    def closed(self) -> bool:
+        return bool(self.header["closed"])
+
+    # --- Writer side ---
+
+    def publish_tick(self, tick: dict) -> int:
+        """Write a decoded TickEventForObserver into the next slot and return its sequence number."""
+        seq = int(self.header["head"]) + 1
+        slot = self.slots[seq % self.capacity:seq % self.capacity + 1]
+        slot["seq"] = 0
+        truncated = 0
+
+        bots = tick.get("botStates", [])
+        max_bots = slot["bots"].shape[1]
+        if len(bots) > max_bots:
+            bots, truncated = bots[:max_bots], truncated | TRUNCATED_BOTS
+        if bots:
+            slot["bots"][0, :len(bots)] = state_rows(bots, bot_row, BOT_FIELDS)
+
+        bullets = tick.get("bulletStates", [])
+        max_bullets = slot["bullets"].shape[1]
+        if len(bullets) > max_bullets:
+            bullets, truncated = bullets[:max_bullets], truncated | TRUNCATED_BULLETS
+        if bullets:
+            slot["bullets"][0, :len(bullets)] = state_rows(bullets, bullet_row, BULLET_FIELDS)
+
+        events = tick.get("events")
+        encoded = json.dumps(events, separators=(",", ":")).encode() if events else b""
+        if len(encoded) > slot["events"].shape[1]:
+            encoded, truncated = b"", truncated | TRUNCATED_EVENTS
+        if encoded:
+            slot["events"][0, :len(encoded)] = np.frombuffer(encoded, dtype=np.uint8)
+
+        slot["game"] = self.header["games"]
+        slot["round"] = tick.get("roundNumber", 0)
+        slot["turn"] = tick.get("turnNumber", 0)
+        slot["bot_count"] = len(bots)
+        slot["bullet_count"] = len(bullets)
+        slot["event_length"] = len(encoded)
+        slot["truncated"] = truncated
+        # Publish: the slot first, then the head. Stores are not reordered on
+        # x86; weakly ordered CPUs rely on the readers' check of seq afterwards.
+        slot["seq"] = seq
+        self.header["head"] = seq
+        return seq
+
+    def publish_game(self, started: dict, ended: Optional[dict] = None) -> None:
+        """Replace the game info. A new game is counted when ended is None."""
+        encoded = json.dumps({"started": started, "ended": ended}, separators=(",", ":")).encode()
+        if len(encoded) > GAME_INFO_BYTES:
+            raise ValueError(f"Game info of {len(encoded)} bytes does not fit in {GAME_INFO_BYTES}")
+        self.header["info_seq"] += 1
+        self.info[:len(encoded)] = np.frombuffer(encoded, dtype=np.uint8)
+        self.header["info_length"] = len(encoded)
+        if ended is None:
+            self.header["games"] += 1
+        self.header["info_seq"] += 1
+
+    # --- Reader side ---
+
+    def game_info(self) -> dict:
+        """The current game's started and ended events; both None before the first game."""
+        while True:
+            before = int(self.header["info_seq"])
+            if before % 2 == 0:
+                length = int(self.header["info_length"])
+                encoded = self.info[:length].tobytes()
+                if int(self.header["info_seq"]) == before:
+                    return json.loads(encoded) if length else {"started": None, "ended": None}
+            time.sleep(POLL_INTERVAL)
+
+
+class TickView:
+    """A tick read in place from its slot.
+
+    The arrays are views into shared memory, valid until the writer reuses
+    the slot a ring later. Check valid() after using them; when it returns
+    False the data may have been overwritten while it was read.
+    """
+
+    def __init__(self, ring: TickRing, seq: int) -> None:
+        self.ring = ring
+        self.seq = seq
+        self.slot = ring.slots[seq % ring.capacity]
+        self.game = int(self.slot["game"])
+        self.round = int(self.slot["round"])
+        self.turn = int(self.slot["turn"])
+        self.truncated = int(self.slot["truncated"])
+        self.bots = self.slot["bots"][:int(self.slot["bot_count"])]
+        self.bullets = self.slot["bullets"][:int(self.slot["bullet_count"])]
+        self.event_length = int(self.slot["event_length"])
+
+    def events(self) -> list[dict]:
+        """The tick's events, decoded from JSON (the only field not stored as numbers)."""
+        if not self.event_length:
+            return []
+        return json.loads(self.slot["events"][:self.event_length].tobytes())
+
+    def valid(self) -> bool:
+        return int(self.ring.slots["seq"][self.seq % self.ring.capacity]) == self.seq
+
+    def copy(self) -> dict:
+        """The tick as plain arrays owned by the caller."""
+        return {"seq": self.seq, "game": self.game, "round": self.round, "turn": self.turn,
+                "bots": self.bots.copy(), "bullets": self.bullets.copy(), "events": self.events()}
+
+
+class RingReader:
+    """One consumer's position in the ring."""
+
+    def __init__(self, ring: TickRing, from_oldest: bool = False) -> None:
+        self.ring = ring
+        head = ring.head
+        self.next_seq = max(1, head - ring.capacity + 1) if from_oldest else head + 1
+        self.read = 0
+        self.overruns = 0
+
+    def lag(self) -> int:
+        """Ticks published but not read yet."""
+        return max(0, self.ring.head - self.next_seq + 1)
+
+    def poll(self) -> Optional[TickView]:
+        """The next tick, or None when the reader has caught up with the writer."""
+        while True:
+            head = self.ring.head
+            if self.next_seq > head:
+                return None
+            oldest = head - self.ring.capacity + 1
+            if self.next_seq < oldest:
+                self.overruns += oldest - self.next_seq
+                self.next_seq = oldest
+            view = TickView(self.ring, self.next_seq)
+            self.next_seq += 1
+            if view.valid():
+                self.read += 1
+                return view
+            # The writer reused the slot while it was being read
+            self.overruns += 1
+
+    def follow(self, idle_timeout: Optional[float] = None) -> Iterator[TickView]:
+        """Yield ticks as they are published, until the writer closes the ring or goes quiet."""
+        idle_since = time.monotonic()
+        while True:
+            view = self.poll()
+            if view is not None:
+                idle_since = time.monotonic()
+                yield view
+                continue
+            if self.ring.closed:
+                return
+            if idle_timeout is not None and time.monotonic() - idle_since > idle_timeout:
+                return
+            time.sleep(POLL_INTERVAL)
+
+
+# --- Ingest ---
+
+class Ingest:
+    """Feeds decoded observer messages into the ring."""
+
+    def __init__(self, ring: TickRing) -> None:
+        self.ring = ring
+        self.started: Optional[dict] = None
+        self.ticks = 0
+        self.truncated = 0
+
+    def feed(self, message: dict) -> None:
+        message_type = message.get("type")
+        if message_type == TICK:
+            self.ring.publish_tick(message)
+            self.ticks += 1
+        elif message_type == GAME_STARTED:
+            self.started = message
+            self.ring.publish_game(message)
+            print_step(f"Game {int(self.ring.header['games'])} started")
+        elif message_type in (GAME_ENDED, GAME_ABORTED) and self.started is not None:
+            self.ring.publish_game(self.started, message)
+            print_info(f"Game {'aborted' if message_type == GAME_ABORTED else 'ended'} after {self.ticks} ticks")
+
+
+async def ingest_live(ingest: Ingest, url: str, secret: Optional[str]) -> None:
+    from observer import observe
+    while True:
+        try:
+            async for message in observe(url, secret, name="Tank Royale Tick Ring",
+                                         on_connect=lambda: print_success(f"Observing {url}")):
+                ingest.feed(message)
+        except Exception as e:  # OSError, bad JSON and the websockets ConnectionClosed hierarchy
+            print_warning(f"Connection lost: {type(e).__name__}: {e}")
+        await asyncio.sleep(1.0)
+
+
+def ingest_replay(ingest: Ingest, path: Path, tps: float) -> None:
+    interval = 1.0 / tps if tps > 0 else 0.0
+    next_time = time.perf_counter()
+    for message in read_recording(path):
+        if interval and message.get("type") == TICK:
+            next_time += interval
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        ingest.feed(message)
+
+
+def run_ingest(args) -> None:
+    try:
+        ring = TickRing.create(args.name, args.slots, args.max_bots, args.max_bullets, args.event_bytes)
+    except FileExistsError:
+        print_error(f"A ring named '{args.name}' already exists; is another ingest running?")
+        print_info(f"Remove a stale one with: python tick_ring.py remove --name {args.name}")
+        sys.exit(1)
+    ring.header["writer_pid"] = os.getpid()
+    print_success(f"Ring '{args.name}': {ring.capacity} slots of {ring.dtype.itemsize / 1024:.1f} KiB "
+                  f"({ring.shm.size / (1024 * 1024):.1f} MiB)")
+
+    ingest = Ingest(ring)
+    started = time.perf_counter()
+    try:
+        if args.replay:
+            print_step(f"Replaying {args.replay}")
+            ingest_replay(ingest, args.replay, args.tps)
+        else:
+            from observer import default_secret
+            asyncio.run(ingest_live(ingest, args.url, args.secret or default_secret()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ring.header["closed"] = 1
+        elapsed = time.perf_counter() - started
+        print_info(f"Published {ingest.ticks} ticks in {elapsed:.1f}s")
+        if args.linger:
+            # Give consumers time to notice the closed flag and drain the ring
+            time.sleep(args.linger)
+        ring.close()
+
+
+# --- Commands ---
+
+def run_tail(args) -> None:
+    try:
+        ring = TickRing.attach(args.name)
+    except FileNotFoundError:
+        print_error(f"No ring named '{args.name}'; start one with: python tick_ring.py ingest")
+        sys.exit(1)
+    reader = RingReader(ring, from_oldest=args.from_oldest)
+    print_success(f"Attached to '{args.name}' at tick {reader.next_seq}")
+
+    game = -1
+    last_report = time.monotonic()
+    last_read = 0
+    try:
+        for view in reader.follow():
+            if view.game != game:
+                game = view.game
+                started = ring.game_info()["started"] or {}
+                names = [p.get("name", "?") for p in started.get("participants", [])]
+                print_step(f"Game {game}: {', '.join(names) or 'participants unknown'}")
+            if view.truncated:
+                print_warning(f"Tick {view.seq} did not fit the ring layout (flags {view.truncated})")
+            now = time.monotonic()
+            if now - last_report >= 1.0:
+                alive = int(np.count_nonzero(view.bots["energy"] > 0)) if len(view.bots) else 0
+                if view.valid():
+                    print_info(f"round {view.round} turn {view.turn}: {alive} bots alive, "
+                               f"{len(view.bullets)} bullets | {(reader.read - last_read) / (now - last_report):.0f} "
+                               f"ticks/s, lag {reader.lag()}, overruns {reader.overruns}")
+                last_report, last_read = now, reader.read
+    except KeyboardInterrupt:
+        pass
+    print_info(f"Read {reader.read} ticks, {reader.overruns} overruns")
+    ring.close()
+
+
+def run_info(args) -> None:
+    try:
+        ring = TickRing.attach(args.name)
+    except FileNotFoundError:
+        print_error(f"No ring named '{args.name}'")
+        sys.exit(1)
+    header = ring.header
+    print_step(f"Ring '{args.name}'")
+    print_info(f"Slots: {ring.capacity} x {ring.dtype.itemsize / 1024:.1f} KiB "
+               f"(up to {int(header['max_bots'])} bots, {int(header['max_bullets'])} bullets, "
+               f"{int(header['event_bytes'])} bytes of events)")
+    print_info(f"Writer: pid {int(header['writer_pid'])}{' (closed)' if ring.closed else ''}")
+    print_info(f"Ticks published: {ring.head}, games started: {int(header['games'])}")
+    ring.close()
+
+
+def run_remove(args) -> None:
+    try:
+        shm = shared_memory.SharedMemory(name=args.name)
+    except FileNotFoundError:
+        print_info(f"No ring named '{args.name}'")
+        return
+    shm.close()
+    shm.unlink()
+    print_success(f"Removed ring '{args.name}'")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared-memory tick ring for local consumers")
+    parser.add_argument("--name", default=DEFAULT_RING_NAME, help=f"Shared memory name (default: {DEFAULT_RING_NAME})")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    ingest_parser = subparsers.add_parser("ingest", help="Observe the server and publish ticks to the ring")
+    ingest_parser.add_argument("--url", default="ws://localhost:7655", help="Server URL (default: ws://localhost:7655)")
+    ingest_parser.add_argument("--secret", help="Controller secret (default: from server.properties)")
+    ingest_parser.add_argument("--replay", type=Path, help="Publish a recording instead of observing the server")
+    ingest_parser.add_argument("--tps", type=float, default=0, help="Replay speed in ticks per second (default: unthrottled)")
+    ingest_parser.add_argument("--slots", type=int, default=DEFAULT_SLOTS, help=f"Ticks kept in the ring (default: {DEFAULT_SLOTS})")
+    ingest_parser.add_argument("--max-bots", type=int, default=DEFAULT_MAX_BOTS)
+    ingest_parser.add_argument("--max-bullets", type=int, default=DEFAULT_MAX_BULLETS)
+    ingest_parser.add_argument("--event-bytes", type=int, default=DEFAULT_EVENT_BYTES)
+    ingest_parser.add_argument("--linger", type=float, default=1.0,
+                               help="Seconds to keep the ring after the last tick (default: 1)")
+
+    tail_parser = subparsers.add_parser("tail", help="Follow the ring and report rate, lag and overruns")
+    tail_parser.add_argument("--from-oldest", action="store_true", help="Start at the oldest tick in the ring")
+
+    subparsers.add_parser("info", help="Show the ring layout and counters")
+    subparsers.add_parser("remove", help="Remove a ring left behind by a crashed ingest")
+
+    args = parser.parse_args()
+    if args.command == "ingest":
+        run_ingest(args)
+    elif args.command == "tail":
+        run_tail(args)
+    elif args.command == "info":
+        run_info(args)
+    elif args.command == "remove":
+        run_remove(args)
+
+
+if __name__ == "__main__":
+    main()
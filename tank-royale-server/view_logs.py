@@ -12,6 +12,8 @@ Options:
     --tail N           Show last N lines (default: 50)
     --container        Show container logs
     --server          Show server application logs
+    --since, --until  Only show server logs in this time window (e.g. 15m, 2h,
+                      "2025-01-01 12:00"), reading only the frames needed
     --startup         Show container startup logs
     --all             Show all available logs
     --help, -h        Show this help message
@@ -22,6 +24,10 @@ import subprocess
 import sys
 import time
 from pathlib import Path
+from typing import Optional
+
+# Server logs are stored by log_sink.py inside the container
+LOG_SINK = ["python3", "/app/log_sink.py", "--dir", "/app/logs/server"]
 
 # ANSI Color Codes
 class Colors:
@@ -62,7 +68,7 @@ def run_command(cmd: list[str], check: bool = True) -> subprocess.CompletedProce
 
 def check_container_running() -> bool:
     """Check if the Tank Royale container is running."""
-    result = run_command(["docker", "ps", "-q", "-f", "name=tank-royale-server"], check=False)
+    result = run_command(["docker", "ps", "-q", "-f", "name=^tank-royale-server$"], check=False)
     return bool(result.stdout.strip())
 
 def view_container_logs(follow: bool = False, tail: int = 50) -> None:
@@ -94,18 +100,22 @@ def view_container_logs(follow: bool = False, tail: int = 50) -> None:
     except KeyboardInterrupt:
         print_info("\nStopped following logs")
 
-def view_server_logs(follow: bool = False, tail: int = 50) -> None:
+def view_server_logs(follow: bool = False, tail: int = 50,
+                     since: Optional[str] = None, until: Optional[str] = None) -> None:
     """View Tank Royale server application logs."""
     if not check_container_running():
         print_error("Tank Royale server container is not running!")
         return
     
+    if since or until:
+        view_server_log_window(since, until)
+        return
+
     print_step(f"🎮 Server Application Logs {'(following)' if follow else f'(last {tail} lines)'}")
     
-    cmd = ["docker", "exec", "tank-royale-server", "tail"]
+    cmd = ["docker", "exec", "tank-royale-server", *LOG_SINK, "tail", "-n", str(tail)]
     if follow:
         cmd.append("-f")
-    cmd.extend(["-n", str(tail), "/app/logs/server.log"])
     
     try:
         if follow:
@@ -121,6 +131,23 @@ def view_server_logs(follow: bool = False, tail: int = 50) -> None:
     except KeyboardInterrupt:
         print_info("\nStopped following logs")
 
+def view_server_log_window(since: Optional[str], until: Optional[str]) -> None:
+    """View the server logs of a time window, decompressing only the frames it covers."""
+    window = f"since {since or 'start'} until {until or 'now'}"
+    print_step(f"🎮 Server Application Logs ({window})")
+
+    cmd = ["docker", "exec", "tank-royale-server", *LOG_SINK, "read"]
+    if since:
+        cmd.extend(["--since", since])
+    if until:
+        cmd.extend(["--until", until])
+
+    result = run_command(cmd, check=False)
+    if result.returncode == 0:
+        print(result.stdout)
+    else:
+        print_warning(f"Could not read server logs: {result.stderr.strip()}")
+
 def view_startup_logs() -> None:
     """View container startup logs."""
     if not check_container_running():
@@ -156,7 +183,7 @@ def view_all_logs() -> None:
     # Show each log file
     log_files = [
         ("startup.log", "🚀 Container Startup"),
-        ("server.log", "🎮 Server Application"),
+        ("server/", "🎮 Server Application"),
         ("xvfb.log", "🖥️  Virtual Display"),
         ("gc.log", "☕ Java Garbage Collection")
     ]
@@ -166,7 +193,10 @@ def view_all_logs() -> None:
         print_step(f"{description} ({filename})")
         print(f"{Colors.CYAN}{'='*60}{Colors.RESET}")
         
-        cmd = ["docker", "exec", "tank-royale-server", "tail", "-n", "20", f"/app/logs/{filename}"]
+        if filename == "server/":
+            cmd = ["docker", "exec", "tank-royale-server", *LOG_SINK, "tail", "-n", "20"]
+        else:
+            cmd = ["docker", "exec", "tank-royale-server", "tail", "-n", "20", f"/app/logs/{filename}"]
         result = run_command(cmd, check=False)
         
         if result.returncode == 0:
@@ -183,7 +213,7 @@ def show_container_info() -> None:
     print_step("📋 Container Information")
     
     # Container status
-    cmd = ["docker", "ps", "-f", "name=tank-royale-server", "--format", "table {{.Names}}\t{{.Status}}\t{{.Ports}}"]
+    cmd = ["docker", "ps", "-f", "name=^tank-royale-server$", "--format", "table {{.Names}}\t{{.Status}}\t{{.Ports}}"]
     result = run_command(cmd)
     if result.returncode == 0:
         print(result.stdout)
@@ -208,6 +238,7 @@ def main():
 Examples:
   python view_logs.py --follow           # Follow container logs in real-time
   python view_logs.py --server --tail 100  # Show last 100 server log lines
+  python view_logs.py --server --since 15m # Server logs of the last 15 minutes
   python view_logs.py --all             # Show all available logs
   python view_logs.py --startup         # Show container startup logs
         """
@@ -220,6 +251,8 @@ Examples:
     parser.add_argument("--startup", action="store_true", help="Show container startup logs")
     parser.add_argument("--all", action="store_true", help="Show all available logs")
     parser.add_argument("--info", action="store_true", help="Show container information")
+    parser.add_argument("--since", help="Server logs from this time (15m, 2h or 'YYYY-mm-dd HH:MM', UTC)")
+    parser.add_argument("--until", help="Server logs up to this time (same formats as --since)")
     
     args = parser.parse_args()
     
@@ -232,8 +265,8 @@ Examples:
         view_all_logs()
     elif args.startup:
         view_startup_logs()
-    elif args.server:
-        view_server_logs(follow=args.follow, tail=args.tail)
+    elif args.server or args.since or args.until:
+        view_server_logs(follow=args.follow, tail=args.tail, since=args.since, until=args.until)
     else:
         # Default to container logs
         view_container_logs(follow=args.follow, tail=args.tail)